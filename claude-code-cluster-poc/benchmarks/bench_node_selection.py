@@ -0,0 +1,196 @@
+"""Benchmark ClusterCoordinator best-node lookup
+
+Places pending tasks on a cluster of nodes with mixed specialty sets and
+capacities, completing a random running task whenever the cluster is full,
+so lookups see a realistic spread of node loads. Compares the capacity
+index (NodeIndex) against the previous full scan (filter, score and sort
+every node per task). The scan is sampled on fewer tasks since each lookup
+is O(N log N).
+
+Usage:
+    python -m benchmarks.bench_node_selection
+    python -m benchmarks.bench_node_selection --nodes 1000 --tasks 100000 --scan-tasks 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from unittest.mock import Mock, patch
+
+from src.services.cluster_coordinator import ClusterCoordinator, AgentNode, DistributedTask, NodeStatus, TaskStatus
+
+
+SPECIALTY_SETS = [
+    ["general"],
+    ["python"],
+    ["python", "testing"],
+    ["python", "backend"],
+    ["frontend", "typescript"],
+    ["frontend", "css", "typescript"],
+    ["docs"],
+    ["devops", "docker"]
+]
+
+REQUIREMENTS = [[], [], ["python"], ["python", "testing"], ["typescript"], ["frontend", "css"], ["docs"], ["docker"]]
+
+
+def legacy_find_best_node(nodes: Dict[str, AgentNode], task: DistributedTask) -> Optional[AgentNode]:
+    """The previous _find_best_node: filter, score and sort every node"""
+    available_nodes = [
+        node for node in nodes.values()
+        if node.status == NodeStatus.ONLINE and len(node.current_tasks) < node.max_concurrent_tasks
+    ]
+    if not available_nodes:
+        return None
+    
+    node_scores = []
+    for node in available_nodes:
+        score = 0.0
+        if task.requirements:
+            matching_specialties = set(task.requirements) & set(node.specialties)
+            score += len(matching_specialties) / len(task.requirements) * 0.7
+        else:
+            score += 0.5
+        score += (1.0 - len(node.current_tasks) / node.max_concurrent_tasks) * 0.3
+        node_scores.append((node, score))
+    
+    node_scores.sort(key=lambda x: x[1], reverse=True)
+    return node_scores[0][0]
+
+
+def make_cluster(coordinator: ClusterCoordinator, node_count: int, rng: random.Random) -> None:
+    """Register nodes with random specialty sets and capacities"""
+    for i in range(node_count):
+        coordinator.add_node(AgentNode(
+            node_id=f"node-{i:05d}",
+            host="10.0.0.1",
+            port=9000,
+            status=NodeStatus.ONLINE,
+            specialties=rng.choice(SPECIALTY_SETS),
+            current_tasks=[],
+            max_concurrent_tasks=rng.randint(2, 6),
+            last_heartbeat=datetime.now(),
+            capabilities={}
+        ))
+
+
+def make_tasks(count: int, rng: random.Random) -> List[DistributedTask]:
+    """Pending tasks with random requirements"""
+    now = datetime.now()
+    return [
+        DistributedTask(f"task-{i:07d}", "medium", rng.choice(REQUIREMENTS), None, TaskStatus.PENDING,
+                        now, None, None, None, 0, 3)
+        for i in range(count)
+    ]
+
+
+async def place(coordinator: ClusterCoordinator, tasks: List[DistributedTask], use_index: bool,
+                rng: random.Random) -> List[float]:
+    """Place every task, returning per-lookup latencies in milliseconds"""
+    running: List[tuple] = []
+    latencies: List[float] = []
+    
+    for task in tasks:
+        while True:
+            start = time.perf_counter()
+            if use_index:
+                node = await coordinator._find_best_node(task)
+            else:
+                node = legacy_find_best_node(coordinator.nodes, task)
+            latencies.append((time.perf_counter() - start) * 1000)
+            
+            if node is not None:
+                break
+            
+            # Cluster full: finish a random running task
+            i = rng.randrange(len(running))
+            running[i], running[-1] = running[-1], running[i]
+            done_node, done_task = running.pop()
+            done_node.current_tasks.remove(done_task)
+            coordinator.refresh_node(done_node.node_id)
+        
+        node.current_tasks.append(task.task_id)
+        coordinator.refresh_node(node.node_id)
+        running.append((node, task.task_id))
+    
+    return latencies
+
+
+def summarize(name: str, nodes: int, tasks: int, latencies: List[float], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    return {
+        "lookup": name,
+        "nodes": nodes,
+        "tasks": tasks,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "tasks_per_s": tasks / elapsed
+    }
+
+
+async def run(node_count: int, task_count: int, scan_tasks: int) -> List[Dict[str, Any]]:
+    results = []
+    cwd = os.getcwd()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the state file and a stray legacy one out of the working directory
+        os.chdir(tmp)
+        try:
+            settings = Mock()
+            settings.data_path = Path(tmp)
+            settings.coordinator_persistence = "json"
+            settings.coordinator_save_debounce = 1.0
+            settings.health_check_concurrency = 32
+            settings.assignment_interval = 5.0
+            settings.dispatch_concurrency = 32
+            settings.lease_duration = 60.0
+            settings.lease_poll_timeout = 30.0
+            settings.admission_control = False
+            settings.admission_queue_factor = 2.0
+            settings.admission_min_queue = 20
+            settings.admission_max_queue_age = 900.0
+            settings.admission_priority_quotas = "urgent:1.0,high:0.9,medium:0.7,low:0.4"
+            
+            for name, use_index, count in (("index", True, task_count), ("scan", False, scan_tasks)):
+                with patch("src.services.cluster_coordinator.get_settings", return_value=settings):
+                    coordinator = ClusterCoordinator()
+                rng = random.Random(42)
+                make_cluster(coordinator, node_count, rng)
+                tasks = make_tasks(count, rng)
+                
+                start = time.perf_counter()
+                latencies = await place(coordinator, tasks, use_index, rng)
+                coordinator.close()
+                results.append(summarize(name, node_count, count, latencies, time.perf_counter() - start))
+        finally:
+            os.chdir(cwd)
+    
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--scan-tasks", type=int, default=2000,
+                        help="Tasks placed with the full scan, which scores every node per lookup")
+    args = parser.parse_args()
+    
+    results = asyncio.run(run(args.nodes, args.tasks, args.scan_tasks))
+    
+    print(f"{'lookup':<8}{'nodes':>8}{'tasks':>10}{'mean ms':>12}{'p50 ms':>12}{'p99 ms':>12}{'tasks/s':>12}")
+    for r in results:
+        print(f"{r['lookup']:<8}{r['nodes']:>8}{r['tasks']:>10}{r['mean_ms']:>12.4f}"
+              f"{r['p50_ms']:>12.4f}{r['p99_ms']:>12.4f}{r['tasks_per_s']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark task write latency for the state backends
+
+Measures StateManager-style status updates (TaskStore.update) against
+stores pre-populated with 1k, 10k and 100k tasks.
+
+Usage:
+    python -m benchmarks.bench_state_journal
+    python -m benchmarks.bench_state_journal --sizes 1000 10000 --samples 100
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from src.services.journal_store import JournalTaskStore
+from src.services.sqlite_store import SQLiteTaskStore
+from src.services.state_manager import JsonTaskStore
+from src.utils.helpers import current_timestamp
+
+
+def make_task(index: int) -> Dict[str, Any]:
+    """Build a task record shaped like StateManager.create_task output"""
+    return {
+        "id": f"task-{index:08d}",
+        "status": "created",
+        "created_at": current_timestamp(),
+        "updated_at": current_timestamp(),
+        "issue": {
+            "number": index,
+            "title": f"Benchmark issue {index}",
+            "body": "Lorem ipsum dolor sit amet, " * 20,
+            "labels": ["enhancement", "backend"],
+            "repository": f"bench/repo-{index % 20}",
+            "html_url": f"https://github.com/bench/repo/issues/{index}"
+        },
+        "analysis": {"priority": "medium", "type": "feature", "requirements": ["backend"]},
+        "execution": {"started_at": None, "completed_at": None, "duration_seconds": None, "error": None},
+        "results": {"implementation": None, "review": None, "git_branch": None, "pr_url": None, "pr_number": None}
+    }
+
+
+def bench_store(name: str, store, size: int, samples: int) -> Dict[str, Any]:
+    """Populate a store and time status updates"""
+    store.put_many([make_task(i) for i in range(size)])
+    
+    def set_running(task: Dict[str, Any]) -> None:
+        task["status"] = "running"
+        task["updated_at"] = current_timestamp()
+    
+    latencies: List[float] = []
+    step = max(1, size // samples)
+    for i in range(samples):
+        task_id = f"task-{(i * step) % size:08d}"
+        start = time.perf_counter()
+        store.update(task_id, set_running)
+        latencies.append((time.perf_counter() - start) * 1000)
+    
+    store.close()
+    latencies.sort()
+    return {
+        "backend": name,
+        "tasks": size,
+        "samples": samples,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--json-samples", type=int, default=20,
+                        help="Samples for the JSON backend, which rewrites the whole file per update")
+    args = parser.parse_args()
+    
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = Path(tmp)
+            results.append(bench_store("json", JsonTaskStore(data_path / "tasks.json"), size, args.json_samples))
+            results.append(bench_store("sqlite", SQLiteTaskStore(data_path / "tasks.db"), size, args.samples))
+            results.append(bench_store("journal", JournalTaskStore(data_path / "tasks"), size, args.samples))
+    
+    print(f"{'backend':<10}{'tasks':>10}{'samples':>10}{'mean ms':>12}{'p50 ms':>12}{'p99 ms':>12}")
+    for r in results:
+        print(f"{r['backend']:<10}{r['tasks']:>10}{r['samples']:>10}"
+              f"{r['mean_ms']:>12.3f}{r['p50_ms']:>12.3f}{r['p99_ms']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
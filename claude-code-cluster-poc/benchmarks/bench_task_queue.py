@@ -0,0 +1,159 @@
+"""Benchmark TaskQueue enqueue/dequeue latency
+
+Compares the heap-based TaskQueue against the previous list implementation
+(sort on every insert, linear scan on every dequeue) at 1k, 10k and 100k
+queued tasks. A quarter of the queued tasks are urgent retries still in
+cooldown, which the list implementation has to scan past on every dequeue.
+
+Usage:
+    python -m benchmarks.bench_task_queue
+    python -m benchmarks.bench_task_queue --sizes 1000 100000 --samples 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from unittest.mock import Mock, patch
+
+from src.services.task_queue import TaskQueue, QueuedTask, TaskPriority, PRIORITY_ORDER
+
+
+PRIORITIES = ["low", "medium", "high", "urgent"]
+
+
+class ListQueue:
+    """The previous TaskQueue scheduling logic, without persistence"""
+    
+    def __init__(self):
+        self.queue: List[QueuedTask] = []
+        self.processing_tasks: Dict[str, Any] = {}
+    
+    async def add_task(self, task_id: str, priority: str = "medium") -> None:
+        if any(task.task_id == task_id for task in self.queue):
+            return
+        self.queue.append(QueuedTask(task_id, TaskPriority(priority), datetime.now()))
+        self.queue.sort(key=lambda x: (PRIORITY_ORDER[x.priority], x.created_at))
+    
+    async def get_next_task(self) -> Optional[QueuedTask]:
+        now = datetime.now()
+        for i, task in enumerate(self.queue):
+            if task.task_id in self.processing_tasks:
+                continue
+            if task.next_retry and now < task.next_retry:
+                continue
+            if task.attempts >= task.max_attempts:
+                continue
+            return self.queue.pop(i)
+        return None
+
+
+def fill(queue, size: int) -> None:
+    """Populate a queue with a mix of ready tasks and urgent retries in cooldown"""
+    now = datetime.now()
+    later = now + timedelta(hours=1)
+    
+    for i in range(size):
+        if i % 4 == 0:
+            task = QueuedTask(f"retry-{i:08d}", TaskPriority.URGENT, now, attempts=1, next_retry=later)
+        else:
+            task = QueuedTask(f"task-{i:08d}", TaskPriority(PRIORITIES[i % 3]), now)
+        
+        if isinstance(queue, ListQueue):
+            queue.queue.append(task)
+        else:
+            queue._push(task)
+    
+    if isinstance(queue, ListQueue):
+        queue.queue.sort(key=lambda x: (PRIORITY_ORDER[x.priority], x.created_at))
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """Summarize latencies in milliseconds"""
+    latencies = sorted(latencies)
+    return {
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    }
+
+
+async def bench_queue(name: str, queue, size: int, samples: int) -> List[Dict[str, Any]]:
+    """Time enqueue and dequeue at a given queue depth"""
+    fill(queue, size)
+    
+    enqueue: List[float] = []
+    for i in range(samples):
+        start = time.perf_counter()
+        await queue.add_task(f"new-{i:08d}", PRIORITIES[i % 4])
+        enqueue.append((time.perf_counter() - start) * 1000)
+    
+    dequeue: List[float] = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        await queue.get_next_task()
+        dequeue.append((time.perf_counter() - start) * 1000)
+    
+    return [
+        {"queue": name, "op": "enqueue", "tasks": size, "samples": samples, **percentiles(enqueue)},
+        {"queue": name, "op": "dequeue", "tasks": size, "samples": samples, **percentiles(dequeue)}
+    ]
+
+
+async def run(sizes: List[int], samples: int, list_samples: int) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            settings = Mock()
+            settings.data_path = Path(tmp)
+            settings.queue_persistence = "journal"
+            settings.journal_compact_threshold = 10 ** 9
+            settings.journal_compact_interval = 3600
+            settings.journal_fsync = False
+            settings.journal_archive = False
+            settings.queue_workers = 3
+            settings.queue_min_workers = 1
+            settings.queue_max_workers = 3
+            settings.queue_target_wait = 30.0
+            settings.queue_autoscale_interval = 5.0
+            settings.queue_executor = "thread"
+            settings.queue_repo_max_running = 0
+            settings.queue_repo_limits = ""
+            settings.queue_repo_weights = ""
+            settings.queue_metrics_window = 300.0
+            settings.retry_max_attempts = 3
+            settings.retry_base_delay = 30.0
+            settings.retry_max_delay = 3600.0
+            
+            with patch("src.services.task_queue.get_settings", return_value=settings):
+                queue = TaskQueue()
+            results.extend(await bench_queue("heap", queue, size, samples))
+            queue.journal.close()
+        
+        results.extend(await bench_queue("list", ListQueue(), size, list_samples))
+    
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--list-samples", type=int, default=50,
+                        help="Samples for the list queue, which sorts or scans the whole queue per operation")
+    args = parser.parse_args()
+    
+    results = asyncio.run(run(args.sizes, args.samples, args.list_samples))
+    
+    print(f"{'queue':<8}{'op':<10}{'tasks':>10}{'samples':>10}{'mean ms':>12}{'p50 ms':>12}{'p99 ms':>12}")
+    for r in results:
+        print(f"{r['queue']:<8}{r['op']:<10}{r['tasks']:>10}{r['samples']:>10}"
+              f"{r['mean_ms']:>12.4f}{r['p50_ms']:>12.4f}{r['p99_ms']:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 """Configuration management"""
 
 from pathlib import Path
-from typing import Optional
-from pydantic import Field
+from typing import Optional, Literal
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -20,12 +20,41 @@ class Settings(BaseSettings):
     # Git設定
     git_user_name: str = Field(default="Claude Code Bot", description="Git user name")
     git_user_email: str = Field(default="claude@example.com", description="Git user email")
+    git_clone_cache: bool = Field(default=True, description="Keep a mirror of each repository in the workspace and clone tasks from it")
     
     # パス設定
     workspace_path: Path = Field(default=Path("./workspace"), description="Workspace directory")
     data_path: Path = Field(default=Path("./data"), description="Data directory")
     logs_path: Path = Field(default=Path("./logs"), description="Logs directory")
     
+    # 状態管理設定
+    state_backend: Literal["json", "sqlite", "journal"] = Field(default="json", description="Task state backend (json, sqlite or journal)")
+    state_write_mode: Literal["write_through", "write_behind"] = Field(default="write_through", description="Write tasks immediately or through an in-memory write-behind cache")
+    state_flush_interval: float = Field(default=2.0, description="Write-behind cache flush interval in seconds")
+    state_flush_threshold: int = Field(default=50, description="Dirty task count that triggers an early write-behind flush")
+    blob_threshold_bytes: int = Field(default=8192, description="Result payloads at least this large are stored as blobs (0 disables)")
+    queue_persistence: Literal["json", "journal"] = Field(default="json", description="Task queue persistence (json or journal)")
+    journal_compact_threshold: int = Field(default=10000, description="Journal records that trigger snapshot compaction")
+    journal_compact_interval: float = Field(default=60.0, description="Journal compaction check interval in seconds")
+    journal_fsync: bool = Field(default=False, description="fsync every journal record")
+    journal_archive: bool = Field(default=False, description="Keep compacted journal segments as an audit trail")
+    
+    # タスクキュー設定
+    queue_workers: int = Field(default=3, description="Initial number of task queue workers")
+    queue_min_workers: int = Field(default=1, description="Minimum number of task queue workers")
+    queue_max_workers: int = Field(default=3, description="Maximum number of task queue workers (equal to the minimum disables autoscaling)")
+    queue_target_wait: float = Field(default=30.0, description="Autoscaler target for how long a ready task may wait, in seconds")
+    queue_autoscale_interval: float = Field(default=5.0, description="Autoscaler decision interval in seconds")
+    queue_executor: Literal["thread", "process"] = Field(default="thread", description="Run agent tasks on a thread pool or a process pool")
+    queue_repo_max_running: int = Field(default=0, description="Default cap on concurrently running tasks per repository (0 for unlimited)")
+    queue_repo_limits: str = Field(default="", description="Per-repository running task caps, e.g. owner/repo=2,owner/other=1")
+    queue_repo_weights: str = Field(default="", description="Per-repository fair-share weights, e.g. owner/repo=2 (others weigh 1)")
+    queue_metrics_window: float = Field(default=300.0, description="Rolling window for queue wait/service time percentiles and throughput, in seconds")
+    agent_pool_size: int = Field(default=3, description="Maximum number of reusable ClaudeAgent instances per process")
+    retry_max_attempts: int = Field(default=3, description="Attempts per task before it is dead-lettered (rate limit and network errors allow more)")
+    retry_base_delay: float = Field(default=30.0, description="Initial retry backoff in seconds, doubled per attempt")
+    retry_max_delay: float = Field(default=3600.0, description="Ceiling for any retry backoff in seconds")
+    
     # アプリケーション設定
     default_branch: str = Field(default="main", description="Default git branch")
     log_level: str = Field(default="INFO", description="Log level")
@@ -33,11 +62,46 @@ class Settings(BaseSettings):
     # 分散処理設定
     coordinator_host: str = Field(default="localhost", description="Coordinator host")
     coordinator_port: int = Field(default=8001, description="Coordinator port")
+    health_check_concurrency: int = Field(default=32, description="Maximum node health checks the coordinator runs at once")
+    assignment_interval: float = Field(default=5.0, description="Seconds between coordinator passes over pending tasks (capacity changes trigger a pass sooner)")
+    coordinator_persistence: Literal["json", "journal"] = Field(default="json", description="Coordinator state persistence under data_path (json or journal)")
+    coordinator_save_debounce: float = Field(default=1.0, description="Seconds coordinator state changes are coalesced before a snapshot write")
+    dispatch_concurrency: int = Field(default=32, description="Maximum task assignments the coordinator sends to nodes at once")
+    node_scheduling: Literal["push", "pull"] = Field(default="push", description="Agent nodes receive assignments (push) or lease tasks from the coordinator (pull)")
+    lease_duration: float = Field(default=60.0, description="Seconds a pull-mode node owns a leased task without renewing it")
+    lease_poll_timeout: float = Field(default=30.0, description="Longest a pull-mode node's lease request waits for work, in seconds")
+    node_channel: bool = Field(default=False, description="Agent nodes talk to the coordinator over one persistent WebSocket instead of per-request HTTP")
+    channel_ping_interval: float = Field(default=15.0, description="Seconds between WebSocket pings on a node channel, an unanswered ping closes it")
+    node_load_window: int = Field(default=6, description="Heartbeat resource samples kept per node for scheduling")
+    node_memory_limit: float = Field(default=0.9, description="Used memory fraction above which a node gets no new tasks")
+    node_swap_limit: float = Field(default=50.0, description="Swapped pages per second above which a node gets no new tasks")
+    node_disk_min_free_mb: float = Field(default=1024.0, description="Free workspace disk in MB below which a node gets no new tasks")
+    repo_affinity_weight: float = Field(default=0.2, description="Score bonus for nodes that already have the task's repository cached (0 disables affinity)")
+    speculative_execution: bool = Field(default=False, description="Start a backup copy of a task running well past its expected time on another node")
+    straggler_factor: float = Field(default=2.0, description="A task is a straggler after this many times the median run time of similar tasks")
+    straggler_min_seconds: float = Field(default=120.0, description="Never treat a task as a straggler before it has run this long, in seconds")
+    straggler_min_samples: int = Field(default=5, description="Completed tasks needed before run times are predicted for a priority or requirement set")
+    admission_control: bool = Field(default=False, description="Turn submitted tasks away with 429 while the cluster is saturated")
+    admission_queue_factor: float = Field(default=2.0, description="Pending tasks admitted per task slot of the online nodes")
+    admission_min_queue: int = Field(default=20, description="Pending tasks always admitted, even without online nodes")
+    admission_max_queue_age: float = Field(default=900.0, description="Oldest pending task age in seconds beyond which only full-quota priorities are admitted")
+    admission_priority_quotas: str = Field(default="urgent:1.0,high:0.9,medium:0.7,low:0.4", description="Share of the pending queue limit each priority may fill")
+    http_pool_size: int = Field(default=100, description="Maximum open connections of the shared coordinator/node HTTP session")
+    http_pool_size_per_host: int = Field(default=8, description="Maximum open connections to a single node or coordinator")
+    http_dns_cache_ttl: int = Field(default=300, description="Seconds resolved host names are cached")
+    http_keepalive_timeout: float = Field(default=60.0, description="Seconds an idle connection is kept open for reuse")
     
     # Webhook設定
     webhook_secret: str = Field(default="", description="GitHub webhook secret")
     webhook_port: int = Field(default=8000, description="Webhook server port")
     
+    @model_validator(mode="after")
+    def check_state_write_mode(self) -> "Settings":
+        """Reject write-behind with process workers, each would flush its own stale cache over the others"""
+        if self.queue_executor == "process" and self.state_write_mode == "write_behind":
+            raise ValueError("queue_executor=process requires state_write_mode=write_through")
+        return self
+    
     def model_post_init(self, __context) -> None:
         """Post-initialization: create directories"""
         self.workspace_path.mkdir(exist_ok=True, parents=True)
@@ -28,4 +28,22 @@ class TaskNotFoundError(ClaudeClusterError):
 
 class InvalidTaskStateError(ClaudeClusterError):
     """Invalid task state error"""
-    pass
\ No newline at end of file
+    pass
+
+
+class AgentPoolExhaustedError(ClaudeClusterError):
+    """No pooled agent became available in time"""
+    pass
+
+
+class TaskCancelledError(ClaudeClusterError):
+    """A running task was told to stop before publishing its changes"""
+    pass
+
+
+class AdmissionRejectedError(ClaudeClusterError):
+    """The coordinator turned a task away because the cluster is saturated"""
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds until the queue should have room
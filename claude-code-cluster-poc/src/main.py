@@ -250,6 +250,16 @@ def status(
             if task['results']['pr_url']:
                 table.add_row("Pull Request", task['results']['pr_url'])
             
+            # Implementation and review may be stored as blobs, load them on demand
+            implementation = agent.state_manager.get_task_result(task_id, "implementation")
+            if implementation:
+                table.add_row("Summary", implementation.get('summary', ''))
+                table.add_row("Files Changed", str(len(implementation.get('changes', []))))
+            
+            review = agent.state_manager.get_task_result(task_id, "review")
+            if review:
+                table.add_row("Review", f"{'approved' if review.get('approved') else 'changes requested'} (score: {review.get('score', '-')})")
+            
             console.print(table)
             
         else:
@@ -71,7 +71,8 @@ def start_node(
     agent_port: int = typer.Option(8002, help="Agent node port"),
     specialties: str = typer.Option("general", help="Comma-separated list of specialties"),
     max_tasks: int = typer.Option(3, help="Maximum concurrent tasks"),
-    node_id: Optional[str] = typer.Option(None, help="Custom node ID")
+    node_id: Optional[str] = typer.Option(None, help="Custom node ID"),
+    scheduling: Optional[str] = typer.Option(None, help="push (coordinator assigns) or pull (lease tasks), defaults to NODE_SCHEDULING")
 ):
     """Start an agent node"""
     try:
@@ -93,7 +94,8 @@ def start_node(
             coordinator_port=coordinator_port,
             agent_port=agent_port,
             specialties=specialties_list,
-            max_concurrent_tasks=max_tasks
+            max_concurrent_tasks=max_tasks,
+            scheduling=scheduling
         )
         
         import uvicorn
@@ -0,0 +1,93 @@
+"""Admission control for tasks submitted to the coordinator"""
+
+import math
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+
+def parse_quotas(text: str) -> Dict[str, float]:
+    """Parse "urgent:1.0,high:0.9" into {"urgent": 1.0, "high": 0.9}"""
+    quotas = {}
+    for item in text.split(","):
+        if item.strip():
+            priority, _, share = item.partition(":")
+            quotas[priority.strip()] = float(share)
+    return quotas
+
+
+class AdmissionControl:
+    """
+    Decides whether the coordinator takes on another task
+    
+    The pending queue may hold queue_factor tasks per slot of the online
+    nodes, and at least min_queue. Each priority may only fill its quota
+    of that limit, so low priority work is turned away first while urgent
+    tasks can use all of it. A queue whose oldest task has waited longer
+    than max_queue_age is not draining, and only tasks with the full
+    quota are admitted until it does. A rejection comes with the seconds
+    until the queue should have room again, from the rate at which the
+    last window tasks left the queue.
+    """
+    
+    def __init__(self, queue_factor: float = 2.0, min_queue: int = 20, max_queue_age: float = 900.0,
+                 quotas: Optional[Dict[str, float]] = None, window: int = 100, max_retry_after: float = 300.0):
+        self.queue_factor = queue_factor
+        self.min_queue = min_queue
+        self.max_queue_age = max_queue_age
+        self.quotas = quotas or {}
+        self.max_retry_after = max_retry_after
+        self._drained: deque = deque(maxlen=window)  # monotonic times tasks left the queue
+    
+    @classmethod
+    def from_settings(cls, settings) -> "AdmissionControl":
+        """Build a controller with the admission_* settings"""
+        return cls(
+            queue_factor=settings.admission_queue_factor,
+            min_queue=settings.admission_min_queue,
+            max_queue_age=settings.admission_max_queue_age,
+            quotas=parse_quotas(settings.admission_priority_quotas)
+        )
+    
+    def record_drain(self, count: int = 1) -> None:
+        """Note tasks leaving the pending queue for a node"""
+        now = time.monotonic()
+        self._drained.extend([now] * count)
+    
+    def drain_rate(self) -> Optional[float]:
+        """Tasks leaving the queue per second, None before enough of them did"""
+        if len(self._drained) < 2:
+            return None
+        
+        # Time since the oldest drain, so a stalled queue shows a falling rate
+        elapsed = time.monotonic() - self._drained[0]
+        return len(self._drained) / elapsed if elapsed > 0 else None
+    
+    def queue_limit(self, capacity: int) -> int:
+        """Most pending tasks the cluster takes for its total slot count"""
+        return max(self.min_queue, math.ceil(capacity * self.queue_factor))
+    
+    def check(self, priority: str, pending: int, capacity: int,
+              oldest_age: Optional[float]) -> Optional[Tuple[str, float]]:
+        """None to admit a task, else why it was rejected and the seconds to wait before retrying"""
+        # Unknown priorities are scheduled as medium, so they get its quota
+        quota = self.quotas.get(priority, self.quotas.get("medium", 1.0))
+        limit = self.queue_limit(capacity)
+        
+        if quota < 1.0 and oldest_age is not None and oldest_age > self.max_queue_age:
+            reason = f"oldest pending task has waited {oldest_age:.0f}s"
+            return reason, self.retry_after(pending - limit * quota + 1)
+        
+        allowed = math.floor(limit * quota)
+        if pending >= allowed:
+            reason = f"{pending} tasks pending, {priority} tasks are admitted below {allowed}"
+            return reason, self.retry_after(pending - allowed + 1)
+        
+        return None
+    
+    def retry_after(self, excess: float) -> float:
+        """Seconds for the queue to drain excess tasks at the observed rate"""
+        rate = self.drain_rate()
+        if not rate:
+            return self.max_retry_after
+        return float(min(self.max_retry_after, max(1, math.ceil(max(excess, 1) / rate))))
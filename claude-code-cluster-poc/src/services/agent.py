@@ -1,10 +1,11 @@
 """Main Claude Agent implementation"""
 
 import logging
+import threading
 from typing import Dict, Any, List, Optional
 
 from src.core.config import get_settings
-from src.core.exceptions import ClaudeClusterError, TaskNotFoundError
+from src.core.exceptions import ClaudeClusterError, TaskNotFoundError, InvalidTaskStateError, TaskCancelledError
 from src.clients.github_client import GitHubClient
 from src.clients.claude_client import ClaudeClient
 from src.services.state_manager import StateManager
@@ -51,15 +52,20 @@ class ClaudeAgent:
             logger.error(f"Failed to create task from issue: {e}")
             raise ClaudeClusterError(f"Failed to create task from issue: {e}")
     
-    def run_task(self, task_id: str) -> Dict[str, Any]:
-        """Execute a task"""
+    def run_task(self, task_id: str, cancelled: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Execute a task
+        Setting cancelled stops the task before it pushes its branch or opens
+        a pull request, e.g. when another node finished a copy of it first.
+        """
         
         try:
             # Get task data
             task = self.state_manager.get_task(task_id)
             
-            if task["status"] != "created":
-                raise ClaudeClusterError(f"Task {task_id} is not in created state")
+            # Failed tasks may be re-run by the queue's retry scheduler
+            if task["status"] not in ("created", "failed"):
+                raise InvalidTaskStateError(f"Task {task_id} is not in created or failed state (status: {task['status']})")
             
             logger.info(f"Starting execution of task {task_id}")
             
@@ -67,7 +73,7 @@ class ClaudeAgent:
             self.state_manager.update_task_status(task_id, "running")
             
             # Execute task steps
-            result = self._execute_task_steps(task_id, task)
+            result = self._execute_task_steps(task_id, task, cancelled)
             
             # Update task status
             self.state_manager.update_task_status(task_id, "completed")
@@ -75,12 +81,19 @@ class ClaudeAgent:
             logger.info(f"Task {task_id} completed successfully")
             return result
             
+        except TaskCancelledError:
+            logger.info(f"Task {task_id} cancelled before publishing its changes")
+            self.state_manager.update_task_status(task_id, "cancelled")
+            self.git_handler.cleanup_workspace(task_id)
+            raise
+            
         except Exception as e:
             logger.error(f"Task {task_id} failed: {e}")
             self.state_manager.update_task_status(task_id, "failed", str(e))
             raise ClaudeClusterError(f"Task execution failed: {e}")
     
-    def _execute_task_steps(self, task_id: str, task: Dict[str, Any]) -> Dict[str, Any]:
+    def _execute_task_steps(self, task_id: str, task: Dict[str, Any],
+                            cancelled: Optional[threading.Event] = None) -> Dict[str, Any]:
         """Execute the main task steps"""
         
         issue_data = task["issue"]
@@ -111,10 +124,12 @@ class ClaudeAgent:
         branch_name = self._create_git_branch_and_commit(task_id, repo_path, implementation, issue_data)
         
         # Step 7: Push branch
+        self._check_cancelled(task_id, cancelled)
         logger.info("Step 7: Pushing branch")
         self._push_branch(repo_path, branch_name)
         
         # Step 8: Create pull request
+        self._check_cancelled(task_id, cancelled)
         logger.info("Step 8: Creating pull request")
         pr_info = self._create_pull_request(task_id, implementation, issue_data, branch_name)
         
@@ -134,6 +149,11 @@ class ClaudeAgent:
             "completed_at": current_timestamp()
         }
     
+    def _check_cancelled(self, task_id: str, cancelled: Optional[threading.Event]) -> None:
+        """Raise TaskCancelledError once the task was told to stop"""
+        if cancelled is not None and cancelled.is_set():
+            raise TaskCancelledError(f"Task {task_id} was cancelled")
+    
     def _clone_repository(self, task_id: str, issue_data: Dict[str, Any]) -> Any:
         """Clone repository for task"""
         
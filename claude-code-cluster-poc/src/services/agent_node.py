@@ -3,20 +3,27 @@
 import asyncio
 import logging
 import json
+import threading
 import time
+from collections import deque
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pathlib import Path
 import socket
 import platform
 import aiohttp
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
 from contextlib import asynccontextmanager
 
 from src.core.config import get_settings
-from src.services.agent import Agent
+from src.core.exceptions import TaskNotFoundError
+from src.services.agent_pool import get_agent_pool
+from src.services.state_manager import StateManager
 from src.services.cluster_coordinator import AgentNode, NodeStatus
+from src.services.git_handler import list_cached_repositories
+from src.utils.http import get_http_session, close_http_session
 from src.utils.logging import get_logger
+from src.utils.system_metrics import SystemSampler
 
 
 logger = get_logger(__name__)
@@ -27,7 +34,8 @@ class DistributedAgentNode:
     
     def __init__(self, node_id: str = None, coordinator_host: str = "localhost", 
                  coordinator_port: int = 8001, agent_port: int = 8002,
-                 specialties: List[str] = None, max_concurrent_tasks: int = 3):
+                 specialties: List[str] = None, max_concurrent_tasks: int = 3,
+                 scheduling: str = None, channel: bool = None):
         self.settings = get_settings()
         
         # Node configuration
@@ -41,14 +49,30 @@ class DistributedAgentNode:
         self.specialties = specialties or ["general"]
         self.max_concurrent_tasks = max_concurrent_tasks
         self.current_tasks: List[str] = []
+        self.cancel_events: Dict[str, threading.Event] = {}  # task_id -> set to stop its agent before publishing
+        
+        # Resource readings and recent task durations travel with every heartbeat
+        self.system_sampler = SystemSampler(self.settings.workspace_path)
+        self.task_durations: deque = deque(maxlen=10)
         
         # Node state
         self.status = NodeStatus.OFFLINE
         self.registered = False
         self.heartbeat_interval = 30  # seconds
         
-        # Services
-        self.agent = Agent()
+        # Pull mode leases tasks from the coordinator instead of accepting assignments
+        self.scheduling = scheduling or self.settings.node_scheduling
+        self.leases: Dict[str, str] = {}  # task_id -> lease_id
+        self._slot_freed = asyncio.Event()
+        
+        # Optional persistent WebSocket to the coordinator for all node traffic
+        self.use_channel = self.settings.node_channel if channel is None else channel
+        self.channel: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._channel_lock = asyncio.Lock()
+        
+        # Services (agents are borrowed from the process-wide pool per task)
+        self.agent_pool = get_agent_pool()
+        self.state_manager = StateManager()
         self.app = self._create_fastapi_app()
         
         logger.info(f"Initialized agent node {self.node_id} on {self.host}:{self.agent_port}")
@@ -95,7 +119,8 @@ class DistributedAgentNode:
                 "node_id": self.node_id,
                 "current_tasks": len(self.current_tasks),
                 "max_tasks": self.max_concurrent_tasks,
-                "specialties": self.specialties
+                "specialties": self.specialties,
+                "agent_pool": self.agent_pool.get_stats()
             }
         
         # Node info endpoint
@@ -118,45 +143,33 @@ class DistributedAgentNode:
         
         # Task assignment endpoint
         @app.post("/api/tasks/{task_id}/assign")
-        async def assign_task(task_id: str, task_data: Dict[str, Any], 
-                             background_tasks: BackgroundTasks):
-            if len(self.current_tasks) >= self.max_concurrent_tasks:
-                raise HTTPException(status_code=503, detail="Node at capacity")
-            
-            if task_id in self.current_tasks:
-                raise HTTPException(status_code=409, detail="Task already assigned")
-            
-            # Add task to current tasks
-            self.current_tasks.append(task_id)
+        async def assign_task(task_id: str, task_data: Dict[str, Any]):
+            rejection = self._check_assignment(task_id)
+            if rejection:
+                raise HTTPException(status_code=rejection[0], detail=rejection[1])
             
             # Process task in background
-            background_tasks.add_task(self._process_task, task_id, task_data)
+            self._start_task(task_id, task_data)
             
             return {"status": "accepted", "task_id": task_id}
         
         # Task status endpoint
         @app.get("/api/tasks/{task_id}/status")
         async def get_task_status(task_id: str):
-            # Get task status from agent
-            status = self.agent.get_task_status(task_id)
-            if not status:
+            # Read task state directly, pooled agents may all be busy running tasks
+            try:
+                return self.state_manager.get_task(task_id)
+            except TaskNotFoundError:
                 raise HTTPException(status_code=404, detail="Task not found")
-            return status
         
         # Stop task endpoint
         @app.post("/api/tasks/{task_id}/stop")
         async def stop_task(task_id: str):
-            if task_id not in self.current_tasks:
+            if not self._cancel_task(task_id):
                 raise HTTPException(status_code=404, detail="Task not found")
             
-            # Remove from current tasks
-            if task_id in self.current_tasks:
-                self.current_tasks.remove(task_id)
-            
-            # Notify coordinator
-            await self._notify_coordinator_task_status(task_id, "cancelled")
-            
-            return {"status": "cancelled", "task_id": task_id}
+            # The coordinator hears "cancelled" once the agent thread has returned
+            return {"status": "stopping", "task_id": task_id}
         
         return app
     
@@ -164,12 +177,19 @@ class DistributedAgentNode:
         """Startup procedures"""
         logger.info(f"Starting agent node {self.node_id}")
         
-        # Register with coordinator
-        await self._register_with_coordinator()
+        # Register with coordinator, over the channel once it connects when enabled
+        if self.use_channel:
+            asyncio.create_task(self._channel_loop())
+        else:
+            await self._register_with_coordinator()
         
         # Start heartbeat task
         asyncio.create_task(self._heartbeat_loop())
         
+        if self.scheduling == "pull":
+            asyncio.create_task(self._pull_loop())
+            asyncio.create_task(self._lease_renewal_loop())
+        
         self.status = NodeStatus.ONLINE
         logger.info(f"Agent node {self.node_id} started successfully")
     
@@ -180,41 +200,153 @@ class DistributedAgentNode:
         self.status = NodeStatus.OFFLINE
         
         # Unregister from coordinator
-        await self._unregister_from_coordinator()
+        if self.channel is not None:
+            await self._channel_send({"type": "unregister"})
+            await self.channel.close()
+        else:
+            await self._unregister_from_coordinator()
+        await close_http_session()
         
         logger.info(f"Agent node {self.node_id} shut down")
     
+    def _node_info(self) -> AgentNode:
+        """This node as the coordinator registers it"""
+        return AgentNode(
+            node_id=self.node_id,
+            host=self.host,
+            port=self.agent_port,
+            status=NodeStatus.ONLINE,
+            specialties=self.specialties,
+            current_tasks=self.current_tasks,
+            max_concurrent_tasks=self.max_concurrent_tasks,
+            last_heartbeat=datetime.now(),
+            capabilities={
+                "platform": platform.platform(),
+                "python_version": platform.python_version(),
+                "scheduling": self.scheduling
+            }
+        )
+    
+    def _check_assignment(self, task_id: str) -> Optional[tuple]:
+        """(HTTP status, reason) if an assignment must be refused, None to accept it"""
+        if len(self.current_tasks) >= self.max_concurrent_tasks:
+            return 503, "Node at capacity"
+        
+        if task_id in self.current_tasks:
+            return 409, "Task already assigned"
+        
+        return None
+    
+    def _start_task(self, task_id: str, task_data: Dict[str, Any]) -> None:
+        """Take a slot and process a task in the background"""
+        self.current_tasks.append(task_id)
+        self.cancel_events[task_id] = threading.Event()
+        asyncio.create_task(self._process_task(task_id, task_data))
+    
+    def _cancel_task(self, task_id: str) -> bool:
+        """
+        Tell a running task to stop, False if it is not running here
+        The agent thread cannot be interrupted; it checks the flag before
+        pushing or opening a pull request. The slot and the pooled agent
+        stay taken until the thread returns, and only then is the
+        coordinator told the task was cancelled (see _process_task).
+        """
+        cancelled = self.cancel_events.get(task_id)
+        if cancelled is None:
+            return False
+        
+        cancelled.set()
+        return True
+    
+    def _release_task(self, task_id: str) -> bool:
+        """Drop a task from this node and free its slot, False if it was not running here"""
+        if task_id not in self.current_tasks:
+            return False
+        
+        self.current_tasks.remove(task_id)
+        self.leases.pop(task_id, None)
+        self._slot_freed.set()
+        return True
+    
+    async def _channel_loop(self) -> None:
+        """Keep a WebSocket channel to the coordinator open, reconnecting when it drops"""
+        url = f"ws://{self.coordinator_host}:{self.coordinator_port}/api/nodes/{self.node_id}/channel"
+        
+        while self.status == NodeStatus.ONLINE:
+            try:
+                # Unanswered pings close the socket, so both ends notice a dead peer quickly
+                async with get_http_session().ws_connect(url, heartbeat=self.settings.channel_ping_interval) as ws:
+                    self.channel = ws
+                    await self._channel_send({"type": "register", "node": self._node_info().to_dict()})
+                    self.registered = True
+                    logger.info("Connected to coordinator over a channel")
+                    
+                    async for message in ws:
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            await self._handle_channel_message(message.json())
+                        elif message.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.ERROR):
+                            break
+            
+            except Exception as e:
+                logger.error(f"Coordinator channel failed: {e}")
+            
+            finally:
+                self.channel = None
+                self.registered = False
+            
+            if self.status == NodeStatus.OFFLINE:
+                return
+            await asyncio.sleep(5)
+    
+    async def _channel_send(self, message: Dict[str, Any]) -> bool:
+        """Send a frame over the channel, False if it is not connected"""
+        ws = self.channel
+        if ws is None or ws.closed:
+            return False
+        
+        try:
+            async with self._channel_lock:
+                await ws.send_json(message)
+            return True
+        except Exception as e:
+            logger.debug(f"Channel send failed: {e}")
+            return False
+    
+    async def _handle_channel_message(self, message: Dict[str, Any]) -> None:
+        """Apply an assign or cancel frame from the coordinator"""
+        kind = message.get("type")
+        task_id = message.get("task_id")
+        
+        if kind == "assign":
+            rejection = self._check_assignment(task_id)
+            await self._channel_send({
+                "type": "assign_result",
+                "task_id": task_id,
+                "accepted": rejection is None,
+                "detail": rejection[1] if rejection else None
+            })
+            if rejection is None:
+                self._start_task(task_id, message)
+        elif kind == "cancel":
+            self._cancel_task(task_id)
+        else:
+            logger.warning(f"Ignoring unknown channel message {kind!r}")
+    
     async def _register_with_coordinator(self) -> bool:
         """Register this node with the cluster coordinator"""
         try:
-            node_info = AgentNode(
-                node_id=self.node_id,
-                host=self.host,
-                port=self.agent_port,
-                status=NodeStatus.ONLINE,
-                specialties=self.specialties,
-                current_tasks=self.current_tasks,
-                max_concurrent_tasks=self.max_concurrent_tasks,
-                last_heartbeat=datetime.now(),
-                capabilities={
-                    "platform": platform.platform(),
-                    "python_version": platform.python_version()
-                }
-            )
-            
             timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/nodes/register"
-                data = node_info.to_dict()
-                
-                async with session.post(url, json=data) as response:
-                    if response.status == 200:
-                        self.registered = True
-                        logger.info(f"Successfully registered with coordinator")
-                        return True
-                    else:
-                        logger.error(f"Failed to register: HTTP {response.status}")
-                        return False
+            url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/nodes/register"
+            data = self._node_info().to_dict()
+            
+            async with get_http_session().post(url, json=data, timeout=timeout) as response:
+                if response.status == 200:
+                    self.registered = True
+                    logger.info(f"Successfully registered with coordinator")
+                    return True
+                else:
+                    logger.error(f"Failed to register: HTTP {response.status}")
+                    return False
         
         except Exception as e:
             logger.error(f"Failed to register with coordinator: {e}")
@@ -227,17 +359,16 @@ class DistributedAgentNode:
         
         try:
             timeout = aiohttp.ClientTimeout(total=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/nodes/{self.node_id}/unregister"
-                
-                async with session.delete(url) as response:
-                    if response.status in [200, 404]:
-                        self.registered = False
-                        logger.info(f"Successfully unregistered from coordinator")
-                        return True
-                    else:
-                        logger.error(f"Failed to unregister: HTTP {response.status}")
-                        return False
+            url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/nodes/{self.node_id}/unregister"
+            
+            async with get_http_session().delete(url, timeout=timeout) as response:
+                if response.status in [200, 404]:
+                    self.registered = False
+                    logger.info(f"Successfully unregistered from coordinator")
+                    return True
+                else:
+                    logger.error(f"Failed to unregister: HTTP {response.status}")
+                    return False
         
         except Exception as e:
             logger.error(f"Failed to unregister from coordinator: {e}")
@@ -258,25 +389,44 @@ class DistributedAgentNode:
         if not self.registered:
             return False
         
+        load = self._load_sample()
+        repositories = list_cached_repositories(self.settings.workspace_path)
+        if self.channel is not None:
+            return await self._channel_send({
+                "type": "heartbeat",
+                "current_tasks": self.current_tasks,
+                "load": load,
+                "repositories": repositories
+            })
+        
         try:
             timeout = aiohttp.ClientTimeout(total=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/nodes/{self.node_id}/heartbeat"
-                data = {
-                    "current_tasks": self.current_tasks,
-                    "status": self.status.value,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                async with session.post(url, json=data) as response:
-                    return response.status == 200
+            url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/nodes/{self.node_id}/heartbeat"
+            data = {
+                "current_tasks": self.current_tasks,
+                "status": self.status.value,
+                "load": load,
+                "repositories": repositories,
+                "timestamp": datetime.now().isoformat()
+            }
+            
+            async with get_http_session().post(url, json=data, timeout=timeout) as response:
+                return response.status == 200
         
         except Exception as e:
             logger.debug(f"Heartbeat failed: {e}")
             return False
     
+    def _load_sample(self) -> Dict[str, Any]:
+        """Resource readings plus recent task durations for a heartbeat"""
+        sample = self.system_sampler.sample()
+        sample["task_seconds"] = [round(seconds, 1) for seconds in self.task_durations]
+        return sample
+    
     async def _process_task(self, task_id: str, task_data: Dict[str, Any]) -> None:
         """Process an assigned task"""
+        started = time.monotonic()
+        cancelled = self.cancel_events.get(task_id) or threading.Event()
         try:
             logger.info(f"Starting task {task_id}")
             
@@ -284,9 +434,13 @@ class DistributedAgentNode:
             await self._notify_coordinator_task_status(task_id, "in_progress")
             
             # Execute the task using the agent
-            result = await self._execute_task(task_id, task_data)
+            result = await self._execute_task(task_id, task_data, cancelled)
             
-            if result["success"]:
+            if cancelled.is_set():
+                # The agent has returned, the coordinator may now reuse the slot
+                await self._notify_coordinator_task_status(task_id, "cancelled")
+                logger.info(f"Task {task_id} stopped after cancellation")
+            elif result["success"]:
                 await self._notify_coordinator_task_status(task_id, "completed")
                 logger.info(f"Task {task_id} completed successfully")
             else:
@@ -295,18 +449,84 @@ class DistributedAgentNode:
         
         except Exception as e:
             logger.error(f"Error processing task {task_id}: {e}")
-            await self._notify_coordinator_task_status(task_id, "failed")
+            await self._notify_coordinator_task_status(task_id, "cancelled" if cancelled.is_set() else "failed")
         
         finally:
             # Remove from current tasks
-            if task_id in self.current_tasks:
-                self.current_tasks.remove(task_id)
+            self.cancel_events.pop(task_id, None)
+            self._release_task(task_id)
+            self.task_durations.append(time.monotonic() - started)
+    
+    async def _pull_loop(self) -> None:
+        """Lease tasks from the coordinator whenever a slot is free (pull scheduling)"""
+        while self.status == NodeStatus.ONLINE:
+            if len(self.current_tasks) >= self.max_concurrent_tasks:
+                self._slot_freed.clear()
+                await self._slot_freed.wait()
+                continue
+            
+            lease = await self._request_lease()
+            if lease is None:
+                continue
+            
+            task_id = lease["task_id"]
+            self.leases[task_id] = lease["lease_id"]
+            self._start_task(task_id, lease)
+    
+    async def _request_lease(self) -> Optional[Dict[str, Any]]:
+        """Long-poll the coordinator for a task lease, None if no work arrived"""
+        wait = self.settings.lease_poll_timeout
+        try:
+            timeout = aiohttp.ClientTimeout(total=wait + 10)
+            url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/nodes/{self.node_id}/lease"
+            
+            async with get_http_session().post(url, json={"wait": wait}, timeout=timeout) as response:
+                if response.status == 200:
+                    return await response.json()
+                if response.status == 204:
+                    return None
+                logger.warning(f"Lease request failed: HTTP {response.status}")
+        
+        except Exception as e:
+            logger.error(f"Failed to request a task lease: {e}")
+        
+        # Back off before polling again, e.g. while the coordinator is down or we are not registered
+        await asyncio.sleep(self.heartbeat_interval)
+        return None
+    
+    async def _lease_renewal_loop(self) -> None:
+        """Renew the leases of running tasks well before they expire"""
+        interval = self.settings.lease_duration / 3
+        while self.status == NodeStatus.ONLINE:
+            await asyncio.sleep(interval)
+            for task_id, lease_id in list(self.leases.items()):
+                if not await self._renew_lease(task_id, lease_id):
+                    # The coordinator handed the task back to the pool, stop claiming it
+                    self.leases.pop(task_id, None)
+    
+    async def _renew_lease(self, task_id: str, lease_id: str) -> bool:
+        """Renew one lease, False only if the coordinator says it was lost"""
+        try:
+            timeout = aiohttp.ClientTimeout(total=5)
+            url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/tasks/{task_id}/lease/renew"
+            data = {"node_id": self.node_id, "lease_id": lease_id}
+            
+            async with get_http_session().post(url, json=data, timeout=timeout) as response:
+                if response.status == 409:
+                    logger.warning(f"Lease on task {task_id} was lost")
+                    return False
+                return True
+        
+        except Exception as e:
+            logger.debug(f"Lease renewal failed for task {task_id}: {e}")
+            return True
     
-    async def _execute_task(self, task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _execute_task(self, task_id: str, task_data: Dict[str, Any],
+                            cancelled: Optional[threading.Event] = None) -> Dict[str, Any]:
         """Execute the actual task"""
         try:
-            # Run the task using the agent
-            result = self.agent.run_task(task_id)
+            # Run the task on a pooled agent without blocking the event loop
+            result = await asyncio.to_thread(self.agent_pool.run, lambda agent: agent.run_task(task_id, cancelled))
             return {"success": True, "result": result}
         
         except Exception as e:
@@ -314,18 +534,20 @@ class DistributedAgentNode:
     
     async def _notify_coordinator_task_status(self, task_id: str, status: str) -> bool:
         """Notify coordinator of task status change"""
+        if await self._channel_send({"type": "status", "task_id": task_id, "status": status}):
+            return True
+        
         try:
             timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/tasks/{task_id}/status"
-                data = {
-                    "status": status,
-                    "node_id": self.node_id,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                async with session.put(url, json=data) as response:
-                    return response.status == 200
+            url = f"http://{self.coordinator_host}:{self.coordinator_port}/api/tasks/{task_id}/status"
+            data = {
+                "status": status,
+                "node_id": self.node_id,
+                "timestamp": datetime.now().isoformat()
+            }
+            
+            async with get_http_session().put(url, json=data, timeout=timeout) as response:
+                return response.status == 200
         
         except Exception as e:
             logger.error(f"Failed to notify coordinator of task status: {e}")
@@ -341,6 +563,9 @@ class DistributedAgentNode:
             "specialties": self.specialties,
             "current_tasks": self.current_tasks,
             "max_concurrent_tasks": self.max_concurrent_tasks,
+            "scheduling": self.scheduling,
+            "leases": len(self.leases),
+            "channel": self.channel is not None,
             "registered": self.registered,
             "coordinator": f"{self.coordinator_host}:{self.coordinator_port}"
         }
@@ -0,0 +1,126 @@
+"""Pool of long-lived Claude agents"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from src.core.config import get_settings
+from src.core.exceptions import AgentPoolExhaustedError
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _create_agent() -> Any:
+    """Build a ClaudeAgent (imported lazily, it pulls in every client)"""
+    from src.services.agent import ClaudeAgent
+    return ClaudeAgent()
+
+
+class AgentPool:
+    """
+    Bounded pool of reusable ClaudeAgent instances
+    Agents keep their GitHub/Anthropic HTTP clients, StateManager and
+    GitHandler between tasks, so connection pools and TLS sessions survive.
+    Agents are created lazily up to size and handed out most recently used
+    first, so a lightly loaded pool keeps reusing the warmest agents.
+    """
+    
+    def __init__(self, size: int = 3, factory: Optional[Callable[[], Any]] = None):
+        self.size = size
+        self.factory = factory or _create_agent
+        
+        self._condition = threading.Condition()
+        self._idle: List[Any] = []
+        self._created = 0
+    
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """Borrow an agent, creating one if the pool is not full"""
+        with self._condition:
+            while not self._idle and self._created >= self.size:
+                if not self._condition.wait(timeout):
+                    raise AgentPoolExhaustedError(f"No agent available after {timeout}s (pool size {self.size})")
+            
+            if self._idle:
+                return self._idle.pop()
+            
+            self._created += 1
+        
+        # Construct outside the lock, agent setup does network and file I/O
+        try:
+            agent = self.factory()
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+        
+        logger.info(f"Created pooled agent ({self._created}/{self.size})")
+        return agent
+    
+    def release(self, agent: Any, discard: bool = False) -> None:
+        """Return a borrowed agent, or drop it so a fresh one is built next time"""
+        with self._condition:
+            if discard:
+                self._created -= 1
+            else:
+                self._idle.append(agent)
+            self._condition.notify()
+    
+    @contextmanager
+    def agent(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Borrow an agent for the duration of a with block"""
+        agent = self.acquire(timeout)
+        try:
+            yield agent
+        finally:
+            self.release(agent)
+    
+    def run(self, func: Callable[[Any], T], timeout: Optional[float] = None) -> T:
+        """Call func with a borrowed agent (blocking, run it off the event loop)"""
+        with self.agent(timeout) as agent:
+            return func(agent)
+    
+    def warm(self, count: int) -> None:
+        """Pre-create agents until count exist (capped at the pool size)"""
+        with self._condition:
+            to_create = max(0, min(count, self.size) - self._created)
+            self._created += to_create
+        
+        for created in range(to_create):
+            try:
+                agent = self.factory()
+            except Exception:
+                # Give back this slot and every one not built yet
+                with self._condition:
+                    self._created -= to_create - created
+                    self._condition.notify_all()
+                raise
+            self.release(agent)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get pool occupancy"""
+        with self._condition:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle)
+            }
+
+
+# Process-wide pool shared by queue workers and the distributed agent node
+_agent_pool: Optional[AgentPool] = None
+_agent_pool_lock = threading.Lock()
+
+
+def get_agent_pool() -> AgentPool:
+    """Get the shared agent pool (singleton), sized by settings.agent_pool_size"""
+    global _agent_pool
+    with _agent_pool_lock:
+        if _agent_pool is None:
+            _agent_pool = AgentPool(get_settings().agent_pool_size)
+        return _agent_pool
@@ -0,0 +1,53 @@
+"""Worker autoscaling for the task queue"""
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class QueueLoad:
+    """Snapshot of queue load used for a scaling decision"""
+    workers: int
+    busy: int
+    ready: int
+    oldest_wait: float  # seconds the oldest ready task has been waiting
+    mean_service_time: Optional[float]  # seconds, None before any task finished
+
+
+class WorkerAutoscaler:
+    """
+    Picks a worker count between min_workers and max_workers
+    
+    The backlog is sized with the recent mean service time: enough workers
+    to drain every ready task within target_wait, on top of the busy ones.
+    A backlog whose oldest task already waited longer than target_wait adds
+    one worker even when the estimate says otherwise. Scale-up is immediate,
+    scale-down releases one idle worker per decision to avoid flapping.
+    """
+    
+    def __init__(self, min_workers: int, max_workers: int, target_wait: float = 30.0,
+                 default_service_time: float = 60.0):
+        self.min_workers = min_workers
+        self.max_workers = max(min_workers, max_workers)
+        self.target_wait = target_wait
+        self.default_service_time = default_service_time
+    
+    @property
+    def enabled(self) -> bool:
+        """Scaling only happens when the bounds leave room for it"""
+        return self.max_workers > self.min_workers
+    
+    def desired_workers(self, load: QueueLoad) -> int:
+        """Worker count for the given load"""
+        service_time = load.mean_service_time or self.default_service_time
+        
+        desired = load.busy + math.ceil(load.ready * service_time / self.target_wait)
+        if load.ready and load.oldest_wait > self.target_wait:
+            desired = max(desired, load.workers + 1)
+        
+        if desired < load.workers:
+            # Shrink gradually and never below the busy workers
+            desired = max(load.workers - 1, load.busy, desired)
+        
+        return max(self.min_workers, min(self.max_workers, desired))
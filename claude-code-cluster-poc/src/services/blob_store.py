@@ -0,0 +1,83 @@
+"""Content-addressed blob store for large task payloads"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Any
+
+
+logger = logging.getLogger(__name__)
+
+
+BLOB_REF_KEY = "$blob"
+
+
+class BlobStore:
+    """
+    Stores JSON payloads as zlib-compressed files named by their SHA-256
+    Identical payloads map to the same blob, so they are stored once.
+    Task records keep only a small reference: {"$blob": "<sha256>", "size": n}
+    """
+    
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(exist_ok=True, parents=True)
+    
+    def _blob_path(self, digest: str) -> Path:
+        """Fan blobs out into 256 subdirectories"""
+        return self.root / digest[:2] / f"{digest[2:]}.json.z"
+    
+    def put(self, value: Any) -> Dict[str, Any]:
+        """Store a JSON-serializable value and return its reference"""
+        return self._put_bytes(self._serialize(value))
+    
+    def _serialize(self, value: Any) -> bytes:
+        """Canonical JSON encoding, so equal values hash equally"""
+        return json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    
+    def _put_bytes(self, data: bytes) -> Dict[str, Any]:
+        """Store serialized data and return its reference"""
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        
+        if not blob_path.exists():
+            blob_path.parent.mkdir(exist_ok=True)
+            tmp_path = blob_path.with_name(f".{blob_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(data))
+            os.replace(tmp_path, blob_path)
+            logger.debug(f"Stored blob {digest} ({len(data)} bytes)")
+        
+        return {BLOB_REF_KEY: digest, "size": len(data)}
+    
+    def get(self, ref: Dict[str, Any]) -> Any:
+        """Load the value behind a reference"""
+        digest = ref[BLOB_REF_KEY]
+        with open(self._blob_path(digest), "rb") as f:
+            return json.loads(zlib.decompress(f.read()).decode("utf-8"))
+    
+    def resolve(self, value: Any) -> Any:
+        """Load value if it is a blob reference, otherwise return it unchanged"""
+        if is_blob_ref(value):
+            return self.get(value)
+        return value
+    
+    def maybe_put(self, value: Any, threshold: int) -> Any:
+        """Store value as a blob if its serialized size reaches threshold"""
+        if value is None or threshold <= 0:
+            return value
+        
+        data = self._serialize(value)
+        if len(data) < threshold:
+            return value
+        
+        return self._put_bytes(data)
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Check whether a task field holds a blob reference"""
+    return isinstance(value, dict) and BLOB_REF_KEY in value
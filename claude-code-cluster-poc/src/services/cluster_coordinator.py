@@ -1,23 +1,37 @@
 """Cluster coordination service for distributed processing"""
 
 import asyncio
+import heapq
 import logging
-import json
 import time
-from typing import Dict, Any, List, Optional, Set
+import uuid
+from typing import Dict, Any, Iterable, List, Optional, Set
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
 import aiohttp
-from pathlib import Path
 
 from src.core.config import get_settings
+from src.core.exceptions import AdmissionRejectedError
+from src.services.admission import AdmissionControl
+from src.services.cluster_state import ClusterStateStore
+from src.services.journal import JournaledMap
+from src.services.node_channel import NodeChannel
+from src.services.node_index import NodeIndex, node_score
+from src.services.node_load import NodeLoad
+from src.services.task_durations import TaskDurations
+from src.services.task_index import TaskStatusIndex
+from src.utils.http import get_http_session
 from src.utils.logging import get_logger
 
 
 logger = get_logger(__name__)
 
 
+# Scheduling order of task priorities, most urgent first
+PRIORITY_RANK = {"urgent": 0, "high": 1, "medium": 2, "low": 3}
+
+
 class NodeStatus(Enum):
     """Node status enumeration"""
     ONLINE = "online"
@@ -49,6 +63,11 @@ class AgentNode:
     last_heartbeat: datetime
     capabilities: Dict[str, Any]
     
+    @property
+    def pulls_work(self) -> bool:
+        """Whether the node leases tasks itself instead of receiving assignments"""
+        return self.capabilities.get("scheduling") == "pull"
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
         data = asdict(self)
@@ -59,6 +78,7 @@ class AgentNode:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "AgentNode":
         """Create from dictionary"""
+        data = dict(data)
         data["status"] = NodeStatus(data["status"])
         data["last_heartbeat"] = datetime.fromisoformat(data["last_heartbeat"])
         return cls(**data)
@@ -78,6 +98,11 @@ class DistributedTask:
     completed_at: Optional[datetime]
     retry_count: int
     max_retries: int
+    repository: Optional[str] = None  # owner/repo, steers the task to nodes with a warm clone
+    lease_id: Optional[str] = None  # Set while a pull-mode node holds the task
+    lease_expires_at: Optional[datetime] = None
+    speculative_node: Optional[str] = None  # Node running a backup copy of the task while it straggles
+    speculated_at: Optional[datetime] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -90,11 +115,16 @@ class DistributedTask:
             data["started_at"] = self.started_at.isoformat()
         if self.completed_at:
             data["completed_at"] = self.completed_at.isoformat()
+        if self.lease_expires_at:
+            data["lease_expires_at"] = self.lease_expires_at.isoformat()
+        if self.speculated_at:
+            data["speculated_at"] = self.speculated_at.isoformat()
         return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "DistributedTask":
         """Create from dictionary"""
+        data = dict(data)
         data["status"] = TaskStatus(data["status"])
         data["created_at"] = datetime.fromisoformat(data["created_at"])
         if data.get("assigned_at"):
@@ -103,6 +133,10 @@ class DistributedTask:
             data["started_at"] = datetime.fromisoformat(data["started_at"])
         if data.get("completed_at"):
             data["completed_at"] = datetime.fromisoformat(data["completed_at"])
+        if data.get("lease_expires_at"):
+            data["lease_expires_at"] = datetime.fromisoformat(data["lease_expires_at"])
+        if data.get("speculated_at"):
+            data["speculated_at"] = datetime.fromisoformat(data["speculated_at"])
         return cls(**data)
 
 
@@ -114,9 +148,62 @@ class ClusterCoordinator:
         self.coordinator_port = coordinator_port
         self.nodes: Dict[str, AgentNode] = {}
         self.tasks: Dict[str, DistributedTask] = {}
+        
+        # Tasks by status, so scheduling does not rescan the task history
+        self.task_index = TaskStatusIndex(TaskStatus.PENDING, lambda priority: PRIORITY_RANK.get(priority, 2))
+        
+        # Nodes with free capacity, kept current on every node change
+        self.node_index = NodeIndex()
+        self.node_load: Dict[str, NodeLoad] = {}  # recent resource samples from heartbeats
+        
+        # Repositories each node has cached (owner/repo -> commit SHA) and the reverse lookup
+        self.repo_affinity_weight = self.settings.repo_affinity_weight
+        self.node_repositories: Dict[str, Dict[str, Optional[str]]] = {}
+        self.repository_nodes: Dict[str, Set[str]] = {}
         self.heartbeat_interval = 30  # seconds
         self.heartbeat_timeout = 120  # seconds
-        self.state_file = Path("cluster_state.json")
+        self.health_check_concurrency = self.settings.health_check_concurrency
+        self.assignment_interval = self.settings.assignment_interval
+        self.lease_duration = self.settings.lease_duration
+        self.lease_poll_timeout = self.settings.lease_poll_timeout
+        
+        # Tasks running well past the usual time for their kind get a backup copy on another node
+        self.speculative_execution = self.settings.speculative_execution
+        self.straggler_factor = self.settings.straggler_factor
+        self.straggler_min_seconds = self.settings.straggler_min_seconds
+        self.task_durations = TaskDurations(min_samples=self.settings.straggler_min_samples)
+        
+        # Submissions are turned away while the pending queue is over its limits
+        self.admission_control = self.settings.admission_control
+        self.admission = AdmissionControl.from_settings(self.settings)
+        
+        # Changes are coalesced into debounced snapshots or journaled per node/task
+        journal = None
+        if self.settings.coordinator_persistence == "journal":
+            journal = JournaledMap(
+                self.settings.data_path / "cluster_state",
+                compact_threshold=self.settings.journal_compact_threshold,
+                compact_interval=self.settings.journal_compact_interval,
+                fsync=self.settings.journal_fsync,
+                archive=self.settings.journal_archive
+            )
+        self.state_store = ClusterStateStore(
+            self.settings.data_path / "cluster_state.json",
+            self._snapshot_state,
+            debounce=self.settings.coordinator_save_debounce,
+            journal=journal
+        )
+        
+        # Set when capacity or pending work changes, wakes the assignment loop early
+        self._assignment_wanted = asyncio.Event()
+        self._assignment_loop_active = False
+        
+        # Replaced on every wakeup, so each long-polling node waits on the current one
+        self._work_posted = asyncio.Event()
+        self._leases: List[tuple] = []  # (lease_expires_at, lease_id, task_id), renewed ones go stale
+        
+        # Nodes connected over a persistent WebSocket instead of per-request HTTP
+        self.channels: Dict[str, NodeChannel] = {}
         
         # Load existing state
         self._load_state()
@@ -124,51 +211,66 @@ class ClusterCoordinator:
         logger.info(f"Cluster coordinator initialized on port {coordinator_port}")
     
     def _load_state(self) -> None:
-        """Load cluster state from file"""
-        if not self.state_file.exists():
-            return
-        
+        """Load cluster state from the state store"""
         try:
-            with open(self.state_file, 'r') as f:
-                state = json.load(f)
+            state = self.state_store.load()
             
             # Load nodes
             for node_data in state.get("nodes", []):
-                node = AgentNode.from_dict(node_data)
-                self.nodes[node.node_id] = node
+                self.add_node(AgentNode.from_dict(node_data))
             
             # Load tasks
             for task_data in state.get("tasks", []):
                 task = DistributedTask.from_dict(task_data)
                 self.tasks[task.task_id] = task
+                self.task_index.add(task)
+                if task.lease_id:
+                    heapq.heappush(self._leases, (task.lease_expires_at, task.lease_id, task.task_id))
+            
+            # Predict run times from the tasks that already finished
+            finished = sorted(
+                (task for task in self.tasks.values()
+                 if task.status == TaskStatus.COMPLETED and task.started_at and task.completed_at),
+                key=lambda task: task.completed_at
+            )
+            for task in finished:
+                self._record_duration(task)
             
             logger.info(f"Loaded cluster state: {len(self.nodes)} nodes, {len(self.tasks)} tasks")
         
         except Exception as e:
             logger.error(f"Failed to load cluster state: {e}")
     
-    def _save_state(self) -> None:
-        """Save cluster state to file"""
+    def _snapshot_state(self) -> Dict[str, Any]:
+        """Whole cluster state for a snapshot write"""
+        return {
+            "nodes": [node.to_dict() for node in self.nodes.values()],
+            "tasks": [task.to_dict() for task in self.tasks.values()]
+        }
+    
+    def _save_state(self, tasks: Iterable[DistributedTask] = (), nodes: Iterable[AgentNode] = ()) -> None:
+        """Persist changed tasks and nodes (coalesced by the state store)"""
         try:
-            state = {
-                "nodes": [node.to_dict() for node in self.nodes.values()],
-                "tasks": [task.to_dict() for task in self.tasks.values()],
-                "updated_at": datetime.now().isoformat()
-            }
-            
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=2)
+            for task in tasks:
+                self.state_store.put(f"task:{task.task_id}", task)
+            for node in nodes:
+                self.state_store.put(f"node:{node.node_id}", node)
         
         except Exception as e:
             logger.error(f"Failed to save cluster state: {e}")
     
+    def close(self) -> None:
+        """Write pending state changes, called on shutdown"""
+        self.state_store.close()
+    
     async def register_node(self, node: AgentNode) -> bool:
         """Register a new agent node"""
         try:
             # Check if node is reachable
             if await self._ping_node(node):
-                self.nodes[node.node_id] = node
-                self._save_state()
+                self.add_node(node)
+                self._save_state(nodes=[node])
+                self.request_assignment()
                 logger.info(f"Registered node {node.node_id} at {node.host}:{node.port}")
                 return True
             else:
@@ -186,32 +288,69 @@ class ClusterCoordinator:
             await self._reassign_node_tasks(node_id)
             
             del self.nodes[node_id]
-            self._save_state()
+            self.node_load.pop(node_id, None)
+            self._record_repositories(node_id, {})
+            self.node_index.remove(node_id)
+            self.state_store.delete(f"node:{node_id}")
             logger.info(f"Unregistered node {node_id}")
             return True
         
         return False
     
+    def add_node(self, node: AgentNode) -> None:
+        """Add or replace a node without contacting it"""
+        self.nodes[node.node_id] = node
+        self.refresh_node(node.node_id)
+    
+    def refresh_node(self, node_id: str) -> None:
+        """Re-index a node after its status, task list, capacity or reported load changed"""
+        node = self.nodes.get(node_id)
+        load = self.node_load.get(node_id)
+        if node is None:
+            self.node_index.remove(node_id)
+        elif node.pulls_work:
+            # Pull-mode nodes lease their own work, never push to them
+            self.node_index.discard(node_id)
+        elif node.status == NodeStatus.ONLINE and len(node.current_tasks) < node.max_concurrent_tasks and \
+                not (load and load.overloaded()):
+            # A node busy with heavy tasks scores as loaded even with free slots
+            load_ratio = len(node.current_tasks) / node.max_concurrent_tasks
+            if load:
+                load_ratio = max(load_ratio, load.pressure())
+            self.node_index.update(node_id, node.specialties, load_ratio)
+        else:
+            self.node_index.discard(node_id)
+    
     async def _ping_node(self, node: AgentNode) -> bool:
         """Ping a node to check if it's alive"""
+        if node.node_id in self.channels:
+            # An open channel is alive, a dead one is failed over as soon as it closes
+            return True
+        
         try:
             timeout = aiohttp.ClientTimeout(total=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                url = f"http://{node.host}:{node.port}/health"
-                async with session.get(url) as response:
-                    return response.status == 200
+            url = f"http://{node.host}:{node.port}/health"
+            async with get_http_session().get(url, timeout=timeout) as response:
+                return response.status == 200
         
         except Exception as e:
             logger.debug(f"Ping failed for node {node.node_id}: {e}")
             return False
     
     async def submit_task(self, task_id: str, priority: str = "medium", 
-                         requirements: List[str] = None) -> bool:
-        """Submit a task for distributed processing"""
+                         requirements: List[str] = None, repository: Optional[str] = None) -> bool:
+        """
+        Submit a task for distributed processing
+        Raises AdmissionRejectedError when admission control turns the task
+        away, False means the task already exists.
+        """
         if task_id in self.tasks:
             logger.warning(f"Task {task_id} already exists")
             return False
         
+        if self.admission_control:
+            self._admit(priority)
+        
         task = DistributedTask(
             task_id=task_id,
             priority=priority,
@@ -223,100 +362,293 @@ class ClusterCoordinator:
             started_at=None,
             completed_at=None,
             retry_count=0,
-            max_retries=3
+            max_retries=3,
+            repository=repository
         )
         
         self.tasks[task_id] = task
-        self._save_state()
-        
-        # Try to assign immediately
-        await self._assign_task(task_id)
+        self.task_index.add(task)
+        self._save_state(tasks=[task])
         
         logger.info(f"Submitted task {task_id} with priority {priority}")
+        
+        # Try to assign right away, batched with other submissions when the loop runs
+        await self._schedule_soon()
         return True
     
-    async def _assign_task(self, task_id: str) -> bool:
-        """Assign a task to the best available node"""
-        task = self.tasks.get(task_id)
-        if not task or task.status != TaskStatus.PENDING:
-            return False
+    def _admit(self, priority: str) -> None:
+        """Raise AdmissionRejectedError if the queue has no room for another task of this priority"""
+        pending = self.task_index.count(TaskStatus.PENDING)
+        oldest = self.task_index.oldest_pending()
+        capacity = sum(
+            node.max_concurrent_tasks for node in self.nodes.values()
+            if node.status == NodeStatus.ONLINE and not (node.node_id in self.node_load and
+                                                         self.node_load[node.node_id].overloaded())
+        )
+        oldest_age = (datetime.now() - oldest).total_seconds() if oldest else None
         
-        # Find the best node for this task
-        best_node = await self._find_best_node(task)
-        if not best_node:
-            logger.debug(f"No available node for task {task_id}")
-            return False
+        rejection = self.admission.check(priority, pending, capacity, oldest_age)
+        if rejection is not None:
+            reason, retry_after = rejection
+            logger.warning(f"Rejected {priority} task: {reason}, retry after {retry_after:.0f}s")
+            raise AdmissionRejectedError(f"Cluster is saturated: {reason}", retry_after)
+    
+    async def _schedule_soon(self) -> None:
+        """Hand new pending work to the assignment loop, or schedule it now without one"""
+        self._wake_pullers()
+        if self._assignment_loop_active:
+            self.request_assignment()
+        else:
+            await self.schedule_pending()
+    
+    async def schedule_pending(self) -> int:
+        """
+        Assign pending tasks in one batch pass, returns how many nodes accepted
+        Pending tasks are placed greedily on the capacity index, most urgent
+        first and, within a priority, tasks with requirements before generic
+        ones so specialist slots go to the tasks that need them. Slots are
+        reserved up front, the assignments are sent to the nodes
+        concurrently (dispatch_concurrency at a time), rejected ones return
+        to pending, and the state is saved once.
+        """
+        pending = self.task_index.tasks(TaskStatus.PENDING)
+        if not pending or not len(self.node_index):
+            return 0
         
-        # Assign task to node
-        try:
-            if await self._send_task_to_node(task, best_node):
-                task.assigned_node = best_node.node_id
-                task.status = TaskStatus.ASSIGNED
-                task.assigned_at = datetime.now()
-                
-                # Add task to node's current tasks
-                best_node.current_tasks.append(task_id)
-                
-                self._save_state()
-                logger.info(f"Assigned task {task_id} to node {best_node.node_id}")
-                return True
+        pending.sort(key=lambda task: (PRIORITY_RANK.get(task.priority, 2), not task.requirements, task.created_at))
         
-        except Exception as e:
-            logger.error(f"Failed to assign task {task_id} to node {best_node.node_id}: {e}")
+        placements = []
+        for task in pending:
+            node = await self._find_best_node(task)
+            if node is None:
+                # The index only holds nodes with free slots, so the cluster is full
+                break
+            self._reserve(task, node)
+            placements.append((task, node))
         
-        return False
+        if not placements:
+            return 0
+        
+        semaphore = asyncio.Semaphore(self.settings.dispatch_concurrency)
+        
+        async def dispatch(task: DistributedTask, node: AgentNode) -> bool:
+            async with semaphore:
+                try:
+                    return await self._send_task_to_node(task, node)
+                except Exception as e:
+                    logger.error(f"Failed to assign task {task.task_id} to node {node.node_id}: {e}")
+                    return False
+        
+        results = await asyncio.gather(*(dispatch(task, node) for task, node in placements))
+        
+        assigned = 0
+        for (task, node), accepted in zip(placements, results):
+            if accepted:
+                assigned += 1
+                logger.info(f"Assigned task {task.task_id} to node {node.node_id}")
+            else:
+                self._release(task, node)
+        self.admission.record_drain(assigned)
+        
+        self._save_state(tasks=[task for task, _ in placements],
+                         nodes={node.node_id: node for _, node in placements}.values())
+        logger.info(f"Scheduling pass assigned {assigned}/{len(placements)} of {len(pending)} pending tasks")
+        return assigned
     
-    async def _find_best_node(self, task: DistributedTask) -> Optional[AgentNode]:
-        """Find the best node for a task based on specialties and load"""
-        available_nodes = []
+    def _reserve(self, task: DistributedTask, node: AgentNode) -> None:
+        """Assign a task to a node slot before the node is contacted"""
+        task.assigned_node = node.node_id
+        self.task_index.set_status(task, TaskStatus.ASSIGNED)
+        task.assigned_at = datetime.now()
+        
+        # Add task to node's current tasks
+        node.current_tasks.append(task.task_id)
+        self.refresh_node(node.node_id)
+    
+    def _release(self, task: DistributedTask, node: AgentNode) -> None:
+        """Undo a reservation the node did not accept"""
+        if task.task_id in node.current_tasks:
+            node.current_tasks.remove(task.task_id)
+            self.refresh_node(node.node_id)
+        
+        # A failover may already have returned the task to pending
+        if task.status == TaskStatus.ASSIGNED and task.assigned_node == node.node_id:
+            self.task_index.set_status(task, TaskStatus.PENDING)
+            task.assigned_node = None
+            task.assigned_at = None
+    
+    async def lease_task(self, node_id: str, wait: float = 0.0) -> Optional[DistributedTask]:
+        """
+        Lease a pending task to a pull-mode node, waiting up to wait seconds for one
+        The node gets the most urgent pending task, preferring the best
+        specialty match within that priority, and owns it for lease_duration
+        seconds unless it renews the lease (renew_lease). Expired leases put
+        the task back in the pool (expire_leases). Returns None if nothing
+        arrived in time, or if the node is unknown, not online or full.
+        """
+        deadline = time.monotonic() + wait
+        
+        while True:
+            node = self.nodes.get(node_id)
+            load = self.node_load.get(node_id)
+            if node is None or node.status != NodeStatus.ONLINE or \
+                    len(node.current_tasks) >= node.max_concurrent_tasks or (load and load.overloaded()):
+                return None
+            
+            # Take the event before looking, so work posted meanwhile still wakes us
+            posted = self._work_posted
+            task = self._match_pending(node)
+            if task is not None:
+                self._grant_lease(task, node)
+                return task
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            
+            try:
+                await asyncio.wait_for(posted.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+    
+    def _match_pending(self, node: AgentNode) -> Optional[DistributedTask]:
+        """Most urgent pending task, best specialty match for the node first"""
+        # Only the most urgent non-empty priority is looked at
+        for tasks in self.task_index.pending_by_rank():
+            best_key = None
+            best_task = None
+            for task in tasks:
+                score = node_score(task.requirements, node.specialties, 0.0)
+                if self._has_warm_clone(node.node_id, task):
+                    score += self.repo_affinity_weight
+                key = (-score, task.created_at)
+                if best_key is None or key < best_key:
+                    best_key, best_task = key, task
+            
+            if best_task is not None:
+                return best_task
         
-        for node in self.nodes.values():
-            if (node.status == NodeStatus.ONLINE and 
-                len(node.current_tasks) < node.max_concurrent_tasks):
-                available_nodes.append(node)
+        return None
+    
+    def _grant_lease(self, task: DistributedTask, node: AgentNode) -> None:
+        """Hand a task to a pull-mode node under a fresh lease"""
+        self._reserve(task, node)
+        task.lease_id = uuid.uuid4().hex
+        task.lease_expires_at = datetime.now() + timedelta(seconds=self.lease_duration)
+        heapq.heappush(self._leases, (task.lease_expires_at, task.lease_id, task.task_id))
+        self._save_state(tasks=[task], nodes=[node])
+        self.admission.record_drain()
         
-        if not available_nodes:
+        logger.info(f"Leased task {task.task_id} to node {node.node_id}")
+    
+    def renew_lease(self, task_id: str, node_id: str, lease_id: str) -> Optional[datetime]:
+        """Extend a lease held by a node, returns the new expiry or None if the lease was lost"""
+        task = self.tasks.get(task_id)
+        if not task or task.lease_id != lease_id or task.assigned_node != node_id or \
+                task.status not in [TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS]:
             return None
         
-        # Score nodes based on specialty match and load
-        node_scores = []
-        for node in available_nodes:
-            score = 0.0
+        # The old heap entry no longer matches lease_expires_at and is skipped
+        task.lease_expires_at = datetime.now() + timedelta(seconds=self.lease_duration)
+        heapq.heappush(self._leases, (task.lease_expires_at, task.lease_id, task.task_id))
+        self._save_state(tasks=[task])
+        return task.lease_expires_at
+    
+    def expire_leases(self) -> List[str]:
+        """Return tasks whose lease ran out to the pool, returns their IDs"""
+        now = datetime.now()
+        expired = []
+        
+        while self._leases and self._leases[0][0] <= now:
+            expires_at, lease_id, task_id = heapq.heappop(self._leases)
+            task = self.tasks.get(task_id)
+            if not task or task.lease_id != lease_id or task.lease_expires_at != expires_at:
+                continue
             
-            # Specialty matching score (0.0 to 1.0)
-            if task.requirements:
-                matching_specialties = set(task.requirements) & set(node.specialties)
-                specialty_score = len(matching_specialties) / len(task.requirements)
-                score += specialty_score * 0.7
-            else:
-                score += 0.5  # No specific requirements
+            task.lease_id = None
+            task.lease_expires_at = None
+            if task.status not in [TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS]:
+                continue
             
-            # Load score (less loaded = higher score)
-            load_ratio = len(node.current_tasks) / node.max_concurrent_tasks
-            load_score = 1.0 - load_ratio
-            score += load_score * 0.3
+            node = self.nodes.get(task.assigned_node)
+            if node and task_id in node.current_tasks:
+                node.current_tasks.remove(task_id)
+                self.refresh_node(node.node_id)
+            
+            if task.speculative_node:
+                # The backup copy carries on as the task
+                task.assigned_node = task.speculative_node
+                task.speculative_node = None
+                expired.append(task)
+                logger.warning(f"Lease on task {task_id} expired, its copy on node {task.assigned_node} takes over")
+                continue
             
-            node_scores.append((node, score))
+            self.task_index.set_status(task, TaskStatus.PENDING)
+            task.assigned_node = None
+            task.assigned_at = None
+            task.started_at = None
+            expired.append(task)
+            logger.warning(f"Lease on task {task_id} expired, returning it to the pool")
         
-        # Sort by score (highest first)
-        node_scores.sort(key=lambda x: x[1], reverse=True)
+        if expired:
+            self._save_state(tasks=expired)
+            self.request_assignment()
         
-        return node_scores[0][0] if node_scores else None
+        return [task.task_id for task in expired]
+    
+    def _wake_pullers(self) -> None:
+        """Wake nodes long-polling for work"""
+        self._work_posted.set()
+        self._work_posted = asyncio.Event()
+    
+    async def _find_best_node(self, task: DistributedTask) -> Optional[AgentNode]:
+        """
+        Find the best node for a task based on specialties and load (see node_score)
+        Nodes that already cache the task's repository get repo_affinity_weight
+        on top of their score, so a warm node wins unless it is that much
+        busier or a worse specialty match than the best cold one.
+        """
+        node_id = self.node_index.best(task.requirements)
+        
+        if node_id and task.repository and self.repo_affinity_weight > 0:
+            best_score = self._index_score(node_id, task)
+            if self._has_warm_clone(node_id, task):
+                best_score += self.repo_affinity_weight
+            
+            for warm_id in self.repository_nodes.get(task.repository, ()):
+                if warm_id in self.node_index:
+                    score = self._index_score(warm_id, task) + self.repo_affinity_weight
+                    if score > best_score:
+                        node_id, best_score = warm_id, score
+        
+        return self.nodes.get(node_id) if node_id else None
+    
+    def _index_score(self, node_id: str, task: DistributedTask) -> float:
+        """node_score of an indexed node at its indexed load"""
+        return node_score(task.requirements, self.nodes[node_id].specialties, self.node_index.load(node_id))
+    
+    def _has_warm_clone(self, node_id: str, task: DistributedTask) -> bool:
+        """Whether a node reported the task's repository in its clone cache"""
+        return bool(task.repository) and node_id in self.repository_nodes.get(task.repository, ())
     
     async def _send_task_to_node(self, task: DistributedTask, node: AgentNode) -> bool:
         """Send task assignment to a node"""
         try:
+            data = {
+                "task_id": task.task_id,
+                "priority": task.priority,
+                "requirements": task.requirements
+            }
+            
+            channel = self.channels.get(node.node_id)
+            if channel is not None:
+                return await channel.assign(data, timeout=10)
+            
             timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                url = f"http://{node.host}:{node.port}/api/tasks/{task.task_id}/assign"
-                data = {
-                    "task_id": task.task_id,
-                    "priority": task.priority,
-                    "requirements": task.requirements
-                }
-                
-                async with session.post(url, json=data) as response:
-                    return response.status == 200
+            url = f"http://{node.host}:{node.port}/api/tasks/{task.task_id}/assign"
+            
+            async with get_http_session().post(url, json=data, timeout=timeout) as response:
+                return response.status == 200
         
         except Exception as e:
             logger.error(f"Failed to send task {task.task_id} to node {node.node_id}: {e}")
@@ -329,22 +661,45 @@ class ClusterCoordinator:
         if not task:
             return False
         
+        if node_id and node_id not in (task.assigned_node, task.speculative_node):
+            # A node still listing a task it no longer holds is a copy told to stop
+            node = self.nodes.get(node_id)
+            stopping = node is not None and task_id in node.current_tasks
+            if stopping or task.completed_at or task.speculated_at:
+                if stopping and status in ["completed", "failed", "cancelled"]:
+                    # Its agent has returned, the slot is free now
+                    self._drop_copy(task, node_id)
+                logger.debug(f"Ignoring status {status} of task {task_id} from node {node_id}, it no longer runs there")
+                return True
+        
+        if task.speculative_node and node_id in (task.assigned_node, task.speculative_node):
+            if not await self._settle_speculation(task, node_id, status):
+                return True
+        
         old_status = task.status
-        task.status = TaskStatus(status)
+        self.task_index.set_status(task, TaskStatus(status))
         
+        changed_nodes = []
         now = datetime.now()
         if status == "in_progress" and not task.started_at:
             task.started_at = now
         elif status in ["completed", "failed", "cancelled"] and not task.completed_at:
             task.completed_at = now
+            if status == "completed" and task.started_at:
+                self._record_duration(task)
+            task.lease_id = None
+            task.lease_expires_at = None
             
             # Remove from node's current tasks
             if task.assigned_node and task.assigned_node in self.nodes:
                 node = self.nodes[task.assigned_node]
                 if task_id in node.current_tasks:
                     node.current_tasks.remove(task_id)
+                    self.refresh_node(node.node_id)
+                    self.request_assignment()
+                    changed_nodes.append(node)
         
-        self._save_state()
+        self._save_state(tasks=[task], nodes=changed_nodes)
         
         logger.info(f"Task {task_id} status updated: {old_status.value} -> {status}")
         
@@ -354,6 +709,170 @@ class ClusterCoordinator:
         
         return True
     
+    async def cancel_task(self, task_id: str) -> bool:
+        """Cancel a task, telling its node to stop when the node is connected over a channel"""
+        task = self.tasks.get(task_id)
+        if not task:
+            return False
+        
+        if task.speculative_node:
+            copy_node, task.speculative_node = task.speculative_node, None
+            await self._stop_copy(task, copy_node)
+        
+        channel = self.channels.get(task.assigned_node) if task.assigned_node else None
+        if channel is not None:
+            try:
+                await channel.send({"type": "cancel", "task_id": task_id})
+            except Exception as e:
+                logger.warning(f"Failed to send cancellation of task {task_id} to node {task.assigned_node}: {e}")
+        
+        return await self.update_task_status(task_id, "cancelled")
+    
+    def _record_duration(self, task: DistributedTask) -> None:
+        """Feed a completed task's run time into the straggler predictions"""
+        seconds = (task.completed_at - task.started_at).total_seconds()
+        self.task_durations.record(task.priority, task.requirements, seconds)
+    
+    async def speculate_stragglers(self) -> List[str]:
+        """
+        Start backup copies of tasks running well past their expected time, returns their IDs
+        A task in progress is a straggler once it has run straggler_factor
+        times the median of recent similar tasks (TaskDurations) and at
+        least straggler_min_seconds. Each straggler gets one copy, most
+        urgent first, on the best other node with a free slot. Whichever
+        copy finishes first completes the task and the other one is
+        stopped (_settle_speculation).
+        """
+        if not self.speculative_execution or not len(self.node_index):
+            return []
+        
+        now = datetime.now()
+        stragglers = []
+        for task in self.task_index.tasks(TaskStatus.IN_PROGRESS):
+            if not task.started_at or task.speculated_at:
+                continue
+            
+            expected = self.task_durations.expected(task.priority, task.requirements)
+            if expected is None:
+                continue
+            
+            threshold = max(expected * self.straggler_factor, self.straggler_min_seconds)
+            if (now - task.started_at).total_seconds() >= threshold:
+                stragglers.append(task)
+        
+        stragglers.sort(key=lambda task: (PRIORITY_RANK.get(task.priority, 2), task.started_at))
+        
+        placements = []
+        for task in stragglers:
+            if not len(self.node_index):
+                break
+            
+            # Keep the node already running the task out of the choice
+            self.node_index.discard(task.assigned_node)
+            try:
+                node = await self._find_best_node(task)
+            finally:
+                self.refresh_node(task.assigned_node)
+            if node is None:
+                continue
+            
+            task.speculative_node = node.node_id
+            task.speculated_at = now
+            node.current_tasks.append(task.task_id)
+            self.refresh_node(node.node_id)
+            placements.append((task, node))
+        
+        if not placements:
+            return []
+        
+        results = await asyncio.gather(*(self._send_task_to_node(task, node) for task, node in placements))
+        
+        started = []
+        for (task, node), accepted in zip(placements, results):
+            if accepted and task.speculative_node == node.node_id:
+                started.append(task.task_id)
+                logger.warning(f"Task {task.task_id} is straggling on node {task.assigned_node}, "
+                               f"started a copy on node {node.node_id}")
+                continue
+            
+            if accepted:
+                # The task finished or failed over while the copy was being sent
+                await self._stop_copy(task, node.node_id)
+            else:
+                self._drop_copy(task, node.node_id)
+                if task.speculative_node == node.node_id:
+                    task.speculative_node = None
+                    task.speculated_at = None
+        
+        self._save_state(tasks=[task for task, _ in placements],
+                         nodes={node.node_id: node for _, node in placements}.values())
+        return started
+    
+    async def _settle_speculation(self, task: DistributedTask, node_id: str, status: str) -> bool:
+        """
+        Apply a status update from one of two copies of a task, False if it does not change the task
+        The first copy to complete wins and the other one is stopped. A copy
+        that fails or is cancelled on its node just drops out and the other
+        one carries on as the task.
+        """
+        other = task.speculative_node if node_id == task.assigned_node else task.assigned_node
+        
+        if status == "in_progress":
+            # The task is already running, the copy starting changes nothing
+            return node_id == task.assigned_node
+        
+        if status == "completed":
+            task.assigned_node = node_id
+            task.speculative_node = None
+            logger.info(f"Copy of task {task.task_id} on node {node_id} finished first, stopping node {other}")
+            await self._stop_copy(task, other)
+            return True
+        
+        if node_id == task.assigned_node:
+            # A pushed copy holds no lease
+            task.lease_id = None
+            task.lease_expires_at = None
+        task.assigned_node = other
+        task.speculative_node = None
+        self._drop_copy(task, node_id)
+        self._save_state(tasks=[task])
+        logger.info(f"Copy of task {task.task_id} on node {node_id} ended with {status}, node {other} carries on")
+        return False
+    
+    def _drop_copy(self, task: DistributedTask, node_id: str) -> None:
+        """Free the slot a copy of a task held on a node"""
+        node = self.nodes.get(node_id)
+        if node is not None and task.task_id in node.current_tasks:
+            node.current_tasks.remove(task.task_id)
+            self.refresh_node(node_id)
+            self.request_assignment()
+            self._save_state(nodes=[node])
+    
+    async def _stop_copy(self, task: DistributedTask, node_id: str) -> None:
+        """
+        Tell a node to stop running its copy of a task
+        The node keeps the slot until its agent has returned and it reports
+        the copy cancelled (update_task_status), or its next heartbeat no
+        longer lists the task.
+        """
+        node = self.nodes.get(node_id)
+        if node is None:
+            return
+        
+        try:
+            channel = self.channels.get(node_id)
+            if channel is not None:
+                await channel.send({"type": "cancel", "task_id": task.task_id})
+                return
+            
+            timeout = aiohttp.ClientTimeout(total=10)
+            url = f"http://{node.host}:{node.port}/api/tasks/{task.task_id}/stop"
+            async with get_http_session().post(url, timeout=timeout):
+                pass
+        
+        except Exception as e:
+            logger.warning(f"Failed to stop the copy of task {task.task_id} on node {node_id}: {e}")
+    
     async def _retry_task(self, task_id: str) -> None:
         """Retry a failed task"""
         task = self.tasks.get(task_id)
@@ -361,86 +880,212 @@ class ClusterCoordinator:
             return
         
         task.retry_count += 1
-        task.status = TaskStatus.PENDING
+        self.task_index.set_status(task, TaskStatus.PENDING)
         task.assigned_node = None
         task.assigned_at = None
         task.started_at = None
         task.completed_at = None
+        task.lease_id = None
+        task.lease_expires_at = None
+        task.speculative_node = None
+        task.speculated_at = None
+        self._save_state(tasks=[task])
         
         logger.info(f"Retrying task {task_id} (attempt {task.retry_count}/{task.max_retries})")
         
         # Try to reassign
-        await self._assign_task(task_id)
+        await self._schedule_soon()
     
     async def _reassign_node_tasks(self, node_id: str) -> None:
-        """Reassign tasks from a failed/removed node"""
+        """Return tasks of a failed/removed node to pending for the assignment loop"""
         node = self.nodes.get(node_id)
         if not node:
             return
         
+        reassigned = []
         for task_id in node.current_tasks.copy():
             task = self.tasks.get(task_id)
-            if task and task.status in [TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS]:
-                task.status = TaskStatus.PENDING
+            if task and node_id not in (task.assigned_node, task.speculative_node):
+                # A copy that was told to stop, the task runs elsewhere
+                continue
+            if task and task.speculative_node and task.status in [TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS]:
+                # The other copy carries on as the task
+                if task.assigned_node == node_id:
+                    task.assigned_node = task.speculative_node
+                    task.lease_id = None
+                    task.lease_expires_at = None
+                task.speculative_node = None
+                reassigned.append(task)
+                logger.info(f"Dropping the copy of task {task_id} on failed node {node_id}")
+            elif task and task.status in [TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS]:
+                self.task_index.set_status(task, TaskStatus.PENDING)
                 task.assigned_node = None
                 task.assigned_at = None
                 task.started_at = None
+                task.lease_id = None
+                task.lease_expires_at = None
+                task.speculated_at = None
+                reassigned.append(task)
                 
                 logger.info(f"Reassigning task {task_id} from failed node {node_id}")
-                await self._assign_task(task_id)
         
         node.current_tasks.clear()
+        self.refresh_node(node_id)
+        self._save_state(tasks=reassigned, nodes=[node])
+        self.request_assignment()
+    
+    def open_channel(self, node: AgentNode, send) -> NodeChannel:
+        """
+        Register a node that connected over a WebSocket channel
+        The node is not pinged, the open socket shows it is reachable even
+        behind NAT. A reconnect replaces the node's previous channel.
+        """
+        previous = self.channels.pop(node.node_id, None)
+        if previous is not None:
+            previous.close()
+        
+        channel = NodeChannel(node.node_id, send)
+        self.channels[node.node_id] = channel
+        
+        node.status = NodeStatus.ONLINE
+        node.last_heartbeat = datetime.now()
+        self.add_node(node)
+        self._save_state(nodes=[node])
+        self.request_assignment()
+        
+        logger.info(f"Node {node.node_id} connected over a channel")
+        return channel
+    
+    async def handle_channel_message(self, node_id: str, message: Dict[str, Any]) -> None:
+        """Apply one frame a node sent over its channel"""
+        kind = message.get("type")
+        
+        if kind == "assign_result":
+            channel = self.channels.get(node_id)
+            if channel is not None:
+                channel.resolve(message)
+        elif kind == "heartbeat":
+            await self.update_node_heartbeat(node_id, message.get("current_tasks"), message.get("load"),
+                                             message.get("repositories"))
+        elif kind == "status":
+            await self.update_task_status(message["task_id"], message["status"], node_id)
+        elif kind == "unregister":
+            channel = self.channels.pop(node_id, None)
+            if channel is not None:
+                channel.close()
+            await self.unregister_node(node_id)
+        else:
+            logger.warning(f"Ignoring unknown channel message {kind!r} from node {node_id}")
+    
+    async def close_channel(self, node_id: str, channel: NodeChannel) -> None:
+        """Fail a node over as soon as its channel closes"""
+        channel.close()
+        if self.channels.get(node_id) is not channel:
+            # Replaced by a reconnect or closed by unregister
+            return
+        
+        del self.channels[node_id]
+        node = self.nodes.get(node_id)
+        if node is not None and node.status == NodeStatus.ONLINE:
+            logger.warning(f"Channel to node {node_id} closed, failing the node over")
+            node.status = NodeStatus.OFFLINE
+            self.refresh_node(node_id)
+            await self._reassign_node_tasks(node_id)
+    
+    def request_assignment(self) -> None:
+        """Wake the assignment loop and long-polling nodes, e.g. after capacity was freed"""
+        self._assignment_wanted.set()
+        self._wake_pullers()
+    
+    async def check_nodes(self) -> List[str]:
+        """
+        Health-check every online node concurrently and fail over dead ones
+        Pings run under a semaphore of health_check_concurrency, so a sweep
+        takes about ceil(nodes / concurrency) ping timeouts at worst instead
+        of one timeout per unreachable node. Returns the failed node IDs.
+        """
+        current_time = datetime.now()
+        semaphore = asyncio.Semaphore(self.health_check_concurrency)
+        
+        async def is_alive(node: AgentNode) -> bool:
+            # Check if heartbeat is overdue
+            time_since_heartbeat = current_time - node.last_heartbeat
+            if time_since_heartbeat.total_seconds() > self.heartbeat_timeout:
+                logger.warning(f"Node {node.node_id} heartbeat timeout")
+                return False
+            
+            # Try to ping the node
+            async with semaphore:
+                if not await self._ping_node(node):
+                    logger.warning(f"Node {node.node_id} ping failed")
+                    return False
+            return True
+        
+        nodes = [node for node in self.nodes.values() if node.status == NodeStatus.ONLINE]
+        results = await asyncio.gather(*(is_alive(node) for node in nodes))
+        
+        # A node may have been removed or changed state while the pings ran
+        failed_nodes = [
+            node.node_id for node, alive in zip(nodes, results)
+            if not alive and self.nodes.get(node.node_id) is node and node.status == NodeStatus.ONLINE
+        ]
+        
+        # Reassign tasks from failed nodes
+        for node_id in failed_nodes:
+            self.nodes[node_id].status = NodeStatus.OFFLINE
+            self.refresh_node(node_id)
+            await self._reassign_node_tasks(node_id)
+        
+        return failed_nodes
     
     async def heartbeat_monitor(self) -> None:
         """Monitor node heartbeats and handle failed nodes"""
         while True:
             try:
-                current_time = datetime.now()
-                failed_nodes = []
-                
-                for node_id, node in self.nodes.items():
-                    if node.status == NodeStatus.ONLINE:
-                        # Check if heartbeat is overdue
-                        time_since_heartbeat = current_time - node.last_heartbeat
-                        if time_since_heartbeat.total_seconds() > self.heartbeat_timeout:
-                            logger.warning(f"Node {node_id} heartbeat timeout")
-                            node.status = NodeStatus.OFFLINE
-                            failed_nodes.append(node_id)
-                        
-                        # Try to ping the node
-                        elif not await self._ping_node(node):
-                            logger.warning(f"Node {node_id} ping failed")
-                            node.status = NodeStatus.OFFLINE
-                            failed_nodes.append(node_id)
-                
-                # Reassign tasks from failed nodes
-                for node_id in failed_nodes:
-                    await self._reassign_node_tasks(node_id)
-                
-                if failed_nodes:
-                    self._save_state()
-                
-                # Try to reassign pending tasks
-                pending_tasks = [
-                    task_id for task_id, task in self.tasks.items()
-                    if task.status == TaskStatus.PENDING
-                ]
-                
-                for task_id in pending_tasks:
-                    await self._assign_task(task_id)
-                
-                await asyncio.sleep(self.heartbeat_interval)
-            
+                await self.check_nodes()
             except Exception as e:
                 logger.error(f"Error in heartbeat monitor: {e}")
-                await asyncio.sleep(self.heartbeat_interval)
+            
+            await asyncio.sleep(self.heartbeat_interval)
     
-    async def update_node_heartbeat(self, node_id: str) -> bool:
-        """Update node heartbeat"""
+    async def assignment_loop(self) -> None:
+        """Expire leases, assign pending tasks and back up stragglers on a short timer or as soon as capacity changes"""
+        self._assignment_loop_active = True
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._assignment_wanted.wait(), self.assignment_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._assignment_wanted.clear()
+                
+                try:
+                    self.expire_leases()
+                    await self.schedule_pending()
+                    await self.speculate_stragglers()
+                except Exception as e:
+                    logger.error(f"Error in assignment loop: {e}")
+        finally:
+            self._assignment_loop_active = False
+    
+    async def update_node_heartbeat(self, node_id: str, current_tasks: Optional[List[str]] = None,
+                                    load: Optional[Dict[str, Any]] = None,
+                                    repositories: Optional[Dict[str, Optional[str]]] = None) -> bool:
+        """Update node heartbeat, optionally with the task list, resource load and cached repositories"""
         if node_id in self.nodes:
-            self.nodes[node_id].last_heartbeat = datetime.now()
-            if self.nodes[node_id].status == NodeStatus.OFFLINE:
-                self.nodes[node_id].status = NodeStatus.ONLINE
+            node = self.nodes[node_id]
+            node.last_heartbeat = datetime.now()
+            if current_tasks is not None:
+                node.current_tasks = current_tasks
+            if load is not None:
+                self._record_load(node_id, load)
+            if repositories is not None:
+                self._record_repositories(node_id, repositories)
+            if node.status == NodeStatus.OFFLINE:
+                node.status = NodeStatus.ONLINE
+                self._save_state(nodes=[node])
+                self.request_assignment()
+            self.refresh_node(node_id)
             return True
         return False
     
@@ -448,9 +1093,10 @@ class ClusterCoordinator:
         """Get cluster status"""
         online_nodes = sum(1 for node in self.nodes.values() if node.status == NodeStatus.ONLINE)
         total_tasks = len(self.tasks)
-        pending_tasks = sum(1 for task in self.tasks.values() if task.status == TaskStatus.PENDING)
-        active_tasks = sum(1 for task in self.tasks.values() if task.status == TaskStatus.IN_PROGRESS)
-        completed_tasks = sum(1 for task in self.tasks.values() if task.status == TaskStatus.COMPLETED)
+        pending_tasks = self.task_index.count(TaskStatus.PENDING)
+        active_tasks = self.task_index.count(TaskStatus.IN_PROGRESS)
+        completed_tasks = self.task_index.count(TaskStatus.COMPLETED)
+        speculative_tasks = sum(1 for task in self.task_index.tasks(TaskStatus.IN_PROGRESS) if task.speculative_node)
         
         return {
             "nodes": {
@@ -462,16 +1108,54 @@ class ClusterCoordinator:
                 "total": total_tasks,
                 "pending": pending_tasks,
                 "active": active_tasks,
-                "completed": completed_tasks
+                "completed": completed_tasks,
+                "speculative": speculative_tasks
             },
             "node_details": [node.to_dict() for node in self.nodes.values()],
             "task_details": [task.to_dict() for task in self.tasks.values()]
         }
     
+    def _record_load(self, node_id: str, sample: Dict[str, Any]) -> None:
+        """Add a heartbeat's resource sample to the node's rolling window"""
+        load = self.node_load.get(node_id)
+        if load is None:
+            load = self.node_load[node_id] = NodeLoad.from_settings(self.settings)
+        
+        was_overloaded = load.overloaded()
+        load.add(sample)
+        if load.overloaded() != was_overloaded:
+            if was_overloaded:
+                logger.info(f"Node {node_id} recovered, accepting new tasks again")
+                self.request_assignment()
+            else:
+                logger.warning(f"Node {node_id} is overloaded ({load.summary()}), holding back new tasks")
+    
+    def _record_repositories(self, node_id: str, repositories: Dict[str, Optional[str]]) -> None:
+        """Replace the set of repositories a node has cached"""
+        previous = self.node_repositories.pop(node_id, {})
+        for repository in previous.keys() - repositories.keys():
+            holders = self.repository_nodes.get(repository)
+            if holders is not None:
+                holders.discard(node_id)
+                if not holders:
+                    del self.repository_nodes[repository]
+        
+        for repository in repositories:
+            self.repository_nodes.setdefault(repository, set()).add(node_id)
+        if repositories:
+            self.node_repositories[node_id] = dict(repositories)
+    
     def get_node_status(self, node_id: str) -> Optional[Dict[str, Any]]:
         """Get specific node status"""
         node = self.nodes.get(node_id)
-        return node.to_dict() if node else None
+        if not node:
+            return None
+        
+        status = node.to_dict()
+        load = self.node_load.get(node_id)
+        status["load"] = load.summary() if load else None
+        status["repositories"] = self.node_repositories.get(node_id, {})
+        return status
     
     def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get specific task status"""
@@ -0,0 +1,145 @@
+"""Coalesced persistence for coordinator state"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from src.services.journal import JournaledMap
+from src.utils.helpers import save_json_atomic, load_json
+
+
+logger = logging.getLogger(__name__)
+
+
+# Where coordinators kept their state before it moved under data_path
+LEGACY_STATE_FILE = Path("cluster_state.json")
+
+
+class ClusterStateStore:
+    """
+    Persists coordinator nodes and tasks, keyed "node:<id>" and "task:<id>"
+    
+    In JSON mode a change only marks the state dirty; the first change
+    after a flush starts a debounce timer, and when it fires one snapshot
+    of the whole state is written atomically (temp file, fsync, rename) on
+    a writer thread, so a burst of changes costs one write. Without a
+    running event loop every change is written straight away. With a
+    JournaledMap, each change is appended as a record for that node or
+    task instead and the journal compacts itself into a snapshot, so no
+    change is lost between snapshots.
+    """
+    
+    def __init__(self, state_file: Path, snapshot: Callable[[], Dict[str, Any]],
+                 debounce: float = 1.0, journal: Optional[JournaledMap] = None):
+        self.state_file = state_file
+        self.snapshot = snapshot
+        self.debounce = debounce
+        self.journal = journal
+        self.dirty = False
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        # One writer thread keeps snapshots in the order they were taken
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cluster-state-writer")
+    
+    def _read_file(self) -> Dict[str, Any]:
+        """Read the JSON state, falling back to the file in the working directory"""
+        for state_file in (self.state_file, LEGACY_STATE_FILE):
+            if state_file.exists():
+                if state_file != self.state_file:
+                    logger.info(f"Importing cluster state from {state_file}")
+                return load_json(state_file) or {}
+        return {}
+    
+    def load(self) -> Dict[str, Any]:
+        """Persisted state as {"nodes": [...], "tasks": [...]} of to_dict() output"""
+        if self.journal is None:
+            return self._read_file()
+        
+        if self.journal.created:
+            state = self._read_file()
+            self.journal.put_many(
+                [(f"node:{node['node_id']}", node) for node in state.get("nodes", [])] +
+                [(f"task:{task['task_id']}", task) for task in state.get("tasks", [])]
+            )
+        
+        items = self.journal.items()
+        return {
+            "nodes": [value for key, value in items if key.startswith("node:")],
+            "tasks": [value for key, value in items if key.startswith("task:")]
+        }
+    
+    def put(self, key: str, item) -> None:
+        """Persist a changed node or task (anything with to_dict())"""
+        if self.journal is not None:
+            self.journal.put(key, item.to_dict())
+        else:
+            self._mark_dirty()
+    
+    def delete(self, key: str) -> None:
+        """Persist the removal of a node or task"""
+        if self.journal is not None:
+            self.journal.delete(key)
+        else:
+            self._mark_dirty()
+    
+    def _mark_dirty(self) -> None:
+        """Mark the state dirty and make sure a flush is scheduled"""
+        self.dirty = True
+        if self._flush_timer is not None:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        
+        self._flush_timer = loop.call_later(self.debounce, self._flush_due)
+    
+    def _flush_due(self) -> None:
+        """Debounce timer callback, snapshots in the loop and writes on the writer thread"""
+        self._flush_timer = None
+        if not self.dirty:
+            return
+        
+        self.dirty = False
+        try:
+            state = self._take_snapshot()
+            self._writer.submit(self._write, state)
+        except Exception as e:
+            logger.error(f"Failed to save cluster state: {e}")
+    
+    def _take_snapshot(self) -> Dict[str, Any]:
+        state = self.snapshot()
+        state["updated_at"] = datetime.now().isoformat()
+        return state
+    
+    def _write(self, state: Dict[str, Any]) -> None:
+        try:
+            save_json_atomic(state, self.state_file)
+        except Exception as e:
+            logger.error(f"Failed to save cluster state: {e}")
+    
+    def flush(self) -> None:
+        """Write pending changes now"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        
+        if self.journal is not None or not self.dirty:
+            return
+        
+        self.dirty = False
+        state = self._take_snapshot()
+        # Queue behind snapshots already handed to the writer
+        self._writer.submit(self._write, state).result()
+    
+    def close(self) -> None:
+        """Flush, stop the writer and close the journal"""
+        self.flush()
+        self._writer.shutdown(wait=True)
+        
+        if self.journal is not None:
+            self.journal.close()
@@ -2,13 +2,16 @@
 
 import asyncio
 import logging
+import math
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response, WebSocket, WebSocketDisconnect
 from contextlib import asynccontextmanager
 import uvicorn
 
+from src.core.exceptions import AdmissionRejectedError
 from src.services.cluster_coordinator import ClusterCoordinator, AgentNode, NodeStatus
+from src.utils.http import close_http_session
 from src.utils.logging import get_logger
 
 
@@ -23,6 +26,7 @@ class CoordinatorAPI:
         self.coordinator = ClusterCoordinator(coordinator_port)
         self.app = self._create_fastapi_app()
         self.heartbeat_task = None
+        self.assignment_task = None
     
     def _create_fastapi_app(self) -> FastAPI:
         """Create FastAPI application for the coordinator"""
@@ -66,6 +70,38 @@ class CoordinatorAPI:
                 logger.error(f"Error registering node: {e}")
                 raise HTTPException(status_code=400, detail=str(e))
         
+        # Persistent node channel (register, heartbeat, status, assign and cancel frames)
+        @app.websocket("/api/nodes/{node_id}/channel")
+        async def node_channel(websocket: WebSocket, node_id: str):
+            await websocket.accept()
+            try:
+                message = await websocket.receive_json()
+                if message.get("type") != "register" or message.get("node", {}).get("node_id") != node_id:
+                    await websocket.close(code=1008)
+                    return
+                node = AgentNode.from_dict(message["node"])
+            except WebSocketDisconnect:
+                return
+            except Exception as e:
+                logger.error(f"Invalid channel registration from node {node_id}: {e}")
+                await websocket.close(code=1008)
+                return
+            
+            channel = self.coordinator.open_channel(node, websocket.send_json)
+            try:
+                # Frames are applied in order; with the assignment loop running no handler
+                # waits on an assign_result, which only this loop can deliver
+                while True:
+                    message = await websocket.receive_json()
+                    try:
+                        await self.coordinator.handle_channel_message(node_id, message)
+                    except Exception as e:
+                        logger.error(f"Error handling channel message from node {node_id}: {e}")
+            except WebSocketDisconnect:
+                pass
+            finally:
+                await self.coordinator.close_channel(node_id, channel)
+        
         # Node unregistration
         @app.delete("/api/nodes/{node_id}/unregister")
         async def unregister_node(node_id: str):
@@ -78,17 +114,29 @@ class CoordinatorAPI:
         # Node heartbeat
         @app.post("/api/nodes/{node_id}/heartbeat")
         async def node_heartbeat(node_id: str, heartbeat_data: Dict[str, Any]):
-            success = await self.coordinator.update_node_heartbeat(node_id)
+            # Update node status if provided
+            success = await self.coordinator.update_node_heartbeat(
+                node_id, heartbeat_data.get("current_tasks"), heartbeat_data.get("load"),
+                heartbeat_data.get("repositories")
+            )
             if success:
-                # Update node status if provided
-                if "current_tasks" in heartbeat_data:
-                    if node_id in self.coordinator.nodes:
-                        self.coordinator.nodes[node_id].current_tasks = heartbeat_data["current_tasks"]
-                
                 return {"status": "acknowledged"}
             else:
                 raise HTTPException(status_code=404, detail="Node not found")
         
+        # Lease a task (pull-mode nodes long-poll here for work)
+        @app.post("/api/nodes/{node_id}/lease")
+        async def lease_task(node_id: str, lease_request: Dict[str, Any]):
+            if node_id not in self.coordinator.nodes:
+                raise HTTPException(status_code=404, detail="Node not found")
+            
+            wait = min(float(lease_request.get("wait", 0)), self.coordinator.lease_poll_timeout)
+            task = await self.coordinator.lease_task(node_id, max(0.0, wait))
+            if task is None:
+                return Response(status_code=204)
+            
+            return {**task.to_dict(), "lease_duration": self.coordinator.lease_duration}
+        
         # Get node status
         @app.get("/api/nodes/{node_id}")
         async def get_node_status(node_id: str):
@@ -111,11 +159,16 @@ class CoordinatorAPI:
             task_id = task_data.get("task_id")
             priority = task_data.get("priority", "medium")
             requirements = task_data.get("requirements", [])
+            repository = task_data.get("repository")
             
             if not task_id:
                 raise HTTPException(status_code=400, detail="task_id is required")
             
-            success = await self.coordinator.submit_task(task_id, priority, requirements)
+            try:
+                success = await self.coordinator.submit_task(task_id, priority, requirements, repository)
+            except AdmissionRejectedError as e:
+                raise HTTPException(status_code=429, detail=str(e),
+                                    headers={"Retry-After": str(math.ceil(e.retry_after))})
             if success:
                 return {"status": "submitted", "task_id": task_id}
             else:
@@ -136,6 +189,15 @@ class CoordinatorAPI:
             else:
                 raise HTTPException(status_code=404, detail="Task not found")
         
+        # Lease renewal
+        @app.post("/api/tasks/{task_id}/lease/renew")
+        async def renew_lease(task_id: str, renew_data: Dict[str, Any]):
+            expires_at = self.coordinator.renew_lease(task_id, renew_data.get("node_id"), renew_data.get("lease_id"))
+            if expires_at is None:
+                raise HTTPException(status_code=409, detail="Lease expired or task reassigned")
+            
+            return {"status": "renewed", "task_id": task_id, "lease_expires_at": expires_at.isoformat()}
+        
         # Get task status
         @app.get("/api/tasks/{task_id}")
         async def get_task_status(task_id: str):
@@ -160,7 +222,7 @@ class CoordinatorAPI:
         # Cancel task
         @app.delete("/api/tasks/{task_id}")
         async def cancel_task(task_id: str):
-            success = await self.coordinator.update_task_status(task_id, "cancelled")
+            success = await self.coordinator.cancel_task(task_id)
             if success:
                 return {"status": "cancelled", "task_id": task_id}
             else:
@@ -192,6 +254,7 @@ class CoordinatorAPI:
         async def set_node_maintenance(node_id: str):
             if node_id in self.coordinator.nodes:
                 self.coordinator.nodes[node_id].status = NodeStatus.MAINTENANCE
+                self.coordinator.refresh_node(node_id)
                 await self.coordinator._reassign_node_tasks(node_id)
                 return {"status": "maintenance", "node_id": node_id}
             else:
@@ -201,6 +264,8 @@ class CoordinatorAPI:
         async def set_node_online(node_id: str):
             if node_id in self.coordinator.nodes:
                 self.coordinator.nodes[node_id].status = NodeStatus.ONLINE
+                self.coordinator.refresh_node(node_id)
+                self.coordinator.request_assignment()
                 return {"status": "online", "node_id": node_id}
             else:
                 raise HTTPException(status_code=404, detail="Node not found")
@@ -211,8 +276,9 @@ class CoordinatorAPI:
         """Startup procedures"""
         logger.info("Starting cluster coordinator API")
         
-        # Start heartbeat monitor
+        # Start heartbeat monitor and the independent pending-task assignment loop
         self.heartbeat_task = asyncio.create_task(self.coordinator.heartbeat_monitor())
+        self.assignment_task = asyncio.create_task(self.coordinator.assignment_loop())
         
         logger.info(f"Cluster coordinator API started on port {self.coordinator_port}")
     
@@ -220,13 +286,17 @@ class CoordinatorAPI:
         """Shutdown procedures"""
         logger.info("Shutting down cluster coordinator API")
         
-        # Stop heartbeat monitor
-        if self.heartbeat_task:
-            self.heartbeat_task.cancel()
-            try:
-                await self.heartbeat_task
-            except asyncio.CancelledError:
-                pass
+        # Stop heartbeat monitor and assignment loop
+        for task in (self.heartbeat_task, self.assignment_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        
+        await close_http_session()
+        self.coordinator.close()
         
         logger.info("Cluster coordinator API shut down")
     
@@ -0,0 +1,140 @@
+"""Dead-letter store for tasks that exhausted their retries"""
+
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+from src.services.journal import JournaledMap
+from src.utils.helpers import save_json_atomic, load_json
+
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterStore:
+    """
+    Persistent store of permanently failed queue tasks, keyed by task ID
+    
+    Each entry keeps the dead-lettered task (QueuedTask.to_dict() output,
+    including its error history), its repository and error class for
+    filtering, and when it was dead-lettered. Task IDs are indexed by error
+    class and by repository, so filters only touch matching entries and
+    per-class counts are free. Entries are persisted to a
+    JournaledMap when one is given, otherwise to a single JSON document.
+    """
+    
+    def __init__(self, dead_letter_file: Path, journal: Optional[JournaledMap] = None):
+        self.dead_letter_file = dead_letter_file
+        self.journal = journal
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        
+        if self.journal is not None:
+            self.entries = dict(self.journal.items())
+        else:
+            data = load_json(self.dead_letter_file)
+            if data:
+                self.entries = data.get("entries", {})
+        
+        # Task IDs per error class and per repository, updated on add and remove
+        self._by_error_class: Dict[Optional[str], Set[str]] = {}
+        self._by_repository: Dict[Optional[str], Set[str]] = {}
+        for entry in self.entries.values():
+            self._index(entry)
+        
+        if self.entries:
+            logger.info(f"Loaded {len(self.entries)} dead-lettered tasks")
+    
+    def _index(self, entry: Dict[str, Any]) -> None:
+        """Add an entry to the error class and repository indexes"""
+        self._by_error_class.setdefault(entry.get("error_class"), set()).add(entry["task_id"])
+        self._by_repository.setdefault(entry.get("repository"), set()).add(entry["task_id"])
+    
+    def _unindex(self, entry: Dict[str, Any]) -> None:
+        """Take an entry out of the error class and repository indexes"""
+        for index, key in ((self._by_error_class, entry.get("error_class")),
+                           (self._by_repository, entry.get("repository"))):
+            task_ids = index.get(key)
+            if task_ids is not None:
+                task_ids.discard(entry["task_id"])
+                if not task_ids:
+                    del index[key]
+    
+    def _save(self) -> None:
+        """Write the JSON document"""
+        save_json_atomic({"entries": self.entries, "updated_at": datetime.now().isoformat()},
+                         self.dead_letter_file)
+    
+    def add(self, task: Dict[str, Any]) -> None:
+        """Dead-letter a queued task"""
+        entry = {
+            "task_id": task["task_id"],
+            "repository": task.get("repository"),
+            "error_class": task.get("error_class"),
+            "error": task.get("error"),
+            "attempts": task.get("attempts"),
+            "dead_lettered_at": datetime.now().isoformat(),
+            "task": task
+        }
+        replaced = self.entries.get(task["task_id"])
+        if replaced is not None:
+            self._unindex(replaced)
+        self.entries[task["task_id"]] = entry
+        self._index(entry)
+        
+        if self.journal is not None:
+            self.journal.put(task["task_id"], entry)
+        else:
+            self._save()
+    
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a dead-letter entry"""
+        return self.entries.get(task_id)
+    
+    def find(self, error_class: Optional[str] = None, repository: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entries matching the filters, newest first"""
+        task_ids = None
+        for index, key in ((self._by_error_class, error_class), (self._by_repository, repository)):
+            if key is not None:
+                matching = index.get(key, set())
+                task_ids = matching if task_ids is None else task_ids & matching
+        
+        if task_ids is None:
+            entries = list(self.entries.values())
+        else:
+            entries = [self.entries[task_id] for task_id in task_ids]
+        entries.sort(key=lambda x: x["dead_lettered_at"], reverse=True)
+        return entries
+    
+    def remove(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """Remove entries and return their tasks"""
+        removed = [self.entries.pop(task_id) for task_id in task_ids if task_id in self.entries]
+        for entry in removed:
+            self._unindex(entry)
+        
+        if removed:
+            if self.journal is not None:
+                for entry in removed:
+                    self.journal.delete(entry["task_id"])
+            else:
+                self._save()
+        
+        return [entry["task"] for entry in removed]
+    
+    def clear(self) -> int:
+        """Delete every entry"""
+        return len(self.remove(list(self.entries)))
+    
+    def count_by_error_class(self) -> Dict[str, int]:
+        """Count entries per error class"""
+        counts: Dict[str, int] = {}
+        for error_class, task_ids in self._by_error_class.items():
+            key = error_class or "unknown"
+            counts[key] = counts.get(key, 0) + len(task_ids)
+        return counts
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.entries
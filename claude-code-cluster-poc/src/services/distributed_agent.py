@@ -11,6 +11,7 @@ from src.agents.backend_agent import BackendAgent
 from src.agents.frontend_agent import FrontendAgent
 from src.agents.testing_agent import TestingAgent
 from src.agents.devops_agent import DevOpsAgent
+from src.core.exceptions import AdmissionRejectedError
 from src.services.cluster_coordinator import ClusterCoordinator
 from src.utils.logging import get_logger
 
@@ -111,7 +112,7 @@ class DistributedAgent(Agent):
             
             # Submit to cluster coordinator
             priority = analysis.get("priority", "medium")
-            success = await self.coordinator.submit_task(task_id, priority, requirements)
+            success = await self.coordinator.submit_task(task_id, priority, requirements, task.get("repository"))
             
             if success:
                 logger.info(f"Task {task_id} submitted to distributed cluster")
@@ -122,6 +123,11 @@ class DistributedAgent(Agent):
                 logger.warning(f"Failed to submit task {task_id} to cluster, running locally")
                 return self.run_task(task_id)
         
+        except AdmissionRejectedError as e:
+            # The cluster is saturated, running locally would only add load to this host
+            logger.warning(f"Cluster rejected task {task_id}: {e}")
+            return {"success": False, "error": str(e), "retry_after": e.retry_after}
+        
         except Exception as e:
             logger.error(f"Error in distributed processing: {e}")
             return self.run_task(task_id)
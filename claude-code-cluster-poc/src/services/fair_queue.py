@@ -0,0 +1,194 @@
+"""Per-repository fair scheduling for the task queue"""
+
+import heapq
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+# Queue key for tasks that do not name a repository
+UNKNOWN_REPOSITORY = "unknown"
+
+
+def parse_repository_map(value: str) -> Dict[str, float]:
+    """Parse a setting like "owner/repo=2,owner/other=0.5" into a mapping"""
+    result = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        
+        repository, sep, amount = item.rpartition("=")
+        if not sep or not repository.strip():
+            raise ValueError(f"Invalid repository setting {item!r}, expected owner/repo=value")
+        result[repository.strip()] = float(amount)
+    
+    return result
+
+
+class FairQueue:
+    """
+    Ready heap entries grouped by repository and served by deficit round robin
+    
+    Each repository has its own heap of (priority, created_at, seq, task_id)
+    entries. The most urgent priority among the repository heads is served
+    first; repositories tied on it take turns. A turn adds the repository's
+    weight to its deficit and every dequeue spends one, so a repository with
+    weight 2 gets two tasks per round and one with 0.5 gets one every other
+    round. A repository with max_running tasks in flight sits out until one
+    of them is released. Stale entries are recognised by the caller's
+    is_live check and dropped when they reach a heap head.
+    """
+    
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 limits: Optional[Dict[str, float]] = None, default_limit: int = 0):
+        self.weights = dict(weights or {})
+        self.limits = {repository: int(limit) for repository, limit in (limits or {}).items()}
+        self.default_limit = default_limit
+        
+        for repository, weight in self.weights.items():
+            if weight <= 0:
+                raise ValueError(f"Repository weight for {repository} must be positive, got {weight}")
+        
+        self._heaps: Dict[str, List[tuple]] = {}
+        self._turns: deque = deque()  # repositories with queued entries, in turn order
+        self._deficits: Dict[str, float] = {}
+        self._running: Dict[str, str] = {}  # task_id -> repository
+        self.running_counts: Dict[str, int] = {}
+    
+    @classmethod
+    def from_settings(cls, settings) -> "FairQueue":
+        """Build the scheduler from queue_repo_* settings"""
+        return cls(
+            weights=parse_repository_map(settings.queue_repo_weights),
+            limits=parse_repository_map(settings.queue_repo_limits),
+            default_limit=settings.queue_repo_max_running
+        )
+    
+    def weight(self, repository: str) -> float:
+        """Share of dequeues per round for a repository"""
+        return self.weights.get(repository, 1.0)
+    
+    def limit(self, repository: str) -> int:
+        """Concurrent task cap for a repository, 0 for unlimited"""
+        return self.limits.get(repository, self.default_limit)
+    
+    def at_limit(self, repository: str) -> bool:
+        """Check whether a repository already runs as many tasks as allowed"""
+        limit = self.limit(repository)
+        return limit > 0 and self.running_counts.get(repository, 0) >= limit
+    
+    def __len__(self) -> int:
+        """Number of heap entries, stale ones included"""
+        return sum(len(heap) for heap in self._heaps.values())
+    
+    def push(self, repository: str, entry: tuple) -> None:
+        """Add a heap entry for a repository"""
+        heap = self._heaps.get(repository)
+        if heap is None:
+            heap = self._heaps[repository] = []
+            self._turns.append(repository)
+            self._deficits[repository] = 0.0
+        heapq.heappush(heap, entry)
+    
+    def clear(self) -> None:
+        """Drop every heap entry, keeping running counts"""
+        self._heaps = {}
+        self._turns = deque()
+        self._deficits = {}
+    
+    def compact(self, is_live: Callable[[tuple], bool]) -> None:
+        """Rebuild every heap without stale entries"""
+        for repository, heap in list(self._heaps.items()):
+            heap[:] = [entry for entry in heap if is_live(entry)]
+            if heap:
+                heapq.heapify(heap)
+            else:
+                self._drop(repository)
+    
+    def _drop(self, repository: str) -> None:
+        """Forget an empty repository; like DRR, its unused deficit is lost"""
+        del self._heaps[repository]
+        del self._deficits[repository]
+        self._turns.remove(repository)
+    
+    def _head(self, repository: str, is_live: Callable[[tuple], bool],
+              is_blocked: Callable[[tuple], bool], blocked: List[tuple]) -> Optional[tuple]:
+        """First servable entry of a repository heap, dropping stale and setting aside blocked ones"""
+        heap = self._heaps[repository]
+        while heap:
+            if not is_live(heap[0]):
+                heapq.heappop(heap)
+            elif is_blocked(heap[0]):
+                blocked.append((repository, heapq.heappop(heap)))
+            else:
+                return heap[0]
+        return None
+    
+    def pop(self, is_live: Callable[[tuple], bool],
+            is_blocked: Callable[[tuple], bool] = lambda entry: False) -> Optional[tuple]:
+        """
+        Remove and return the next entry to run, None if every repository is empty or capped
+        Blocked entries stay queued but are passed over for this call.
+        """
+        blocked: List[tuple] = []
+        heads = {}
+        
+        for repository in list(self._turns):
+            if self.at_limit(repository):
+                continue
+            head = self._head(repository, is_live, is_blocked, blocked)
+            if head is not None:
+                heads[repository] = head
+        
+        entry = None
+        if heads:
+            best = min(head[0] for head in heads.values())
+            
+            # Every visit to an eligible repository adds a positive weight, so this terminates
+            while entry is None:
+                repository = self._turns[0]
+                head = heads.get(repository)
+                
+                if head is not None and head[0] == best:
+                    if self._deficits[repository] < 1:
+                        self._deficits[repository] += self.weight(repository)
+                    
+                    if self._deficits[repository] >= 1:
+                        self._deficits[repository] -= 1
+                        entry = heapq.heappop(self._heaps[repository])
+                        # Keep the turn while deficit remains for another task
+                        if self._deficits[repository] >= 1:
+                            continue
+                
+                self._turns.rotate(-1)
+        
+        for repository, blocked_entry in blocked:
+            self.push(repository, blocked_entry)
+        
+        for repository in [repository for repository, heap in self._heaps.items() if not heap]:
+            self._drop(repository)
+        
+        return entry
+    
+    def acquire(self, task_id: str, repository: str) -> None:
+        """Count a dequeued task against its repository's cap"""
+        if task_id in self._running:
+            return
+        
+        self._running[task_id] = repository
+        self.running_counts[repository] = self.running_counts.get(repository, 0) + 1
+    
+    def release(self, task_id: str) -> None:
+        """Free the slot held by a finished task"""
+        repository = self._running.pop(task_id, None)
+        if repository is None:
+            return
+        
+        self.running_counts[repository] -= 1
+        if self.running_counts[repository] <= 0:
+            del self.running_counts[repository]
+    
+    def release_all(self) -> None:
+        """Free every slot, used when the queue stops"""
+        self._running.clear()
+        self.running_counts.clear()
@@ -1,8 +1,10 @@
 """Git operations handler"""
 
 import logging
+import re
 import subprocess
 import shutil
+import threading
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
@@ -14,6 +16,55 @@ from src.utils.helpers import sanitize_filename
 logger = logging.getLogger(__name__)
 
 
+# Mirrors of cloned repositories, shared by every task on the node
+CACHE_DIR_NAME = ".repo-cache"
+
+# One lock per mirror so concurrent tasks on the same repository fetch once at a time
+_cache_locks: Dict[str, threading.Lock] = {}
+_cache_locks_guard = threading.Lock()
+
+
+def repository_key(repo_url: str) -> str:
+    """owner/repo for a clone URL such as https://github.com/owner/repo.git"""
+    match = re.search(r"[:/]([^/:]+)/([^/]+?)(?:\.git)?/?$", repo_url)
+    if not match:
+        return sanitize_filename(repo_url)
+    return f"{match.group(1)}/{match.group(2)}"
+
+
+def _read_ref(git_dir: Path, ref: str) -> Optional[str]:
+    """SHA of a ref from its loose file or packed-refs, without running git"""
+    loose = git_dir / ref
+    if loose.is_file():
+        return loose.read_text().strip() or None
+    
+    packed = git_dir / "packed-refs"
+    if packed.is_file():
+        for line in packed.read_text().splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[1] == ref:
+                return parts[0]
+    return None
+
+
+def list_cached_repositories(workspace_path: Path) -> Dict[str, Optional[str]]:
+    """Repositories mirrored on this node, owner/repo -> HEAD commit SHA"""
+    cache_dir = workspace_path / CACHE_DIR_NAME
+    if not cache_dir.is_dir():
+        return {}
+    
+    repositories = {}
+    for mirror in cache_dir.glob("*__*.git"):
+        try:
+            head = (mirror / "HEAD").read_text().strip()
+            sha = _read_ref(mirror, head[5:]) if head.startswith("ref: ") else head
+        except OSError:
+            continue
+        owner, _, name = mirror.name[:-len(".git")].partition("__")
+        repositories[f"{owner}/{name}"] = sha
+    return repositories
+
+
 class GitHandler:
     """Handle Git operations"""
     
@@ -25,7 +76,7 @@ class GitHandler:
         self.workspace_path.mkdir(exist_ok=True, parents=True)
     
     def clone_repository(self, repo_url: str, task_id: str, branch: str = "main") -> Path:
-        """Clone repository to workspace"""
+        """Clone repository to workspace, from the node's mirror when git_clone_cache is on"""
         
         # Create task-specific directory
         repo_dir = self.workspace_path / f"repo-{task_id}"
@@ -34,6 +85,15 @@ class GitHandler:
         if repo_dir.exists():
             shutil.rmtree(repo_dir)
         
+        if self.settings.git_clone_cache:
+            try:
+                return self._clone_from_cache(repo_url, repo_dir, branch)
+            except (subprocess.CalledProcessError, OSError) as e:
+                stderr = getattr(e, "stderr", None) or e
+                logger.warning(f"Clone cache unavailable for {repo_url}, cloning directly: {stderr}")
+                if repo_dir.exists():
+                    shutil.rmtree(repo_dir)
+        
         try:
             # Clone repository
             cmd = [
@@ -58,6 +118,39 @@ class GitHandler:
             logger.error(f"Failed to clone repository: {e.stderr}")
             raise GitOperationError(f"Failed to clone repository: {e.stderr}")
     
+    def _clone_from_cache(self, repo_url: str, repo_dir: Path, branch: str) -> Path:
+        """
+        Refresh the repository's mirror, then clone the task checkout from it
+        The first task mirrors the repository; later ones only fetch new
+        objects into the mirror, and the local clone hardlinks its objects.
+        The checkout's origin points back at repo_url for pushing.
+        """
+        mirror = self.workspace_path / CACHE_DIR_NAME / f"{repository_key(repo_url).replace('/', '__')}.git"
+        
+        with _cache_locks_guard:
+            lock = _cache_locks.setdefault(str(mirror), threading.Lock())
+        
+        with lock:
+            if (mirror / "HEAD").exists():
+                subprocess.run(["git", "fetch", "--prune", "origin"], cwd=mirror,
+                               capture_output=True, text=True, check=True)
+            else:
+                mirror.parent.mkdir(exist_ok=True, parents=True)
+                if mirror.exists():
+                    shutil.rmtree(mirror)
+                subprocess.run(["git", "clone", "--mirror", repo_url, str(mirror)],
+                               capture_output=True, text=True, check=True)
+            
+            subprocess.run([
+                "git", "clone", "--branch", branch, "--single-branch", str(mirror), str(repo_dir)
+            ], capture_output=True, text=True, check=True)
+        
+        subprocess.run(["git", "remote", "set-url", "origin", repo_url], cwd=repo_dir,
+                       capture_output=True, text=True, check=True)
+        
+        logger.info(f"Cloned repository to {repo_dir} from cache {mirror.name}")
+        return repo_dir
+    
     def configure_git(self, repo_path: Path) -> None:
         """Configure Git user information"""
         
@@ -0,0 +1,228 @@
+"""Append-only journal with snapshot compaction"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+from src.utils.helpers import current_timestamp, save_json_atomic, load_json
+
+
+logger = logging.getLogger(__name__)
+
+
+class JournaledMap:
+    """
+    Key/value map persisted as a snapshot plus an append-only JSONL journal
+    
+    Every put/delete appends one record with a sequence number, so writes are
+    O(1) regardless of map size. A background compactor rotates the journal,
+    writes a snapshot and drops the rotated segment (or archives it). On
+    startup the map is rebuilt from the snapshot plus any journal records
+    newer than the snapshot sequence number.
+    
+    Values must be treated as immutable once stored: replace them with put()
+    instead of mutating in place, so snapshots taken outside the lock stay
+    consistent.
+    """
+    
+    def __init__(self, base_path: Path, compact_threshold: int = 10000,
+                 compact_interval: float = 60.0, fsync: bool = False,
+                 archive: bool = False):
+        self.snapshot_file = base_path.with_name(f"{base_path.name}.snapshot.json")
+        self.journal_file = base_path.with_name(f"{base_path.name}.journal.jsonl")
+        self.rotated_file = base_path.with_name(f"{base_path.name}.journal.jsonl.compacting")
+        self.archive_path = base_path.with_name(f"{base_path.name}.archive")
+        self.compact_threshold = compact_threshold
+        self.compact_interval = compact_interval
+        self.fsync = fsync
+        self.archive = archive
+        
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+        self._seq = 0
+        self._records_since_compaction = 0
+        
+        # True when neither a snapshot nor a journal existed before
+        self.created = not self.snapshot_file.exists() and not self.journal_file.exists()
+        
+        self._load()
+        self._journal = open(self.journal_file, "a", encoding="utf-8")
+        
+        # A rotated segment left over from an interrupted compaction is
+        # already replayed, fold it into a fresh snapshot right away
+        if self.rotated_file.exists():
+            self.compact()
+        
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._compactor = threading.Thread(target=self._compact_loop, name="journal-compactor", daemon=True)
+        self._compactor.start()
+    
+    def _load(self) -> None:
+        """Rebuild entries from the snapshot and the journal tail"""
+        snapshot = load_json(self.snapshot_file) or {}
+        self._entries = snapshot.get("entries", {})
+        self._seq = snapshot.get("seq", 0)
+        snapshot_seq = self._seq
+        
+        replayed = 0
+        for journal_file in (self.rotated_file, self.journal_file):
+            for record in self._read_records(journal_file):
+                if record["seq"] <= snapshot_seq:
+                    continue
+                
+                if record["op"] == "put":
+                    self._entries[record["key"]] = record["value"]
+                elif record["op"] == "delete":
+                    self._entries.pop(record["key"], None)
+                
+                self._seq = max(self._seq, record["seq"])
+                replayed += 1
+        
+        self._records_since_compaction = replayed
+        logger.info(f"Loaded {len(self._entries)} entries from {self.snapshot_file.name} "
+                    f"(+{replayed} journal records)")
+    
+    def _read_records(self, journal_file: Path) -> Iterator[Dict[str, Any]]:
+        """Read journal records, stopping at a torn trailing line"""
+        if not journal_file.exists():
+            return
+        
+        with open(journal_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring truncated record at end of {journal_file.name}")
+                    return
+    
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Append a record to the journal (caller holds the lock)"""
+        self._seq += 1
+        record["seq"] = self._seq
+        record["ts"] = current_timestamp()
+        
+        self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        
+        self._records_since_compaction += 1
+        if self._records_since_compaction >= self.compact_threshold:
+            self._wakeup.set()
+    
+    def put(self, key: str, value: Any) -> None:
+        """Set a key"""
+        with self._lock:
+            self._append({"op": "put", "key": key, "value": value})
+            self._entries[key] = value
+    
+    def put_many(self, items: List[Tuple[str, Any]]) -> None:
+        """Set several keys"""
+        with self._lock:
+            for key, value in items:
+                self._append({"op": "put", "key": key, "value": value})
+                self._entries[key] = value
+    
+    def delete(self, key: str) -> bool:
+        """Delete a key, returns False if it did not exist"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            
+            self._append({"op": "delete", "key": key})
+            del self._entries[key]
+            return True
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value"""
+        with self._lock:
+            return self._entries.get(key)
+    
+    def items(self) -> List[Tuple[str, Any]]:
+        """Get a point-in-time list of entries"""
+        with self._lock:
+            return list(self._entries.items())
+    
+    def values(self) -> List[Any]:
+        """Get a point-in-time list of values"""
+        with self._lock:
+            return list(self._entries.values())
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+    
+    @property
+    def lock(self) -> threading.RLock:
+        """Lock guarding the map, for callers that need read-modify-write"""
+        return self._lock
+    
+    def _compact_loop(self) -> None:
+        """Compact on the timer or when woken by the record threshold"""
+        while not self._stop.is_set():
+            self._wakeup.wait(self.compact_interval)
+            self._wakeup.clear()
+            
+            if self._stop.is_set() or self._records_since_compaction == 0:
+                continue
+            
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Journal compaction failed: {e}")
+    
+    def compact(self) -> None:
+        """Write a snapshot and truncate the journal"""
+        with self._compact_lock:
+            with self._lock:
+                # Rotate the journal so appends continue while the snapshot is written
+                self._journal.close()
+                if not self.rotated_file.exists():
+                    os.replace(self.journal_file, self.rotated_file)
+                else:
+                    # Interrupted compaction: the rotated segment is already in memory
+                    self._merge_into_rotated()
+                self._journal = open(self.journal_file, "a", encoding="utf-8")
+                
+                entries = dict(self._entries)
+                seq = self._seq
+                self._records_since_compaction = 0
+            
+            save_json_atomic({"seq": seq, "entries": entries, "updated_at": current_timestamp()},
+                             self.snapshot_file)
+            
+            if self.archive:
+                self.archive_path.mkdir(exist_ok=True, parents=True)
+                os.replace(self.rotated_file, self.archive_path / f"journal-{seq:012d}.jsonl")
+            else:
+                self.rotated_file.unlink()
+        
+        logger.debug(f"Compacted {self.snapshot_file.name} at seq {seq} ({len(entries)} entries)")
+    
+    def _merge_into_rotated(self) -> None:
+        """Append the current journal to an existing rotated segment (caller holds the lock)"""
+        if self.journal_file.exists():
+            with open(self.rotated_file, "a", encoding="utf-8") as rotated, \
+                    open(self.journal_file, "r", encoding="utf-8") as current:
+                for line in current:
+                    rotated.write(line)
+            self.journal_file.unlink()
+    
+    def close(self) -> None:
+        """Stop the compactor, write a final snapshot and close the journal"""
+        self._stop.set()
+        self._wakeup.set()
+        self._compactor.join(timeout=5)
+        
+        if self._records_since_compaction:
+            self.compact()
+        
+        with self._lock:
+            self._journal.close()
@@ -0,0 +1,132 @@
+"""Journaled task storage backend"""
+
+import copy
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+
+from src.services.journal import JournaledMap
+from src.services.task_store import TaskStore, TaskIndex
+from src.utils.helpers import current_timestamp, load_json
+
+
+logger = logging.getLogger(__name__)
+
+
+class JournalTaskStore(TaskStore):
+    """Task store backed by an append-only journal with snapshot compaction"""
+    
+    def __init__(self, base_path: Path, compact_threshold: int = 10000,
+                 compact_interval: float = 60.0, fsync: bool = False, archive: bool = False):
+        self.journal = JournaledMap(base_path, compact_threshold, compact_interval, fsync, archive)
+        self.fresh = self.journal.created
+        self._index = TaskIndex.build(self.journal.values())
+    
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a task"""
+        task = self.journal.get(task_id)
+        return copy.deepcopy(task) if task is not None else None
+    
+    def put(self, task: Dict[str, Any]) -> None:
+        """Append a task record"""
+        task = copy.deepcopy(task)
+        with self.journal.lock:
+            self._index.replace(self.journal.get(task["id"]), task)
+            self.journal.put(task["id"], task)
+    
+    def put_many(self, tasks: List[Dict[str, Any]]) -> None:
+        """Append several task records"""
+        tasks = copy.deepcopy(tasks)
+        with self.journal.lock:
+            for task in tasks:
+                self._index.replace(self.journal.get(task["id"]), task)
+            self.journal.put_many([(task["id"], task) for task in tasks])
+    
+    def update(self, task_id: str, mutator: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """Apply mutator to a copy of the task and append the result"""
+        with self.journal.lock:
+            task = self.journal.get(task_id)
+            if task is None:
+                return None
+            
+            old = task
+            task = copy.deepcopy(task)
+            mutator(task)
+            self.journal.put(task_id, task)
+            self._index.replace(old, task)
+            return copy.deepcopy(task)
+    
+    def list(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List tasks newest first, optionally filtered by status"""
+        tasks = [task for task in self.journal.values() if not status or task.get("status") == status]
+        tasks.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        
+        if limit is not None:
+            tasks = tasks[:limit]
+        
+        return copy.deepcopy(tasks)
+    
+    def count_by_status(self) -> Dict[str, int]:
+        """Count tasks per status"""
+        status_counts = {}
+        for task in self.journal.values():
+            status = task.get("status", "unknown")
+            status_counts[status] = status_counts.get(status, 0) + 1
+        
+        return status_counts
+    
+    def delete_completed_before(self, cutoff: datetime) -> int:
+        """Append delete records for old completed tasks"""
+        removed_count = 0
+        
+        with self.journal.lock:
+            for task_id, task in self.journal.items():
+                if task.get("status") == "completed":
+                    created_at = datetime.fromisoformat(task.get("created_at", ""))
+                    if created_at < cutoff and self.journal.delete(task_id):
+                        self._index.remove(task)
+                        removed_count += 1
+        
+        return removed_count
+    
+    def find_by_issue(self, repository: str, issue_number: int) -> Optional[str]:
+        """Get the newest task ID for an issue"""
+        with self.journal.lock:
+            return self._index.find_by_issue(repository, issue_number)
+    
+    def find_by_pr(self, repository: str, pr_number: int) -> Optional[str]:
+        """Get the task ID that opened a pull request"""
+        with self.journal.lock:
+            return self._index.find_by_pr(repository, pr_number)
+    
+    def find_by_repository(self, repository: str) -> List[str]:
+        """Get all task IDs for a repository"""
+        with self.journal.lock:
+            return self._index.find_by_repository(repository)
+    
+    def export(self) -> Optional[Dict[str, Any]]:
+        """Get the full tasks document"""
+        return {
+            "tasks": dict(self.journal.items()),
+            "metadata": {"exported_at": current_timestamp(), "backend": "journal"}
+        }
+    
+    def migrate_from_json(self, tasks_file: Path) -> int:
+        """One-shot import of an existing tasks.json document into a new journal"""
+        if not self.fresh:
+            return 0
+        
+        tasks_data = load_json(tasks_file) or {}
+        tasks = list(tasks_data.get("tasks", {}).values())
+        
+        if tasks:
+            self.put_many(tasks)
+            logger.info(f"Migrated {len(tasks)} tasks from {tasks_file} to the task journal")
+        
+        self.fresh = False
+        return len(tasks)
+    
+    def close(self) -> None:
+        """Write a final snapshot and close the journal"""
+        self.journal.close()
@@ -0,0 +1,64 @@
+"""Coordinator end of a node's persistent WebSocket channel"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+
+logger = logging.getLogger(__name__)
+
+
+class NodeChannel:
+    """
+    Framed JSON messages to and from one node over its WebSocket
+    
+    Every frame is an object with a "type". Nodes send register,
+    heartbeat, status, assign_result and unregister frames; the
+    coordinator sends assign and cancel. An assign is answered by an
+    assign_result frame with the same task_id, which resolves the waiting
+    assign() call.
+    """
+    
+    def __init__(self, node_id: str, send: Callable[[Dict[str, Any]], Awaitable[None]]):
+        self.node_id = node_id
+        self.closed = False
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self._replies: Dict[str, asyncio.Future] = {}  # task_id -> pending assign
+    
+    async def send(self, message: Dict[str, Any]) -> None:
+        """Send one frame, concurrent senders are serialized"""
+        if self.closed:
+            raise ConnectionError(f"Channel to node {self.node_id} is closed")
+        
+        async with self._send_lock:
+            await self._send(message)
+    
+    async def assign(self, task_data: Dict[str, Any], timeout: float) -> bool:
+        """Offer a task to the node, True if it accepted within timeout"""
+        task_id = task_data["task_id"]
+        future = asyncio.get_running_loop().create_future()
+        self._replies[task_id] = future
+        
+        try:
+            await self.send({"type": "assign", **task_data})
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Node {self.node_id} did not answer the assignment of task {task_id}")
+            return False
+        finally:
+            if self._replies.get(task_id) is future:
+                del self._replies[task_id]
+    
+    def resolve(self, message: Dict[str, Any]) -> None:
+        """Complete the assign() waiting for an assign_result frame"""
+        future = self._replies.get(message.get("task_id"))
+        if future is not None and not future.done():
+            future.set_result(bool(message.get("accepted")))
+    
+    def close(self) -> None:
+        """Mark the channel closed and fail assignments still waiting for an answer"""
+        self.closed = True
+        for future in self._replies.values():
+            if not future.done():
+                future.set_result(False)
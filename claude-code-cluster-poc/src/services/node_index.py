@@ -0,0 +1,124 @@
+"""Capacity index for picking the best node for a task"""
+
+import heapq
+import itertools
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+
+def node_score(requirements: Sequence[str], specialties, load_ratio: float) -> float:
+    """Specialty match (70%) plus free capacity (30%), higher is better"""
+    if requirements:
+        matching_specialties = set(requirements) & set(specialties)
+        score = len(matching_specialties) / len(requirements) * 0.7
+    else:
+        score = 0.5  # No specific requirements
+    
+    return score + (1.0 - load_ratio) * 0.3
+
+
+class NodeIndex:
+    """
+    Nodes with free capacity, grouped by specialty set and ordered by load
+    
+    Each distinct specialty set has a heap of (load_ratio, order, seq,
+    node_id) entries, and a second heap holds every entry for tasks without
+    requirements. All nodes in a group match a task equally, so only group
+    heads can win: best() scores one head per group, O(G) for G distinct
+    specialty sets (a handful in practice, independent of the node count),
+    and O(log N) for tasks without requirements. The coordinator calls
+    update() or discard() whenever a node's status, task list or capacity
+    changes, both O(log N). Replaced entries are invalidated lazily by
+    sequence number.
+    """
+    
+    def __init__(self):
+        self._groups: Dict[FrozenSet[str], List[tuple]] = {}
+        self._all: List[tuple] = []
+        self._live: Dict[str, int] = {}  # node_id -> seq of its live entries
+        self._group_of: Dict[str, FrozenSet[str]] = {}
+        self._order: Dict[str, int] = {}  # node_id -> first-seen order, breaks score ties
+        self._loads: Dict[str, float] = {}  # node_id -> load_ratio of its live entries
+        self._counter = itertools.count()
+        self._stored = 0  # entries across all heaps, stale ones included
+    
+    def __len__(self) -> int:
+        """Number of nodes with free capacity"""
+        return len(self._live)
+    
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._live
+    
+    def update(self, node_id: str, specialties: Iterable[str], load_ratio: float) -> None:
+        """Index a node with free capacity at its current load"""
+        seq = next(self._counter)
+        order = self._order.setdefault(node_id, seq)
+        group = frozenset(specialties)
+        entry = (load_ratio, order, seq, node_id)
+        
+        self._live[node_id] = seq
+        self._loads[node_id] = load_ratio
+        self._group_of[node_id] = group
+        heapq.heappush(self._groups.setdefault(group, []), entry)
+        heapq.heappush(self._all, entry)
+        self._stored += 2
+        self._maybe_compact()
+    
+    def discard(self, node_id: str) -> None:
+        """Take a full or offline node out of the index"""
+        self._live.pop(node_id, None)
+        self._loads.pop(node_id, None)
+    
+    def remove(self, node_id: str) -> None:
+        """Forget a node"""
+        self._live.pop(node_id, None)
+        self._loads.pop(node_id, None)
+        self._group_of.pop(node_id, None)
+        self._order.pop(node_id, None)
+    
+    def load(self, node_id: str) -> Optional[float]:
+        """Indexed load ratio of a node, None if it has no free capacity"""
+        return self._loads.get(node_id)
+    
+    def _is_live(self, entry: tuple) -> bool:
+        return self._live.get(entry[3]) == entry[2]
+    
+    def _head(self, heap: List[tuple]) -> Optional[tuple]:
+        """Least loaded live entry of a heap, dropping stale ones"""
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+            self._stored -= 1
+        return heap[0] if heap else None
+    
+    def _maybe_compact(self) -> None:
+        """Rebuild the heaps once stale entries dominate them"""
+        if self._stored <= 4 * len(self._live) + 128:
+            return
+        
+        self._all = [entry for entry in self._all if self._is_live(entry)]
+        heapq.heapify(self._all)
+        self._groups = {}
+        for entry in self._all:
+            self._groups.setdefault(self._group_of[entry[3]], []).append(entry)
+        for heap in self._groups.values():
+            heapq.heapify(heap)
+        self._stored = 2 * len(self._all)
+    
+    def best(self, requirements: Sequence[str]) -> Optional[str]:
+        """ID of the highest scoring node with free capacity, None if there is none"""
+        if not requirements:
+            head = self._head(self._all)
+            return head[3] if head else None
+        
+        best_key = None
+        best_node = None
+        for group, heap in list(self._groups.items()):
+            head = self._head(heap)
+            if head is None:
+                del self._groups[group]
+                continue
+            
+            key = (-node_score(requirements, group, head[0]), head[1])
+            if best_key is None or key < best_key:
+                best_key, best_node = key, head[3]
+        
+        return best_node
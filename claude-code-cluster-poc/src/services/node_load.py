@@ -0,0 +1,87 @@
+"""Rolling resource load of agent nodes"""
+
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+class NodeLoad:
+    """
+    Resource samples from a node's recent heartbeats
+    
+    Pressure is the higher of CPU load per core (capped at 1) and the used
+    memory fraction, averaged over the last window samples; the coordinator
+    scores the node with it instead of the task-count load when it is
+    higher. A node whose window averages more used memory than
+    memory_limit, more than swap_limit swapped pages per second, or less
+    free disk than disk_min_free_mb is overloaded and gets no new tasks
+    until the window recovers.
+    """
+    
+    def __init__(self, window: int = 6, memory_limit: float = 0.9, swap_limit: float = 50.0,
+                 disk_min_free_mb: float = 1024.0):
+        self.samples: deque = deque(maxlen=window)
+        self.memory_limit = memory_limit
+        self.swap_limit = swap_limit
+        self.disk_min_free_mb = disk_min_free_mb
+        self.task_seconds: List[float] = []
+    
+    @classmethod
+    def from_settings(cls, settings) -> "NodeLoad":
+        """Build a window with the node_load_* settings"""
+        return cls(
+            window=settings.node_load_window,
+            memory_limit=settings.node_memory_limit,
+            swap_limit=settings.node_swap_limit,
+            disk_min_free_mb=settings.node_disk_min_free_mb
+        )
+    
+    def add(self, sample: Dict[str, Any]) -> None:
+        """Record the load a heartbeat reported"""
+        self.samples.append(sample)
+        if sample.get("task_seconds") is not None:
+            self.task_seconds = list(sample["task_seconds"])
+    
+    def mean(self, key: str) -> Optional[float]:
+        """Average of a metric over the samples that report it"""
+        values = [sample[key] for sample in self.samples if sample.get(key) is not None]
+        return sum(values) / len(values) if values else None
+    
+    def pressure(self) -> float:
+        """Resource load between 0 (idle) and 1 (saturated)"""
+        cpu = self.mean("cpu_load")
+        available = self.mean("memory_available_ratio")
+        return max(
+            min(1.0, cpu) if cpu is not None else 0.0,
+            1.0 - available if available is not None else 0.0
+        )
+    
+    def overloaded(self) -> bool:
+        """Whether the node is short of memory or disk, or swapping"""
+        available = self.mean("memory_available_ratio")
+        if available is not None and 1.0 - available > self.memory_limit:
+            return True
+        
+        swap_rate = self.mean("swap_pages_per_second")
+        if swap_rate is not None and swap_rate > self.swap_limit:
+            return True
+        
+        disk_free = self.mean("disk_free_mb")
+        return disk_free is not None and disk_free < self.disk_min_free_mb
+    
+    def summary(self) -> Dict[str, Any]:
+        """Window averages for status output"""
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return round(value, 3) if value is not None else None
+        
+        return {
+            "samples": len(self.samples),
+            "cpu_load": rounded(self.mean("cpu_load")),
+            "memory_available_mb": rounded(self.mean("memory_available_mb")),
+            "memory_available_ratio": rounded(self.mean("memory_available_ratio")),
+            "swap_pages_per_second": rounded(self.mean("swap_pages_per_second")),
+            "disk_free_mb": rounded(self.mean("disk_free_mb")),
+            "subprocesses": self.samples[-1].get("subprocesses") if self.samples else None,
+            "mean_task_seconds": rounded(sum(self.task_seconds) / len(self.task_seconds)) if self.task_seconds else None,
+            "pressure": round(self.pressure(), 3),
+            "overloaded": self.overloaded()
+        }
@@ -0,0 +1,136 @@
+"""Latency and throughput metrics for the task queue"""
+
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List
+
+from src.utils.metrics import RollingCounter, RollingHistogram
+
+
+# Finished tasks kept with their timestamps for inspection
+RECENT_TASKS = 50
+
+
+class QueueMetrics:
+    """
+    Incremental queue instrumentation
+    
+    Wait time runs from when a task became ready (enqueued or retry due) to
+    its dequeue; service time from dequeue to completion or failure. Both
+    are rolling histograms over window seconds, completions and failures are
+    rolling counters for throughput, and totals are monotonic counters.
+    """
+    
+    def __init__(self, window: float = 300.0):
+        self.window = window
+        self.wait_time = RollingHistogram(window)
+        self.service_time = RollingHistogram(window)
+        self.completed = RollingCounter(window)
+        self.failed = RollingCounter(window)
+        self.totals: Dict[str, int] = {
+            "enqueued": 0,
+            "dequeued": 0,
+            "completed": 0,
+            "failed": 0,
+            "retried": 0,
+            "dead_lettered": 0
+        }
+        self.recent: deque = deque(maxlen=RECENT_TASKS)
+    
+    def task_enqueued(self, count: int = 1) -> None:
+        """Count newly queued tasks"""
+        self.totals["enqueued"] += count
+    
+    def task_dequeued(self, task) -> None:
+        """Record how long a dequeued QueuedTask waited"""
+        self.totals["dequeued"] += 1
+        self.wait_time.record(task.wait_seconds())
+    
+    def task_retried(self) -> None:
+        """Count a failed task scheduled for another attempt"""
+        self.totals["retried"] += 1
+    
+    def task_dead_lettered(self) -> None:
+        """Count a task moved to the dead-letter store"""
+        self.totals["dead_lettered"] += 1
+    
+    def task_finished(self, task, succeeded: bool) -> None:
+        """Record the outcome and timestamps of a processed QueuedTask"""
+        finished_at = datetime.now()
+        service_seconds = (finished_at - task.dequeued_at).total_seconds() if task.dequeued_at else None
+        
+        if service_seconds is not None:
+            self.service_time.record(service_seconds)
+        
+        if succeeded:
+            self.totals["completed"] += 1
+            self.completed.add()
+        else:
+            self.totals["failed"] += 1
+            self.failed.add()
+        
+        self.recent.append({
+            "task_id": task.task_id,
+            "repository": task.repository,
+            "outcome": "completed" if succeeded else "failed",
+            "enqueued_at": task.enqueued_at.isoformat() if task.enqueued_at else None,
+            "dequeued_at": task.dequeued_at.isoformat() if task.dequeued_at else None,
+            "finished_at": finished_at.isoformat(),
+            "wait_seconds": round(task.wait_seconds(), 3) if task.dequeued_at else None,
+            "service_seconds": round(service_seconds, 3) if service_seconds is not None else None
+        })
+    
+    def snapshot(self, include_recent: bool = False) -> Dict[str, Any]:
+        """Current metrics as plain data"""
+        result: Dict[str, Any] = {
+            "window_seconds": self.window,
+            "wait_seconds": self.wait_time.snapshot(),
+            "service_seconds": self.service_time.snapshot(),
+            "throughput_per_minute": {
+                "completed": round(self.completed.rate_per_minute(), 3),
+                "failed": round(self.failed.rate_per_minute(), 3)
+            },
+            "totals": dict(self.totals)
+        }
+        
+        if include_recent:
+            result["recent"] = list(self.recent)
+        
+        return result
+
+
+def render_prometheus(status: Dict[str, Any]) -> str:
+    """Render TaskQueue.get_status() in the Prometheus text format"""
+    metrics = status["metrics"]
+    lines: List[str] = []
+    
+    def emit(name: str, kind: str, help_text: str, samples: List[tuple]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if value is None:
+                continue
+            label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    
+    for name, help_text in (("wait_seconds", "Time tasks waited in the queue before a worker took them"),
+                            ("service_seconds", "Time from dequeue to completion or failure")):
+        histogram = metrics[name]
+        emit(f"task_queue_{name}", "summary", f"{help_text} (rolling {metrics['window_seconds']:g}s window)",
+             [({"quantile": q}, histogram[f"p{p}"]) for q, p in (("0.5", 50), ("0.95", 95), ("0.99", 99))])
+        lines.append(f"task_queue_{name}_count {histogram['count']}")
+        if histogram["mean"] is not None:
+            lines.append(f"task_queue_{name}_sum {round(histogram['mean'] * histogram['count'], 3)}")
+    
+    emit("task_queue_throughput_per_minute", "gauge", "Finished tasks per minute over the rolling window",
+         [({"outcome": outcome}, rate) for outcome, rate in metrics["throughput_per_minute"].items()])
+    emit("task_queue_tasks_total", "counter", "Tasks seen by the queue since start",
+         [({"event": event}, count) for event, count in metrics["totals"].items()])
+    emit("task_queue_tasks", "gauge", "Tasks by queue state (failed are dead-lettered)",
+         [({"state": state}, count) for state, count in status["tasks"].items()])
+    emit("task_queue_workers", "gauge", "Running queue workers", [({}, status["workers"])])
+    emit("task_queue_repository_tasks", "gauge", "Queued and running tasks per repository",
+         [({"repository": repository, "state": state}, info[state])
+          for repository, info in status["repositories"].items() for state in ("queued", "running")])
+    
+    return "\n".join(lines) + "\n"
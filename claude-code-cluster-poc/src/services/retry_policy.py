@@ -0,0 +1,121 @@
+"""Retry policies for failed queue tasks"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+from src.core.exceptions import (
+    TaskNotFoundError, InvalidTaskStateError, GitHubAPIError, ClaudeAPIError, GitOperationError
+)
+
+
+# Error classes used to pick a retry policy
+ERROR_RATE_LIMIT = "rate_limit"
+ERROR_TRANSIENT = "transient"
+ERROR_INVALID_TASK = "invalid_task"
+ERROR_GITHUB = "github"
+ERROR_CLAUDE = "claude"
+ERROR_GIT = "git"
+ERROR_DEFAULT = "default"
+
+RATE_LIMIT_MARKERS = ("rate limit", "rate_limit", "ratelimit", "429", "too many requests", "overloaded")
+TRANSIENT_MARKERS = ("timed out", "timeout", "connection", "temporarily unavailable", "502", "503", "504")
+INVALID_TASK_MARKERS = ("not in created state", "not in created or failed state", "task not found")
+
+
+def _exception_chain(error: BaseException) -> List[BaseException]:
+    """The exception plus the causes it wraps"""
+    chain = []
+    while error is not None and error not in chain:
+        chain.append(error)
+        error = error.__cause__ or error.__context__
+    return chain
+
+
+def classify_error(error: Union[BaseException, str]) -> str:
+    """
+    Map a task failure to an error class
+    ClaudeAgent.run_task wraps every failure in ClaudeClusterError, so the
+    wrapped exceptions and the message text are both inspected. Exceptions
+    returned from a process pool lose their chain, the message still works.
+    """
+    chain = _exception_chain(error) if isinstance(error, BaseException) else []
+    message = " ".join(str(e) for e in chain).lower() if chain else str(error).lower()
+    
+    if any(isinstance(e, (TaskNotFoundError, InvalidTaskStateError)) for e in chain) \
+            or any(marker in message for marker in INVALID_TASK_MARKERS):
+        return ERROR_INVALID_TASK
+    
+    if any(marker in message for marker in RATE_LIMIT_MARKERS):
+        return ERROR_RATE_LIMIT
+    
+    if any(isinstance(e, (TimeoutError, asyncio.TimeoutError, ConnectionError)) for e in chain) \
+            or any(marker in message for marker in TRANSIENT_MARKERS):
+        return ERROR_TRANSIENT
+    
+    for exc_type, error_class in ((GitHubAPIError, ERROR_GITHUB), (ClaudeAPIError, ERROR_CLAUDE),
+                                  (GitOperationError, ERROR_GIT)):
+        if any(isinstance(e, exc_type) for e in chain):
+            return error_class
+    
+    return ERROR_DEFAULT
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff policy for one error class"""
+    max_attempts: Optional[int] = None  # None: use the task's own max_attempts
+    base_delay: float = 30.0
+    multiplier: float = 2.0
+    max_delay: float = 3600.0
+    
+    def delay(self, attempts: int, rng: random.Random) -> float:
+        """Backoff before the next attempt, with equal jitter (half fixed, half random)"""
+        cap = min(self.max_delay, self.base_delay * self.multiplier ** max(0, attempts - 1))
+        return cap / 2 + rng.uniform(0, cap / 2)
+
+
+# Built-in policies; the default policy comes from Settings
+DEFAULT_POLICIES: Dict[str, RetryPolicy] = {
+    # Quota exhaustion is not the task's fault: back off hard, but keep trying
+    ERROR_RATE_LIMIT: RetryPolicy(max_attempts=6, base_delay=60.0, max_delay=3600.0),
+    # Network blips usually clear quickly
+    ERROR_TRANSIENT: RetryPolicy(max_attempts=5, base_delay=10.0, max_delay=600.0),
+    # Retrying cannot fix a missing or finished task
+    ERROR_INVALID_TASK: RetryPolicy(max_attempts=1),
+}
+
+
+class RetryScheduler:
+    """Decides whether and when a failed task is retried"""
+    
+    def __init__(self, default: RetryPolicy, policies: Optional[Dict[str, RetryPolicy]] = None,
+                 ceiling: Optional[float] = None, rng: Optional[random.Random] = None):
+        self.default = default
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.ceiling = ceiling
+        self.rng = rng or random.Random()
+    
+    @classmethod
+    def from_settings(cls, settings) -> "RetryScheduler":
+        """Build the scheduler from retry_* settings"""
+        default = RetryPolicy(base_delay=settings.retry_base_delay, max_delay=settings.retry_max_delay)
+        return cls(default, ceiling=settings.retry_max_delay)
+    
+    def policy_for(self, error_class: Optional[str]) -> RetryPolicy:
+        """Get the policy for an error class"""
+        return self.policies.get(error_class or ERROR_DEFAULT, self.default)
+    
+    def max_attempts(self, error_class: Optional[str], task_max_attempts: int) -> int:
+        """Attempt limit for a task that failed with error_class"""
+        policy = self.policy_for(error_class)
+        return policy.max_attempts if policy.max_attempts is not None else task_max_attempts
+    
+    def next_retry(self, error_class: Optional[str], attempts: int, now: Optional[datetime] = None) -> datetime:
+        """Time of the next attempt after `attempts` failed attempts"""
+        delay = self.policy_for(error_class).delay(attempts, self.rng)
+        if self.ceiling is not None:
+            delay = min(delay, self.ceiling)
+        return (now or datetime.now()) + timedelta(seconds=delay)
@@ -0,0 +1,254 @@
+"""SQLite task storage backend"""
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+
+from src.services.task_store import TaskStore
+from src.utils.helpers import current_timestamp, load_json
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT,
+    issue_number INTEGER,
+    repository TEXT,
+    pr_number INTEGER,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_issue ON tasks (repository, issue_number, created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_pr ON tasks (repository, pr_number);
+"""
+
+
+class SQLiteTaskStore(TaskStore):
+    """Task store backed by SQLite in WAL mode"""
+
+    def __init__(self, db_file: Path):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+
+        # The connection is shared between threads and guarded by _lock
+        self._conn = sqlite3.connect(str(db_file), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate_schema()
+        self._conn.executescript(INDEXES)
+
+    def _migrate_schema(self) -> None:
+        """Add columns introduced after a database was created"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+
+        if "pr_number" not in columns:
+            self._conn.execute("ALTER TABLE tasks ADD COLUMN pr_number INTEGER")
+            self._conn.execute("DROP INDEX IF EXISTS idx_tasks_issue")
+
+            # Backfill from the stored task documents
+            rows = self._conn.execute("SELECT data FROM tasks").fetchall()
+            for (data,) in rows:
+                task = json.loads(data)
+                pr_number = (task.get("results") or {}).get("pr_number")
+                if pr_number is not None:
+                    self._conn.execute("UPDATE tasks SET pr_number = ? WHERE id = ?", (pr_number, task["id"]))
+
+            logger.info(f"Added pr_number column to {self.db_file}")
+
+    def _row_values(self, task: Dict[str, Any]) -> tuple:
+        """Build column values for a task row"""
+        issue = task.get("issue") or {}
+        results = task.get("results") or {}
+        return (
+            task["id"],
+            task.get("status", "created"),
+            task.get("created_at", ""),
+            task.get("updated_at"),
+            issue.get("number"),
+            issue.get("repository"),
+            results.get("pr_number"),
+            json.dumps(task, ensure_ascii=False),
+        )
+
+    def _write(self, task: Dict[str, Any]) -> None:
+        """Write a task row (caller holds the lock)"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tasks "
+            "(id, status, created_at, updated_at, issue_number, repository, pr_number, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            self._row_values(task)
+        )
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a task by ID"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, task: Dict[str, Any]) -> None:
+        """Insert or replace a task"""
+        with self._lock:
+            self._write(task)
+
+    def put_many(self, tasks: List[Dict[str, Any]]) -> None:
+        """Insert or replace several tasks in one transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for task in tasks:
+                    self._write(task)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def update(self, task_id: str, mutator: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """Read-modify-write a task inside a single transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+                if row is None:
+                    self._conn.execute("ROLLBACK")
+                    return None
+
+                task = json.loads(row[0])
+                mutator(task)
+                self._write(task)
+                self._conn.execute("COMMIT")
+                return task
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def list(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List tasks newest first, optionally filtered by status"""
+        query = "SELECT data FROM tasks"
+        params: List[Any] = []
+
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+
+        query += " ORDER BY created_at DESC"
+
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Count tasks per status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+
+        return {status: count for status, count in rows}
+
+    def delete_completed_before(self, cutoff: datetime) -> int:
+        """Delete completed tasks created before cutoff"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM tasks WHERE status = 'completed' AND created_at < ?",
+                (cutoff.isoformat(),)
+            )
+
+        return cursor.rowcount
+
+    def find_by_issue(self, repository: str, issue_number: int) -> Optional[str]:
+        """Get the newest task ID for an issue"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM tasks WHERE repository = ? AND issue_number = ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (repository, issue_number)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def find_by_pr(self, repository: str, pr_number: int) -> Optional[str]:
+        """Get the task ID that opened a pull request"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM tasks WHERE repository = ? AND pr_number = ? LIMIT 1",
+                (repository, pr_number)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def find_by_repository(self, repository: str) -> List[str]:
+        """Get all task IDs for a repository"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM tasks WHERE repository = ? ORDER BY id", (repository,)
+            ).fetchall()
+
+        return [row[0] for row in rows]
+
+    def export(self) -> Optional[Dict[str, Any]]:
+        """Get the full tasks document"""
+        tasks = self.list()
+        tasks.reverse()
+
+        return {
+            "tasks": {task["id"]: task for task in tasks},
+            "metadata": {"exported_at": current_timestamp(), "backend": "sqlite"}
+        }
+
+    def migrate_from_json(self, tasks_file: Path) -> int:
+        """
+        One-shot import of an existing tasks.json document
+        Returns the number of imported tasks (0 if already migrated)
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'json_migrated_at'").fetchone()
+            if row is not None:
+                return 0
+
+            tasks_data = load_json(tasks_file) or {}
+            tasks = list(tasks_data.get("tasks", {}).values())
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for task in tasks:
+                    self._write(task)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated_at', ?)",
+                    (current_timestamp(),)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if tasks:
+            logger.info(f"Migrated {len(tasks)} tasks from {tasks_file} to {self.db_file}")
+
+        return len(tasks)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,21 +1,168 @@
-"""State management using JSON files"""
+"""State management for tasks"""
 
 import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable
 
 from src.core.config import get_settings
 from src.core.exceptions import TaskNotFoundError, InvalidTaskStateError
+from src.services.task_store import TaskStore, TaskIndex
+from src.services.blob_store import BlobStore
+from src.services.sqlite_store import SQLiteTaskStore
+from src.services.journal_store import JournalTaskStore
+from src.services.task_cache import get_shared_cache
 from src.utils.helpers import generate_task_id, current_timestamp, save_json, load_json
 
 
 logger = logging.getLogger(__name__)
 
 
+class JsonTaskStore(TaskStore):
+    """Task store backed by a single tasks.json document"""
+    
+    def __init__(self, tasks_file: Path):
+        self.tasks_file = tasks_file
+        
+        if not self.tasks_file.exists():
+            save_json({"tasks": {}, "metadata": {"created_at": current_timestamp()}}, self.tasks_file)
+    
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a task by ID"""
+        tasks_data = load_json(self.tasks_file)
+        
+        if not tasks_data or task_id not in tasks_data.get("tasks", {}):
+            return None
+        
+        return tasks_data["tasks"][task_id]
+    
+    def put(self, task: Dict[str, Any]) -> None:
+        """Save a single task to the JSON file"""
+        tasks_data = load_json(self.tasks_file)
+        
+        if not tasks_data:
+            tasks_data = {"tasks": {}, "metadata": {"created_at": current_timestamp()}}
+        
+        index = self._index(tasks_data)
+        index.replace(tasks_data["tasks"].get(task["id"]), task)
+        tasks_data["tasks"][task["id"]] = task
+        tasks_data["indexes"] = index.to_dict()
+        tasks_data["metadata"]["updated_at"] = current_timestamp()
+        
+        save_json(tasks_data, self.tasks_file)
+    
+    def put_many(self, tasks: List[Dict[str, Any]]) -> None:
+        """Save several tasks with a single load/save round trip"""
+        tasks_data = load_json(self.tasks_file)
+        
+        if not tasks_data:
+            tasks_data = {"tasks": {}, "metadata": {"created_at": current_timestamp()}}
+        
+        index = self._index(tasks_data)
+        for task in tasks:
+            index.replace(tasks_data["tasks"].get(task["id"]), task)
+            tasks_data["tasks"][task["id"]] = task
+        tasks_data["indexes"] = index.to_dict()
+        tasks_data["metadata"]["updated_at"] = current_timestamp()
+        
+        save_json(tasks_data, self.tasks_file)
+    
+    def update(self, task_id: str, mutator: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """Update a task with a single load/save round trip"""
+        tasks_data = load_json(self.tasks_file)
+        
+        if not tasks_data or task_id not in tasks_data.get("tasks", {}):
+            return None
+        
+        task = tasks_data["tasks"][task_id]
+        index = self._index(tasks_data)
+        index.remove(task)
+        mutator(task)
+        index.add(task)
+        tasks_data["indexes"] = index.to_dict()
+        
+        save_json(tasks_data, self.tasks_file)
+        return task
+    
+    def list(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List tasks newest first, optionally filtered by status"""
+        tasks_data = load_json(self.tasks_file)
+        
+        if not tasks_data:
+            return []
+        
+        tasks = list(tasks_data.get("tasks", {}).values())
+        
+        if status:
+            tasks = [task for task in tasks if task.get("status") == status]
+        
+        # Sort by created_at (newest first)
+        tasks.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        
+        return tasks[:limit] if limit is not None else tasks
+    
+    def count_by_status(self) -> Dict[str, int]:
+        """Count tasks per status"""
+        status_counts = {}
+        for task in self.list():
+            status = task.get("status", "unknown")
+            status_counts[status] = status_counts.get(status, 0) + 1
+        
+        return status_counts
+    
+    def delete_completed_before(self, cutoff: datetime) -> int:
+        """Delete completed tasks created before cutoff"""
+        tasks_data = load_json(self.tasks_file)
+        
+        if not tasks_data:
+            return 0
+        
+        tasks = tasks_data.get("tasks", {})
+        
+        # Remove old completed tasks
+        to_remove = []
+        for task_id, task in tasks.items():
+            if task.get("status") == "completed":
+                created_at = datetime.fromisoformat(task.get("created_at", ""))
+                if created_at < cutoff:
+                    to_remove.append(task_id)
+        
+        index = self._index(tasks_data)
+        for task_id in to_remove:
+            index.remove(tasks.pop(task_id))
+        tasks_data["indexes"] = index.to_dict()
+        
+        # Save updated data
+        save_json(tasks_data, self.tasks_file)
+        
+        return len(to_remove)
+    
+    def _index(self, tasks_data: Dict[str, Any]) -> TaskIndex:
+        """Load the stored indexes, rebuilding them for documents written before they existed or changed shape"""
+        if tasks_data.get("indexes", {}).get("version") == TaskIndex.VERSION:
+            return TaskIndex.from_dict(tasks_data["indexes"])
+        return TaskIndex.build(list(tasks_data.get("tasks", {}).values()))
+    
+    def find_by_issue(self, repository: str, issue_number: int) -> Optional[str]:
+        """Get the newest task ID for an issue"""
+        return self._index(load_json(self.tasks_file) or {}).find_by_issue(repository, issue_number)
+    
+    def find_by_pr(self, repository: str, pr_number: int) -> Optional[str]:
+        """Get the task ID that opened a pull request"""
+        return self._index(load_json(self.tasks_file) or {}).find_by_pr(repository, pr_number)
+    
+    def find_by_repository(self, repository: str) -> List[str]:
+        """Get all task IDs for a repository"""
+        return self._index(load_json(self.tasks_file) or {}).find_by_repository(repository)
+    
+    def export(self) -> Optional[Dict[str, Any]]:
+        """Get the full tasks document"""
+        return load_json(self.tasks_file)
+
+
 class StateManager:
-    """JSON-based state management for tasks"""
+    """State management for tasks on a pluggable storage backend"""
     
     def __init__(self):
         self.settings = get_settings()
@@ -25,14 +172,48 @@ class StateManager:
         # Ensure data directory exists
         self.settings.data_path.mkdir(exist_ok=True, parents=True)
         
-        # Initialize files if they don't exist
+        # Large result payloads live in a content-addressed blob store
+        self.blob_store = BlobStore(self.settings.data_path / "blobs")
+        
+        # Initialize storage and config file
+        self.write_behind = self.settings.state_write_mode == "write_behind"
+        self.store = self._create_store()
         self._init_files()
     
+    def _create_store(self) -> TaskStore:
+        """Create the task store, wrapped in the shared write-behind cache if enabled"""
+        if self.write_behind:
+            return get_shared_cache(
+                self.settings.data_path.resolve(),
+                self._create_backend,
+                self.settings.state_flush_interval,
+                self.settings.state_flush_threshold
+            )
+        
+        return self._create_backend()
+    
+    def _create_backend(self) -> TaskStore:
+        """Create the task backend selected by settings.state_backend"""
+        if self.settings.state_backend == "sqlite":
+            store = SQLiteTaskStore(self.settings.data_path / "tasks.db")
+            store.migrate_from_json(self.tasks_file)
+            return store
+        
+        if self.settings.state_backend == "journal":
+            store = JournalTaskStore(
+                self.settings.data_path / "tasks",
+                compact_threshold=self.settings.journal_compact_threshold,
+                compact_interval=self.settings.journal_compact_interval,
+                fsync=self.settings.journal_fsync,
+                archive=self.settings.journal_archive
+            )
+            store.migrate_from_json(self.tasks_file)
+            return store
+        
+        return JsonTaskStore(self.tasks_file)
+    
     def _init_files(self) -> None:
         """Initialize JSON files if they don't exist"""
-        if not self.tasks_file.exists():
-            save_json({"tasks": {}, "metadata": {"created_at": current_timestamp()}}, self.tasks_file)
-        
         if not self.config_file.exists():
             save_json({"version": "0.1.0", "created_at": current_timestamp()}, self.config_file)
     
@@ -86,39 +267,34 @@ class StateManager:
     
     def get_task(self, task_id: str) -> Dict[str, Any]:
         """Get task by ID"""
-        tasks_data = load_json(self.tasks_file)
+        task = self.store.get(task_id)
         
-        if not tasks_data or task_id not in tasks_data.get("tasks", {}):
+        if task is None:
             raise TaskNotFoundError(f"Task {task_id} not found")
         
-        return tasks_data["tasks"][task_id]
+        return task
     
     def update_task(self, task_id: str, updates: Dict[str, Any]) -> None:
         """Update task data"""
-        tasks_data = load_json(self.tasks_file)
-        
-        if not tasks_data or task_id not in tasks_data.get("tasks", {}):
-            raise TaskNotFoundError(f"Task {task_id} not found")
-        
-        task = tasks_data["tasks"][task_id]
         
-        # Update fields
-        for key, value in updates.items():
-            if key in task:
-                task[key] = value
-            else:
-                # Handle nested updates
-                if "." in key:
-                    parts = key.split(".", 1)
-                    if parts[0] in task:
-                        if isinstance(task[parts[0]], dict):
-                            task[parts[0]][parts[1]] = value
-        
-        # Always update timestamp
-        task["updated_at"] = current_timestamp()
+        def apply_updates(task: Dict[str, Any]) -> None:
+            # Update fields
+            for key, value in updates.items():
+                if key in task:
+                    task[key] = value
+                else:
+                    # Handle nested updates
+                    if "." in key:
+                        parts = key.split(".", 1)
+                        if parts[0] in task:
+                            if isinstance(task[parts[0]], dict):
+                                task[parts[0]][parts[1]] = value
+            
+            # Always update timestamp
+            task["updated_at"] = current_timestamp()
         
-        # Save updated data
-        save_json(tasks_data, self.tasks_file)
+        if self.store.update(task_id, apply_updates) is None:
+            raise TaskNotFoundError(f"Task {task_id} not found")
         
         logger.info(f"Updated task {task_id}")
     
@@ -148,19 +324,28 @@ class StateManager:
         self.update_task(task_id, updates)
     
     def save_task_implementation(self, task_id: str, implementation: Dict[str, Any]) -> None:
-        """Save implementation results"""
+        """Save implementation results (large payloads go to the blob store)"""
         updates = {
-            "results.implementation": implementation
+            "results.implementation": self._spill(implementation)
         }
         self.update_task(task_id, updates)
     
     def save_task_review(self, task_id: str, review: Dict[str, Any]) -> None:
-        """Save review results"""
+        """Save review results (large payloads go to the blob store)"""
         updates = {
-            "results.review": review
+            "results.review": self._spill(review)
         }
         self.update_task(task_id, updates)
     
+    def _spill(self, value: Any) -> Any:
+        """Replace a large value with a blob reference"""
+        return self.blob_store.maybe_put(value, self.settings.blob_threshold_bytes)
+    
+    def get_task_result(self, task_id: str, field: str) -> Any:
+        """Get a task result field, loading it from the blob store if needed"""
+        task = self.get_task(task_id)
+        return self.blob_store.resolve(task.get("results", {}).get(field))
+    
     def save_task_git_info(self, task_id: str, branch: str, pr_url: Optional[str] = None, pr_number: Optional[int] = None) -> None:
         """Save git and PR information"""
         updates = {
@@ -176,76 +361,41 @@ class StateManager:
     
     def list_tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
         """List all tasks, optionally filtered by status"""
-        tasks_data = load_json(self.tasks_file)
-        
-        if not tasks_data:
-            return []
-        
-        tasks = list(tasks_data.get("tasks", {}).values())
-        
-        if status:
-            tasks = [task for task in tasks if task.get("status") == status]
-        
-        # Sort by created_at (newest first)
-        tasks.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        
-        return tasks
+        return self.store.list(status)
+    
+    def get_task_id_for_issue(self, repository: str, issue_number: int) -> Optional[str]:
+        """Get the newest task ID created for an issue"""
+        return self.store.find_by_issue(repository, issue_number)
+    
+    def get_task_id_for_pr(self, repository: str, pr_number: int) -> Optional[str]:
+        """Get the task ID that opened a pull request"""
+        return self.store.find_by_pr(repository, pr_number)
+    
+    def list_task_ids_for_repository(self, repository: str) -> List[str]:
+        """Get all task IDs for a repository"""
+        return self.store.find_by_repository(repository)
     
     def get_task_summary(self) -> Dict[str, Any]:
         """Get summary of all tasks"""
-        tasks = self.list_tasks()
-        
-        status_counts = {}
-        for task in tasks:
-            status = task.get("status", "unknown")
-            status_counts[status] = status_counts.get(status, 0) + 1
+        status_counts = self.store.count_by_status()
         
         return {
-            "total_tasks": len(tasks),
+            "total_tasks": sum(status_counts.values()),
             "status_counts": status_counts,
-            "recent_tasks": tasks[:5]  # Last 5 tasks
+            "recent_tasks": self.store.list(limit=5)  # Last 5 tasks
         }
     
     def _save_task(self, task: Dict[str, Any]) -> None:
-        """Save a single task to the JSON file"""
-        tasks_data = load_json(self.tasks_file)
-        
-        if not tasks_data:
-            tasks_data = {"tasks": {}, "metadata": {"created_at": current_timestamp()}}
-        
-        tasks_data["tasks"][task["id"]] = task
-        tasks_data["metadata"]["updated_at"] = current_timestamp()
-        
-        save_json(tasks_data, self.tasks_file)
+        """Save a single task to the store"""
+        self.store.put(task)
     
     def cleanup_old_tasks(self, days: int = 30) -> int:
         """Clean up old completed tasks"""
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         
         cutoff_date = datetime.now() - timedelta(days=days)
-        tasks_data = load_json(self.tasks_file)
+        removed_count = self.store.delete_completed_before(cutoff_date)
         
-        if not tasks_data:
-            return 0
-        
-        tasks = tasks_data.get("tasks", {})
-        original_count = len(tasks)
-        
-        # Remove old completed tasks
-        to_remove = []
-        for task_id, task in tasks.items():
-            if task.get("status") == "completed":
-                created_at = datetime.fromisoformat(task.get("created_at", ""))
-                if created_at < cutoff_date:
-                    to_remove.append(task_id)
-        
-        for task_id in to_remove:
-            del tasks[task_id]
-        
-        # Save updated data
-        save_json(tasks_data, self.tasks_file)
-        
-        removed_count = len(to_remove)
         if removed_count > 0:
             logger.info(f"Cleaned up {removed_count} old tasks")
         
@@ -253,7 +403,7 @@ class StateManager:
     
     def export_tasks(self, output_file: Path) -> None:
         """Export tasks to a file"""
-        tasks_data = load_json(self.tasks_file)
+        tasks_data = self.store.export()
         
         if tasks_data:
             save_json(tasks_data, output_file)
@@ -272,4 +422,16 @@ class StateManager:
         config["updated_at"] = current_timestamp()
         
         save_json(config, self.config_file)
-        logger.info("Updated configuration")
\ No newline at end of file
+        logger.info("Updated configuration")
+    
+    def flush(self) -> None:
+        """Persist any buffered task writes"""
+        self.store.flush()
+    
+    def close(self) -> None:
+        """Release storage resources"""
+        if self.write_behind:
+            # The cache is shared by the whole process, only persist it here
+            self.store.flush()
+        else:
+            self.store.close()
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""Write-behind task cache"""
+
+import atexit
+import copy
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+
+from src.services.task_store import TaskStore, TaskIndex
+
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindTaskStore(TaskStore):
+    """
+    In-memory task cache in front of another TaskStore
+    Reads are served from memory, writes mark tasks dirty and are flushed
+    to the backend in batches on a timer or when the dirty count reaches
+    flush_threshold.
+    """
+    
+    def __init__(self, backend: TaskStore, flush_interval: float = 2.0, flush_threshold: int = 50):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._tasks: Dict[str, Dict[str, Any]] = {task["id"]: task for task in backend.list()}
+        self._dirty: set = set()
+        self._index = TaskIndex.build(list(self._tasks.values()))
+        
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="task-cache-flusher", daemon=True)
+        self._flusher.start()
+        
+        logger.info(f"Task cache loaded {len(self._tasks)} tasks")
+    
+    def _flush_loop(self) -> None:
+        """Flush dirty tasks on the timer or when woken by the threshold"""
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Task cache flush failed: {e}")
+    
+    def _mark_dirty(self, task_id: str) -> None:
+        """Mark a task dirty and wake the flusher at the threshold (caller holds the lock)"""
+        self._dirty.add(task_id)
+        
+        if len(self._dirty) >= self.flush_threshold:
+            self._wakeup.set()
+    
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a cached task"""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return copy.deepcopy(task) if task is not None else None
+    
+    def put(self, task: Dict[str, Any]) -> None:
+        """Cache a task and mark it dirty"""
+        with self._lock:
+            task = copy.deepcopy(task)
+            self._index.replace(self._tasks.get(task["id"]), task)
+            self._tasks[task["id"]] = task
+            self._mark_dirty(task["id"])
+    
+    def update(self, task_id: str, mutator: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """Mutate a cached task in place and mark it dirty"""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            
+            self._index.remove(task)
+            mutator(task)
+            self._index.add(task)
+            self._mark_dirty(task_id)
+            return copy.deepcopy(task)
+    
+    def list(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List cached tasks newest first, optionally filtered by status"""
+        with self._lock:
+            tasks = [task for task in self._tasks.values() if not status or task.get("status") == status]
+            tasks.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+            
+            if limit is not None:
+                tasks = tasks[:limit]
+            
+            return copy.deepcopy(tasks)
+    
+    def count_by_status(self) -> Dict[str, int]:
+        """Count cached tasks per status"""
+        status_counts = {}
+        with self._lock:
+            for task in self._tasks.values():
+                status = task.get("status", "unknown")
+                status_counts[status] = status_counts.get(status, 0) + 1
+        
+        return status_counts
+    
+    def delete_completed_before(self, cutoff: datetime) -> int:
+        """Flush, delete in the backend, then drop the same tasks from memory"""
+        self.flush()
+        removed_count = self.backend.delete_completed_before(cutoff)
+        
+        with self._lock:
+            for task_id, task in list(self._tasks.items()):
+                if task.get("status") == "completed" and task.get("created_at", "") < cutoff.isoformat():
+                    self._index.remove(self._tasks.pop(task_id))
+                    self._dirty.discard(task_id)
+        
+        return removed_count
+    
+    def find_by_issue(self, repository: str, issue_number: int) -> Optional[str]:
+        """Get the newest cached task ID for an issue"""
+        with self._lock:
+            return self._index.find_by_issue(repository, issue_number)
+    
+    def find_by_pr(self, repository: str, pr_number: int) -> Optional[str]:
+        """Get the cached task ID that opened a pull request"""
+        with self._lock:
+            return self._index.find_by_pr(repository, pr_number)
+    
+    def find_by_repository(self, repository: str) -> List[str]:
+        """Get all cached task IDs for a repository"""
+        with self._lock:
+            return self._index.find_by_repository(repository)
+    
+    def export(self) -> Optional[Dict[str, Any]]:
+        """Flush and export from the backend"""
+        self.flush()
+        return self.backend.export()
+    
+    def flush(self) -> None:
+        """Write all dirty tasks to the backend in one batch"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                
+                dirty_ids = self._dirty
+                self._dirty = set()
+                batch = [copy.deepcopy(self._tasks[task_id]) for task_id in dirty_ids if task_id in self._tasks]
+            
+            try:
+                self.backend.put_many(batch)
+            except Exception:
+                # Keep the tasks dirty so the next flush retries them
+                with self._lock:
+                    self._dirty |= dirty_ids
+                raise
+        
+        logger.debug(f"Flushed {len(batch)} tasks to backend")
+    
+    def close(self) -> None:
+        """Stop the flusher thread and persist everything"""
+        self._stop.set()
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        self.backend.close()
+
+
+# Process-wide caches, one per tasks location, so every StateManager in the
+# process (webhook server, queue workers) shares the same in-memory state.
+_shared_caches: Dict[Path, WriteBehindTaskStore] = {}
+_shared_caches_lock = threading.Lock()
+
+
+def get_shared_cache(key: Path, backend_factory: Callable[[], TaskStore],
+                     flush_interval: float, flush_threshold: int) -> WriteBehindTaskStore:
+    """Get or create the shared write-behind cache for a tasks location"""
+    with _shared_caches_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = WriteBehindTaskStore(backend_factory(), flush_interval, flush_threshold)
+            _shared_caches[key] = cache
+        return cache
+
+
+def flush_shared_caches() -> None:
+    """Flush every shared cache"""
+    with _shared_caches_lock:
+        caches = list(_shared_caches.values())
+    
+    for cache in caches:
+        try:
+            cache.flush()
+        except Exception as e:
+            logger.error(f"Task cache flush failed: {e}")
+
+
+def close_shared_caches() -> None:
+    """Flush and close every shared cache"""
+    with _shared_caches_lock:
+        caches = list(_shared_caches.values())
+        _shared_caches.clear()
+    
+    for cache in caches:
+        try:
+            cache.close()
+        except Exception as e:
+            logger.error(f"Failed to close task cache: {e}")
+
+
+atexit.register(close_shared_caches)
@@ -0,0 +1,37 @@
+"""Expected run times of distributed tasks"""
+
+from collections import deque
+from statistics import median
+from typing import Dict, FrozenSet, Optional, Sequence, Tuple
+
+
+class TaskDurations:
+    """
+    Recent durations of completed tasks by priority and requirements
+    
+    Each priority and requirement set keeps its last window durations.
+    A task is expected to take the median of its own group once that has
+    min_samples entries, otherwise the median of all tasks with its
+    priority, so a new requirement set borrows from its priority until it
+    has a history of its own. Without enough samples nothing is expected.
+    The median is not pulled up by the stragglers it is used to detect.
+    """
+    
+    def __init__(self, window: int = 50, min_samples: int = 5):
+        self.window = window
+        self.min_samples = min_samples
+        self._groups: Dict[Tuple[str, FrozenSet[str]], deque] = {}
+        self._priorities: Dict[str, deque] = {}
+    
+    def record(self, priority: str, requirements: Sequence[str], seconds: float) -> None:
+        """Add the run time of a completed task"""
+        key = (priority, frozenset(requirements))
+        self._groups.setdefault(key, deque(maxlen=self.window)).append(seconds)
+        self._priorities.setdefault(priority, deque(maxlen=self.window)).append(seconds)
+    
+    def expected(self, priority: str, requirements: Sequence[str]) -> Optional[float]:
+        """Expected run time in seconds, None while there is too little history"""
+        for samples in (self._groups.get((priority, frozenset(requirements))), self._priorities.get(priority)):
+            if samples and len(samples) >= self.min_samples:
+                return median(samples)
+        return None
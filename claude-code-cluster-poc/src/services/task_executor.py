@@ -0,0 +1,81 @@
+"""Execution pools for blocking agent work"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Optional
+
+from src.services.agent_pool import get_agent_pool
+
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_worker(count: int = 1) -> None:
+    """Build pooled agents before the first task arrives"""
+    try:
+        get_agent_pool().warm(count)
+    except Exception as e:
+        # Retried lazily by the first task, which then reports the error
+        logger.error(f"Failed to initialize agent in pool worker: {e}")
+
+
+def _run_task(task_id: str) -> Dict[str, Any]:
+    """Run a task on an agent borrowed from the process-wide pool"""
+    return get_agent_pool().run(lambda agent: agent.run_task(task_id))
+
+
+class TaskExecutor:
+    """
+    Runs ClaudeAgent.run_task off the event loop
+    
+    "thread" mode uses a thread pool, which suits the I/O-bound work (git,
+    GitHub and Anthropic API calls). "process" mode uses a spawned process
+    pool for full isolation; each process keeps its own agent pool, so the
+    task state backend must be shared on disk (write-through, Settings
+    rejects write-behind with process mode). Thread mode
+    borrows from the process-wide AgentPool shared with the agent node.
+    """
+    
+    def __init__(self, mode: str = "thread", max_workers: int = 3):
+        self.mode = mode
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+    
+    def start(self) -> None:
+        """Create the worker pool"""
+        if self._pool is not None:
+            return
+        
+        if self.mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="task-executor"
+            )
+            self._pool.submit(_warm_worker, self.max_workers)
+        
+        logger.info(f"Started {self.mode} executor with {self.max_workers} workers")
+    
+    async def run_task(self, task_id: str) -> Dict[str, Any]:
+        """Run a task on the pool without blocking the event loop"""
+        if self._pool is None:
+            self.start()
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, _run_task, task_id)
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool, letting running tasks finish if wait is set"""
+        if self._pool is None:
+            return
+        
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._pool = None
+        logger.info(f"Stopped {self.mode} executor")
@@ -0,0 +1,77 @@
+"""Status index over the coordinator's tasks"""
+
+import heapq
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+class TaskStatusIndex:
+    """
+    Tasks by status, kept current on every status change
+    
+    The coordinator keeps every task it was ever given, so scanning the
+    task table gets slower as history grows. Scheduling, leasing and
+    status counts only care about tasks in one state, and read them from
+    here instead. Pending tasks are also grouped by priority rank, so a
+    lease only looks at the most urgent pending tasks, and a heap of
+    (created_at, task_id) gives the oldest pending task for admission
+    control; entries of tasks that left pending are dropped lazily. Every
+    status change must go through set_status().
+    """
+    
+    def __init__(self, pending_status, rank: Callable[[str], int]):
+        self.pending_status = pending_status
+        self.rank = rank  # priority -> scheduling rank, lower is more urgent
+        self._by_status: Dict[object, Dict[str, object]] = {}
+        self._pending_by_rank: Dict[int, Dict[str, object]] = {}
+        self._pending_ages: List[tuple] = []  # (created_at, task_id), stale once the task leaves pending
+    
+    def add(self, task) -> None:
+        """Index a task under its current status"""
+        self._by_status.setdefault(task.status, {})[task.task_id] = task
+        if task.status == self.pending_status:
+            self._pending_by_rank.setdefault(self.rank(task.priority), {})[task.task_id] = task
+            heapq.heappush(self._pending_ages, (task.created_at, task.task_id))
+            self._maybe_compact()
+    
+    def _remove(self, task) -> None:
+        self._by_status.get(task.status, {}).pop(task.task_id, None)
+        if task.status == self.pending_status:
+            group = self._pending_by_rank.get(self.rank(task.priority))
+            if group is not None:
+                group.pop(task.task_id, None)
+                if not group:
+                    del self._pending_by_rank[self.rank(task.priority)]
+    
+    def set_status(self, task, status) -> None:
+        """Change a task's status and re-index it"""
+        self._remove(task)
+        task.status = status
+        self.add(task)
+    
+    def tasks(self, status) -> List:
+        """Tasks currently in a status"""
+        return list(self._by_status.get(status, {}).values())
+    
+    def count(self, status) -> int:
+        """Number of tasks in a status"""
+        return len(self._by_status.get(status, {}))
+    
+    def oldest_pending(self) -> Optional[datetime]:
+        """Creation time of the oldest pending task, None if nothing is pending"""
+        pending = self._by_status.get(self.pending_status, {})
+        while self._pending_ages and self._pending_ages[0][1] not in pending:
+            heapq.heappop(self._pending_ages)
+        return self._pending_ages[0][0] if self._pending_ages else None
+    
+    def _maybe_compact(self) -> None:
+        """Rebuild the age heap once stale entries dominate it"""
+        pending = self._by_status.get(self.pending_status, {})
+        if len(self._pending_ages) > 2 * len(pending) + 128:
+            self._pending_ages = [(task.created_at, task_id) for task_id, task in pending.items()]
+            heapq.heapify(self._pending_ages)
+    
+    def pending_by_rank(self) -> Iterator[Iterable]:
+        """Pending tasks one priority rank at a time, most urgent first"""
+        for rank in sorted(self._pending_by_rank):
+            yield self._pending_by_rank[rank].values()
@@ -1,15 +1,24 @@
 """Task queue system for async processing"""
 
 import asyncio
+import heapq
+import itertools
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Callable
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, asdict
 from enum import Enum
 
 from src.core.config import get_settings
+from src.services.autoscaler import WorkerAutoscaler, QueueLoad
+from src.services.dead_letter import DeadLetterStore
+from src.services.fair_queue import FairQueue, UNKNOWN_REPOSITORY
+from src.services.journal import JournaledMap
+from src.services.queue_metrics import QueueMetrics
+from src.services.retry_policy import RetryScheduler, classify_error
+from src.services.task_executor import TaskExecutor
 from src.utils.logging import get_logger
 
 
@@ -23,6 +32,17 @@ class TaskPriority(Enum):
     URGENT = "urgent"
 
 
+# Failures kept per task in QueuedTask.history
+MAX_ERROR_HISTORY = 20
+
+PRIORITY_ORDER = {
+    TaskPriority.URGENT: 0,
+    TaskPriority.HIGH: 1,
+    TaskPriority.MEDIUM: 2,
+    TaskPriority.LOW: 3
+}
+
+
 @dataclass
 class QueuedTask:
     """Queued task representation"""
@@ -33,6 +53,30 @@ class QueuedTask:
     max_attempts: int = 3
     next_retry: Optional[datetime] = None
     error: Optional[str] = None
+    error_class: Optional[str] = None
+    repository: Optional[str] = None
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    enqueued_at: Optional[datetime] = None
+    dequeued_at: Optional[datetime] = None
+    
+    def ready_at(self) -> datetime:
+        """When the task became ready to run: enqueued, or its retry fell due"""
+        return max(self.enqueued_at or self.created_at, self.next_retry or self.created_at)
+    
+    def wait_seconds(self, now: Optional[datetime] = None) -> float:
+        """Time from becoming ready (enqueued or retry due) until dequeue or now"""
+        end = self.dequeued_at or now or datetime.now()
+        return max(0.0, (end - self.ready_at()).total_seconds())
+    
+    def record_failure(self, error: str, error_class: str) -> None:
+        """Append a failure to the error history"""
+        self.history.append({
+            "attempt": self.attempts,
+            "error": error,
+            "error_class": error_class,
+            "failed_at": datetime.now().isoformat()
+        })
+        del self.history[:-MAX_ERROR_HISTORY]
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
@@ -43,7 +87,11 @@ class QueuedTask:
             "attempts": self.attempts,
             "max_attempts": self.max_attempts,
             "next_retry": self.next_retry.isoformat() if self.next_retry else None,
-            "error": self.error
+            "error": self.error,
+            "error_class": self.error_class,
+            "repository": self.repository,
+            "history": self.history,
+            "enqueued_at": self.enqueued_at.isoformat() if self.enqueued_at else None
         }
     
     @classmethod
@@ -56,42 +104,299 @@ class QueuedTask:
             attempts=data["attempts"],
             max_attempts=data["max_attempts"],
             next_retry=datetime.fromisoformat(data["next_retry"]) if data["next_retry"] else None,
-            error=data.get("error")
+            error=data.get("error"),
+            error_class=data.get("error_class"),
+            repository=data.get("repository"),
+            history=data.get("history", []),
+            enqueued_at=datetime.fromisoformat(data["enqueued_at"]) if data.get("enqueued_at") else None
         )
 
 
 class TaskQueue:
-    """Asynchronous task queue"""
+    """
+    Asynchronous task queue
+    
+    Queued tasks are kept in a dict keyed by task ID (duplicate detection)
+    and referenced from per-repository ready heaps ordered by
+    (priority, created_at), served fairly across repositories by
+    FairQueue, and a delayed heap ordered by next_retry. Ready tasks are
+    also kept in per-repository heaps ordered by the time they became ready,
+    which give the autoscaler the longest wait without scanning the queue.
+    Heap entries are invalidated lazily: an entry is live only while its
+    sequence number matches the one recorded for its task. Tasks that have
+    exhausted their attempts move to the dead-letter store.
+    """
     
     def __init__(self):
         self.settings = get_settings()
         self.queue_file = self.settings.data_path / "task_queue.json"
-        self.queue: List[QueuedTask] = []
+        self.queue: Dict[str, QueuedTask] = {}
+        self.fair_queue = FairQueue.from_settings(self.settings)  # (priority, created_at, seq, task_id) per repository
+        self._delayed: List[tuple] = []  # (next_retry, seq, task_id)
+        self._entries: Dict[str, int] = {}  # task_id -> seq of its live heap entry
+        
+        # Counts kept up to date on every push and removal, so status never scans the queue
+        self._queued_by_repository: Dict[str, int] = {}
+        self._ready_by_repository: Dict[str, int] = {}
+        self._ready_ages: Dict[str, List[tuple]] = {}  # (ready_at, seq, task_id) per repository
+        self._retry_waiting: set = set()
+        self._counter = itertools.count()
         self.workers: List[asyncio.Task] = []
         self.running = False
-        self.worker_count = 3
         self.processing_tasks: Dict[str, asyncio.Task] = {}
         
+        # Workers scale between queue_min_workers and queue_max_workers
+        self.autoscaler = WorkerAutoscaler(
+            self.settings.queue_min_workers,
+            self.settings.queue_max_workers,
+            target_wait=self.settings.queue_target_wait
+        )
+        self.worker_count = max(self.autoscaler.min_workers,
+                                min(self.autoscaler.max_workers, self.settings.queue_workers))
+        self._autoscaler_task: Optional[asyncio.Task] = None
+        self._retire_requests = 0
+        self._worker_ids = itertools.count()
+        
+        # Rolling counters and histograms, the service time histogram also feeds the autoscaler
+        self.metrics = QueueMetrics(self.settings.queue_metrics_window)
+        
+        # Blocking agent work runs on a pool so the event loop stays responsive
+        self.executor = TaskExecutor(self.settings.queue_executor, self.autoscaler.max_workers)
+        
+        # Idle workers wait here until a task is queued or a retry falls due
+        self._work_available = asyncio.Condition()
+        
+        # Journaled persistence appends one record per mutation
+        self.journal: Optional[JournaledMap] = None
+        dead_letter_journal: Optional[JournaledMap] = None
+        if self.settings.queue_persistence == "journal":
+            self.journal = self._create_journal("task_queue")
+            dead_letter_journal = self._create_journal("dead_letter")
+        
+        # Failed tasks are retried with backoff, then moved to the dead-letter store
+        self.retry_scheduler = RetryScheduler.from_settings(self.settings)
+        self.dead_letters = DeadLetterStore(self.settings.data_path / "dead_letter.json", dead_letter_journal)
+        
         # Load existing queue
         self._load_queue()
     
+    def _create_journal(self, name: str) -> JournaledMap:
+        """Create a journal under data_path with the journal_* settings"""
+        return JournaledMap(
+            self.settings.data_path / name,
+            compact_threshold=self.settings.journal_compact_threshold,
+            compact_interval=self.settings.journal_compact_interval,
+            fsync=self.settings.journal_fsync,
+            archive=self.settings.journal_archive
+        )
+    
     def _load_queue(self):
         """Load queue from file"""
+        if self.journal is not None:
+            self._load_queue_journal()
+            return
+        
         if self.queue_file.exists():
             try:
                 with open(self.queue_file, 'r') as f:
                     data = json.load(f)
-                    self.queue = [QueuedTask.from_dict(item) for item in data.get("queue", [])]
+                self._restore(data.get("queue", []))
                 logger.info(f"Loaded {len(self.queue)} tasks from queue file")
             except Exception as e:
                 logger.error(f"Failed to load queue: {e}")
-                self.queue = []
+                self._reset()
+    
+    def _load_queue_journal(self):
+        """Load queue from the journal, importing task_queue.json on first use"""
+        if self.journal.created and self.queue_file.exists():
+            try:
+                with open(self.queue_file, 'r') as f:
+                    data = json.load(f)
+                self.journal.put_many([(item["task_id"], item) for item in data.get("queue", [])])
+            except Exception as e:
+                logger.error(f"Failed to import queue file into journal: {e}")
+        
+        self._restore(self.journal.values())
+        logger.info(f"Loaded {len(self.queue)} tasks from queue journal")
+    
+    def _restore(self, items: List[Dict[str, Any]]) -> None:
+        """Rebuild the heaps from persisted tasks, dead-lettering exhausted ones"""
+        exhausted = []
+        for item in items:
+            task = QueuedTask.from_dict(item)
+            if task.attempts >= self.retry_scheduler.max_attempts(task.error_class, task.max_attempts):
+                exhausted.append(task)
+            else:
+                self._push(task)
+        
+        # Queues written before the dead-letter store kept exhausted tasks inline
+        for task in exhausted:
+            self.dead_letters.add(task.to_dict())
+            self._persist_removal(task.task_id)
+    
+    def _persist_task(self, task: QueuedTask) -> None:
+        """Persist a single queued task"""
+        if self.journal is not None:
+            self.journal.put(task.task_id, task.to_dict())
+        else:
+            self._save_queue()
+    
+    def _persist_removal(self, task_id: str) -> None:
+        """Persist removal of a task from the queue"""
+        if self.journal is not None:
+            self.journal.delete(task_id)
+        else:
+            self._save_queue()
+    
+    def _reset(self) -> None:
+        """Drop all queued tasks and heap entries"""
+        self.queue = {}
+        self.fair_queue.clear()
+        self._delayed = []
+        self._entries = {}
+        self._queued_by_repository = {}
+        self._ready_by_repository = {}
+        self._ready_ages = {}
+        self._retry_waiting = set()
+    
+    def _push(self, task: QueuedTask) -> None:
+        """Add or replace a task and schedule it on the ready or delayed heap"""
+        replaced = self.queue.get(task.task_id)
+        if replaced is not None:
+            self._untrack(replaced)
+        
+        self.queue[task.task_id] = task
+        repository = self._repository_key(task)
+        self._queued_by_repository[repository] = self._queued_by_repository.get(repository, 0) + 1
+        
+        seq = next(self._counter)
+        self._entries[task.task_id] = seq
+        
+        if task.next_retry and task.next_retry > datetime.now():
+            heapq.heappush(self._delayed, (task.next_retry, seq, task.task_id))
+            self._retry_waiting.add(task.task_id)
+        else:
+            self._push_ready(task, seq)
+    
+    def _untrack(self, task: QueuedTask) -> None:
+        """Update the status counts for a task leaving the queue"""
+        repository = self._repository_key(task)
+        self._queued_by_repository[repository] -= 1
+        if self._queued_by_repository[repository] <= 0:
+            del self._queued_by_repository[repository]
+        
+        if task.task_id in self._retry_waiting:
+            self._retry_waiting.discard(task.task_id)
+        else:
+            self._ready_by_repository[repository] -= 1
+            if self._ready_by_repository[repository] <= 0:
+                del self._ready_by_repository[repository]
+    
+    def _push_ready(self, task: QueuedTask, seq: int) -> None:
+        """Add a ready heap entry under the task's repository"""
+        repository = self._repository_key(task)
+        self.fair_queue.push(repository, (PRIORITY_ORDER[task.priority], task.created_at, seq, task.task_id))
+        self._ready_by_repository[repository] = self._ready_by_repository.get(repository, 0) + 1
+        heapq.heappush(self._ready_ages.setdefault(repository, []), (task.ready_at(), seq, task.task_id))
+    
+    @staticmethod
+    def _repository_key(task: QueuedTask) -> str:
+        """Repository a task is scheduled under"""
+        return task.repository or UNKNOWN_REPOSITORY
+    
+    def _is_live(self, entry: tuple) -> bool:
+        """Check whether a ready heap entry still refers to its task"""
+        return self._entries.get(entry[3]) == entry[2]
+    
+    def _discard(self, task_id: str) -> Optional[QueuedTask]:
+        """Remove a task, leaving its heap entry to be skipped lazily"""
+        self._entries.pop(task_id, None)
+        task = self.queue.pop(task_id, None)
+        if task is not None:
+            self._untrack(task)
+        self._maybe_compact_heaps()
+        return task
+    
+    def _maybe_compact_heaps(self) -> None:
+        """Rebuild the heaps once stale entries dominate them"""
+        ages = sum(len(heap) for heap in self._ready_ages.values())
+        if len(self.fair_queue) + len(self._delayed) + ages <= 3 * len(self._entries) + 64:
+            return
+        
+        self.fair_queue.compact(self._is_live)
+        self._delayed = [entry for entry in self._delayed if self._entries.get(entry[2]) == entry[1]]
+        heapq.heapify(self._delayed)
+        
+        for repository, heap in list(self._ready_ages.items()):
+            heap[:] = [entry for entry in heap if self._entries.get(entry[2]) == entry[1]]
+            if heap:
+                heapq.heapify(heap)
+            else:
+                del self._ready_ages[repository]
+    
+    def _oldest_ready(self, repository: str) -> Optional[datetime]:
+        """When the longest waiting ready task of a repository became ready"""
+        heap = self._ready_ages.get(repository)
+        while heap and self._entries.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+        
+        if not heap:
+            self._ready_ages.pop(repository, None)
+            return None
+        return heap[0][0]
+    
+    def _promote_due_retries(self, now: datetime) -> None:
+        """Move tasks whose retry time has passed onto the ready heap"""
+        while self._delayed and self._delayed[0][0] <= now:
+            _, seq, task_id = heapq.heappop(self._delayed)
+            if self._entries.get(task_id) != seq:
+                continue
+            
+            self._retry_waiting.discard(task_id)
+            self._push_ready(self.queue[task_id], seq)
+    
+    def _next_retry_delay(self) -> Optional[float]:
+        """Seconds until the earliest scheduled retry, None if there is none"""
+        while self._delayed and self._entries.get(self._delayed[0][2]) != self._delayed[0][1]:
+            heapq.heappop(self._delayed)
+        
+        if not self._delayed:
+            return None
+        
+        return max(0.0, (self._delayed[0][0] - datetime.now()).total_seconds())
+    
+    async def _notify_workers(self, count: int = 1) -> None:
+        """Wake idle workers after the queue changed"""
+        async with self._work_available:
+            self._work_available.notify(count)
+    
+    async def _wait_for_task(self) -> Optional[QueuedTask]:
+        """
+        Block until a task can be dequeued, waking exactly when the next retry falls due
+        Returns None when the queue stops or the worker is retired by the autoscaler.
+        """
+        async with self._work_available:
+            task = await self.get_next_task()
+            
+            while task is None and self.running:
+                if self._retire_requests > 0:
+                    # The autoscaler asked an idle worker to exit
+                    self._retire_requests -= 1
+                    return None
+                
+                try:
+                    await asyncio.wait_for(self._work_available.wait(), self._next_retry_delay())
+                except asyncio.TimeoutError:
+                    pass
+                task = await self.get_next_task()
+            
+            return task
     
     def _save_queue(self):
         """Save queue to file"""
         try:
             data = {
-                "queue": [task.to_dict() for task in self.queue],
+                "queue": [task.to_dict() for task in self.queue.values()],
                 "updated_at": datetime.now().isoformat()
             }
             with open(self.queue_file, 'w') as f:
@@ -99,7 +404,7 @@ class TaskQueue:
         except Exception as e:
             logger.error(f"Failed to save queue: {e}")
     
-    async def add_task(self, task_id: str, priority: str = "medium") -> None:
+    async def add_task(self, task_id: str, priority: str = "medium", repository: Optional[str] = None) -> None:
         """Add task to queue"""
         try:
             priority_enum = TaskPriority(priority)
@@ -107,54 +412,50 @@ class TaskQueue:
             priority_enum = TaskPriority.MEDIUM
         
         # Check if task already exists
-        if any(task.task_id == task_id for task in self.queue):
+        if task_id in self.queue:
             logger.warning(f"Task {task_id} already in queue")
             return
         
         queued_task = QueuedTask(
             task_id=task_id,
             priority=priority_enum,
-            created_at=datetime.now()
+            created_at=datetime.now(),
+            max_attempts=self.settings.retry_max_attempts,
+            repository=repository
         )
+        queued_task.enqueued_at = queued_task.created_at
         
-        self.queue.append(queued_task)
-        self._sort_queue()
-        self._save_queue()
+        self._push(queued_task)
+        self._persist_task(queued_task)
+        self.metrics.task_enqueued()
+        await self._notify_workers()
         
         logger.info(f"Added task {task_id} to queue with priority {priority}")
     
-    def _sort_queue(self):
-        """Sort queue by priority and creation time"""
-        priority_order = {
-            TaskPriority.URGENT: 0,
-            TaskPriority.HIGH: 1,
-            TaskPriority.MEDIUM: 2,
-            TaskPriority.LOW: 3
-        }
-        
-        self.queue.sort(key=lambda x: (priority_order[x.priority], x.created_at))
-    
     async def get_next_task(self) -> Optional[QueuedTask]:
-        """Get next task from queue"""
+        """
+        Get next task from queue
+        The dequeued task holds a slot of its repository's concurrency cap
+        until it is marked completed or failed.
+        """
         now = datetime.now()
+        self._promote_due_retries(now)
         
-        for i, task in enumerate(self.queue):
-            # Skip if task is being processed
-            if task.task_id in self.processing_tasks:
-                continue
-            
-            # Skip if task is in retry cooldown
-            if task.next_retry and now < task.next_retry:
-                continue
-            
-            # Skip if task has exceeded max attempts
-            if task.attempts >= task.max_attempts:
-                continue
-            
-            # Remove from queue and return
-            return self.queue.pop(i)
+        # Stale entries are dropped, tasks still being processed stay queued
+        entry = self.fair_queue.pop(self._is_live, lambda entry: entry[3] in self.processing_tasks)
+        if entry is None:
+            return None
         
-        return None
+        # Remove from queue and return
+        task_id = entry[3]
+        del self._entries[task_id]
+        task = self.queue.pop(task_id)
+        self._untrack(task)
+        self.fair_queue.acquire(task_id, self._repository_key(task))
+        
+        task.dequeued_at = now
+        self.metrics.task_dequeued(task)
+        return task
     
     async def mark_task_completed(self, task_id: str) -> None:
         """Mark task as completed"""
@@ -162,29 +463,68 @@ class TaskQueue:
             self.processing_tasks[task_id].cancel()
             del self.processing_tasks[task_id]
         
-        self._save_queue()
+        self.fair_queue.release(task_id)
+        
+        # Keep the persisted entry if the task was queued again meanwhile
+        if task_id not in self.queue:
+            self._persist_removal(task_id)
+        await self._notify_workers()
         logger.info(f"Task {task_id} completed")
     
-    async def mark_task_failed(self, task_id: str, error: str) -> None:
-        """Mark task as failed and handle retry"""
+    async def mark_task_failed(self, task_id: str, error: str, error_class: Optional[str] = None,
+                               task: Optional[QueuedTask] = None) -> None:
+        """Mark task as failed and schedule a retry or dead-letter it"""
         if task_id in self.processing_tasks:
             del self.processing_tasks[task_id]
         
-        # Create failed task for retry
-        failed_task = QueuedTask(
-            task_id=task_id,
-            priority=TaskPriority.MEDIUM,
-            created_at=datetime.now(),
-            attempts=1,
-            error=error,
-            next_retry=datetime.now().replace(minute=datetime.now().minute + 5)  # Retry in 5 minutes
-        )
+        self.fair_queue.release(task_id)
+        
+        if task is None:
+            # Failure reported without the dequeued task, count it as a first attempt
+            task = QueuedTask(
+                task_id=task_id,
+                priority=TaskPriority.MEDIUM,
+                created_at=datetime.now(),
+                attempts=1,
+                max_attempts=self.settings.retry_max_attempts
+            )
         
-        self.queue.append(failed_task)
-        self._sort_queue()
-        self._save_queue()
+        # Attempts and priority are preserved, only the error and retry time change
+        task.error = error
+        task.error_class = error_class or classify_error(error)
+        task.record_failure(error, task.error_class)
+        max_attempts = self.retry_scheduler.max_attempts(task.error_class, task.max_attempts)
+        
+        if task.attempts >= max_attempts:
+            self._dead_letter(task)
+            logger.error(f"Task {task_id} failed permanently after {task.attempts} attempts "
+                         f"({task.error_class}): {error}")
+            return
         
-        logger.warning(f"Task {task_id} failed: {error}")
+        task.next_retry = self.retry_scheduler.next_retry(task.error_class, task.attempts)
+        task.enqueued_at = datetime.now()
+        task.dequeued_at = None
+        self._push(task)
+        self._persist_task(task)
+        self.metrics.task_retried()
+        
+        # A waiting worker recomputes its timeout for the new retry time
+        await self._notify_workers()
+        
+        logger.warning(f"Task {task_id} failed ({task.error_class}), attempt {task.attempts}/{max_attempts}, "
+                       f"retrying at {task.next_retry.isoformat()}: {error}")
+    
+    def _dead_letter(self, task: QueuedTask) -> None:
+        """Move a task out of the live queue into the dead-letter store"""
+        if self.queue.get(task.task_id) is task:
+            self._discard(task.task_id)
+        
+        self.dead_letters.add(task.to_dict())
+        self.metrics.task_dead_lettered()
+        
+        # Keep the persisted entry if the task was queued again meanwhile
+        if task.task_id not in self.queue:
+            self._persist_removal(task.task_id)
     
     async def start(self) -> None:
         """Start task queue processing"""
@@ -192,24 +532,33 @@ class TaskQueue:
             return
         
         self.running = True
+        self.executor.start()
         
         # Start worker tasks
-        for i in range(self.worker_count):
-            worker = asyncio.create_task(self._worker(f"worker-{i}"))
-            self.workers.append(worker)
+        self._retire_requests = 0
+        self._add_workers(self.worker_count)
+        
+        if self.autoscaler.enabled:
+            self._autoscaler_task = asyncio.create_task(self._autoscale_loop())
         
         logger.info(f"Started task queue with {self.worker_count} workers")
     
     async def stop(self) -> None:
         """Stop task queue processing"""
         self.running = False
+        await self._notify_workers(len(self.workers))
+        
+        if self._autoscaler_task is not None:
+            self._autoscaler_task.cancel()
+            await asyncio.gather(self._autoscaler_task, return_exceptions=True)
+            self._autoscaler_task = None
         
         # Cancel all workers
         for worker in self.workers:
             worker.cancel()
         
         # Wait for workers to finish
-        await asyncio.gather(*self.workers, return_exceptions=True)
+        await asyncio.gather(*list(self.workers), return_exceptions=True)
         
         # Cancel processing tasks
         for task in self.processing_tasks.values():
@@ -217,22 +566,85 @@ class TaskQueue:
         
         self.workers.clear()
         self.processing_tasks.clear()
+        self.fair_queue.release_all()
+        
+        # Let tasks already running on the pool finish without blocking the loop
+        await asyncio.to_thread(self.executor.shutdown)
         
         logger.info("Task queue stopped")
     
+    def _add_workers(self, count: int) -> None:
+        """Start count more worker coroutines"""
+        for _ in range(count):
+            worker = asyncio.create_task(self._worker(f"worker-{next(self._worker_ids)}"))
+            self.workers.append(worker)
+    
+    async def _scale_to(self, target: int) -> None:
+        """Grow or shrink the worker set; only idle workers are retired"""
+        active = len(self.workers) - self._retire_requests
+        
+        if target > active:
+            # Cancel pending retirements first, then start new workers
+            reuse = min(self._retire_requests, target - active)
+            self._retire_requests -= reuse
+            self._add_workers(target - active - reuse)
+        elif target < active:
+            self._retire_requests += active - target
+            await self._notify_workers(active - target)
+        else:
+            return
+        
+        self.worker_count = target
+        logger.info(f"Scaled task queue to {target} workers")
+    
+    def _queue_load(self) -> QueueLoad:
+        """Collect the load figures the autoscaler works from"""
+        now = datetime.now()
+        self._promote_due_retries(now)
+        ready = 0
+        oldest = None
+        
+        for repository, count in self._ready_by_repository.items():
+            # Tasks of a capped repository cannot use another worker
+            if self.fair_queue.at_limit(repository):
+                continue
+            ready += count
+            ready_at = self._oldest_ready(repository)
+            if ready_at is not None and (oldest is None or ready_at < oldest):
+                oldest = ready_at
+        
+        oldest_wait = max(0.0, (now - oldest).total_seconds()) if oldest else 0.0
+        return QueueLoad(
+            workers=len(self.workers) - self._retire_requests,
+            busy=len(self.processing_tasks),
+            ready=ready,
+            oldest_wait=oldest_wait,
+            mean_service_time=self.metrics.service_time.mean()
+        )
+    
+    async def _autoscale_loop(self) -> None:
+        """Periodically resize the worker set"""
+        while self.running:
+            await asyncio.sleep(self.settings.queue_autoscale_interval)
+            
+            try:
+                target = self.autoscaler.desired_workers(self._queue_load())
+                await self._scale_to(target)
+            except Exception as e:
+                logger.error(f"Autoscaler error: {e}")
+    
     async def _worker(self, worker_id: str) -> None:
         """Worker coroutine"""
         logger.info(f"Worker {worker_id} started")
         
         while self.running:
             try:
-                # Get next task
-                task = await self.get_next_task()
+                # Wait for the next task
+                task = await self._wait_for_task()
                 
                 if task is None:
-                    # No tasks available, wait a bit
-                    await asyncio.sleep(5)
-                    continue
+                    # Queue is stopping or this worker was retired
+                    break
                 
                 # Process task
                 logger.info(f"Worker {worker_id} processing task {task.task_id}")
@@ -243,9 +655,11 @@ class TaskQueue:
                 
                 try:
                     await process_task
+                    self.metrics.task_finished(task, succeeded=True)
                     await self.mark_task_completed(task.task_id)
                 except Exception as e:
-                    await self.mark_task_failed(task.task_id, str(e))
+                    self.metrics.task_finished(task, succeeded=False)
+                    await self.mark_task_failed(task.task_id, str(e), classify_error(e), task)
                 
             except asyncio.CancelledError:
                 break
@@ -253,21 +667,20 @@ class TaskQueue:
                 logger.error(f"Worker {worker_id} error: {e}")
                 await asyncio.sleep(10)
         
+        current = asyncio.current_task()
+        if current in self.workers:
+            self.workers.remove(current)
+        
         logger.info(f"Worker {worker_id} stopped")
     
     async def _process_task(self, task: QueuedTask) -> None:
         """Process a single task"""
-        from src.services.agent import ClaudeAgent
-        
         try:
-            # Create agent instance
-            agent = ClaudeAgent()
-            
             # Update task attempts
             task.attempts += 1
             
-            # Run the task
-            result = agent.run_task(task.task_id)
+            # Run the task on the executor pool
+            result = await self.executor.run_task(task.task_id)
             
             logger.info(f"Task {task.task_id} processed successfully")
             
@@ -275,19 +688,41 @@ class TaskQueue:
             logger.error(f"Task {task.task_id} processing failed: {e}")
             raise
     
-    async def get_status(self) -> Dict[str, Any]:
-        """Get queue status"""
-        now = datetime.now()
+    async def get_status(self, include_recent: bool = False) -> Dict[str, Any]:
+        """
+        Get queue status
+        Counts are maintained incrementally; include_recent adds the
+        timestamps of the most recently finished tasks to the metrics.
+        """
+        self._promote_due_retries(datetime.now())
         
         # Count tasks by status
-        pending_tasks = len([t for t in self.queue if t.task_id not in self.processing_tasks])
+        pending_tasks = len(self.queue) - sum(1 for t in self.processing_tasks if t in self.queue)
         processing_tasks = len(self.processing_tasks)
-        retry_tasks = len([t for t in self.queue if t.next_retry and t.next_retry > now])
-        failed_tasks = len([t for t in self.queue if t.attempts >= t.max_attempts])
+        retry_tasks = len(self._retry_waiting)
+        failed_tasks = len(self.dead_letters)
+        dead_letter_classes = self.dead_letters.count_by_error_class()
+        
+        # Queued and running tasks per repository with their fair-share settings
+        repositories = {}
+        for repository in sorted(set(self._queued_by_repository) | set(self.fair_queue.running_counts)):
+            repositories[repository] = {
+                "queued": self._queued_by_repository.get(repository, 0),
+                "running": self.fair_queue.running_counts.get(repository, 0),
+                "max_running": self.fair_queue.limit(repository) or None,
+                "weight": self.fair_queue.weight(repository)
+            }
         
         return {
             "running": self.running,
             "workers": len(self.workers),
+            "autoscaling": {
+                "enabled": self.autoscaler.enabled,
+                "min_workers": self.autoscaler.min_workers,
+                "max_workers": self.autoscaler.max_workers,
+                "target_workers": self.worker_count,
+                "mean_service_seconds": self.metrics.service_time.mean()
+            },
             "tasks": {
                 "pending": pending_tasks,
                 "processing": processing_tasks,
@@ -295,36 +730,79 @@ class TaskQueue:
                 "failed": failed_tasks,
                 "total": len(self.queue)
             },
+            "dead_letter": {
+                "total": failed_tasks,
+                "by_error_class": dead_letter_classes
+            },
+            "repositories": repositories,
+            "metrics": self.metrics.snapshot(include_recent),
             "queue_size": len(self.queue)
         }
     
     async def clear_failed_tasks(self) -> int:
-        """Clear failed tasks from queue"""
-        original_count = len(self.queue)
-        self.queue = [task for task in self.queue if task.attempts < task.max_attempts]
-        cleared_count = original_count - len(self.queue)
+        """Clear failed tasks from the dead-letter store"""
+        cleared_count = self.dead_letters.clear()
         
         if cleared_count > 0:
-            self._save_queue()
             logger.info(f"Cleared {cleared_count} failed tasks")
         
         return cleared_count
     
     async def retry_failed_tasks(self) -> int:
-        """Retry all failed tasks"""
-        now = datetime.now()
-        retried_count = 0
+        """Re-drive all dead-lettered tasks with a fresh attempt budget"""
+        return len(await self.redrive_dead_letters())
+    
+    def list_dead_letters(self, error_class: Optional[str] = None, repository: Optional[str] = None,
+                          offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """Page through dead-lettered tasks, newest first"""
+        entries = self.dead_letters.find(error_class, repository)
         
-        for task in self.queue:
-            if task.attempts >= task.max_attempts:
-                task.attempts = 0
-                task.next_retry = None
-                task.error = None
-                retried_count += 1
+        return {
+            "total": len(entries),
+            "offset": offset,
+            "limit": limit,
+            "items": entries[offset:offset + limit]
+        }
+    
+    async def redrive_dead_letters(self, task_ids: Optional[List[str]] = None, error_class: Optional[str] = None,
+                                   repository: Optional[str] = None, limit: Optional[int] = None,
+                                   spread_seconds: float = 0.0) -> List[str]:
+        """
+        Move dead-lettered tasks back into the queue with a fresh attempt budget
+        Tasks are selected by ID and/or filters (oldest first, up to limit).
+        spread_seconds staggers their first attempt so a large re-drive does
+        not hit GitHub and the Claude API all at once. Error history is kept.
+        """
+        if task_ids is not None:
+            selected = set(task_ids)
+            entries = [entry for entry in self.dead_letters.find(error_class, repository)
+                       if entry["task_id"] in selected]
+        else:
+            entries = self.dead_letters.find(error_class, repository)
         
-        if retried_count > 0:
-            self._sort_queue()
-            self._save_queue()
-            logger.info(f"Retried {retried_count} failed tasks")
+        entries.reverse()
+        if limit is not None:
+            entries = entries[:limit]
+        
+        retried = [QueuedTask.from_dict(item) for item in self.dead_letters.remove([e["task_id"] for e in entries])]
+        
+        now = datetime.now()
+        for i, task in enumerate(retried):
+            task.attempts = 0
+            task.error = None
+            task.error_class = None
+            task.next_retry = now + timedelta(seconds=spread_seconds * i / len(retried)) if spread_seconds > 0 else None
+            task.enqueued_at = now
+            task.dequeued_at = None
+            self._push(task)
+        self.metrics.task_enqueued(len(retried))
+        
+        if retried:
+            if self.journal is not None:
+                self.journal.put_many([(task.task_id, task.to_dict()) for task in retried])
+            else:
+                self._save_queue()
+            await self._notify_workers(len(retried))
+            logger.info(f"Re-drove {len(retried)} dead-lettered tasks")
         
-        return retried_count
\ No newline at end of file
+        return [task.task_id for task in retried]
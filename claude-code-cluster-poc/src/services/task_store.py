@@ -0,0 +1,198 @@
+"""Task storage backend interface"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Set
+
+
+class TaskStore(ABC):
+    """Base class for task storage backends used by StateManager"""
+    
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a task by ID, or None if it does not exist"""
+        pass
+    
+    @abstractmethod
+    def put(self, task: Dict[str, Any]) -> None:
+        """Insert or replace a task"""
+        pass
+    
+    def put_many(self, tasks: List[Dict[str, Any]]) -> None:
+        """Insert or replace several tasks in one batch"""
+        for task in tasks:
+            self.put(task)
+    
+    def update(self, task_id: str, mutator: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """
+        Apply mutator to a task and persist it
+        Returns the updated task, or None if the task does not exist
+        """
+        task = self.get(task_id)
+        if task is None:
+            return None
+        
+        mutator(task)
+        self.put(task)
+        return task
+    
+    @abstractmethod
+    def list(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List tasks newest first, optionally filtered by status"""
+        pass
+    
+    @abstractmethod
+    def count_by_status(self) -> Dict[str, int]:
+        """Count tasks per status"""
+        pass
+    
+    @abstractmethod
+    def delete_completed_before(self, cutoff: datetime) -> int:
+        """Delete completed tasks created before cutoff, returns removed count"""
+        pass
+    
+    @abstractmethod
+    def find_by_issue(self, repository: str, issue_number: int) -> Optional[str]:
+        """Get the newest task ID for an issue"""
+        pass
+    
+    @abstractmethod
+    def find_by_pr(self, repository: str, pr_number: int) -> Optional[str]:
+        """Get the task ID that opened a pull request"""
+        pass
+    
+    @abstractmethod
+    def find_by_repository(self, repository: str) -> List[str]:
+        """Get all task IDs for a repository"""
+        pass
+    
+    @abstractmethod
+    def export(self) -> Optional[Dict[str, Any]]:
+        """Get the full tasks document ({"tasks": ..., "metadata": ...})"""
+        pass
+    
+    def flush(self) -> None:
+        """Persist buffered writes (no-op for write-through backends)"""
+        pass
+    
+    def close(self) -> None:
+        """Release backend resources"""
+        pass
+
+
+class TaskIndex:
+    """
+    Secondary indexes over task records
+    (repository, issue_number) -> task_ids, (repository, pr_number) -> task_id
+    and repository -> task_ids. Every task of an issue is kept so its newest
+    one can be found again after another is removed. Keys are strings so the
+    index can be stored as JSON.
+    """
+    
+    VERSION = 2  # stored indexes of another version are rebuilt from the tasks
+    
+    def __init__(self):
+        self.issues: Dict[str, Dict[str, str]] = {}  # "repo#number" -> {task_id: created_at}
+        self.prs: Dict[str, str] = {}
+        self.repositories: Dict[str, Set[str]] = {}
+    
+    @staticmethod
+    def _keys(task: Dict[str, Any]) -> tuple:
+        """Extract (repository, issue key, PR key) from a task"""
+        issue = task.get("issue") or {}
+        results = task.get("results") or {}
+        repository = issue.get("repository")
+        
+        if not repository:
+            return None, None, None
+        
+        issue_key = f"{repository}#{issue['number']}" if issue.get("number") is not None else None
+        pr_key = f"{repository}#{results['pr_number']}" if results.get("pr_number") is not None else None
+        return repository, issue_key, pr_key
+    
+    def add(self, task: Dict[str, Any]) -> None:
+        """Index a task"""
+        repository, issue_key, pr_key = self._keys(task)
+        if not repository:
+            return
+        
+        task_id = task["id"]
+        created_at = task.get("created_at", "")
+        self.repositories.setdefault(repository, set()).add(task_id)
+        
+        if issue_key:
+            self.issues.setdefault(issue_key, {})[task_id] = created_at
+        
+        if pr_key:
+            self.prs[pr_key] = task_id
+    
+    def remove(self, task: Dict[str, Any]) -> None:
+        """Drop index entries that point at a task"""
+        repository, issue_key, pr_key = self._keys(task)
+        if not repository:
+            return
+        
+        task_id = task["id"]
+        task_ids = self.repositories.get(repository)
+        if task_ids is not None:
+            task_ids.discard(task_id)
+            if not task_ids:
+                del self.repositories[repository]
+        
+        task_ids = self.issues.get(issue_key) if issue_key else None
+        if task_ids is not None:
+            task_ids.pop(task_id, None)
+            if not task_ids:
+                del self.issues[issue_key]
+        
+        if pr_key and self.prs.get(pr_key) == task_id:
+            del self.prs[pr_key]
+    
+    def replace(self, old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> None:
+        """Re-index a task after it changed"""
+        if old is not None:
+            self.remove(old)
+        self.add(new)
+    
+    def find_by_issue(self, repository: str, issue_number: int) -> Optional[str]:
+        """Newest task ID for an issue"""
+        task_ids = self.issues.get(f"{repository}#{issue_number}")
+        if not task_ids:
+            return None
+        
+        # Of tasks created at the same time the one indexed last wins
+        return max(reversed(task_ids.items()), key=lambda item: item[1])[0]
+    
+    def find_by_pr(self, repository: str, pr_number: int) -> Optional[str]:
+        """Task ID that opened a pull request"""
+        return self.prs.get(f"{repository}#{pr_number}")
+    
+    def find_by_repository(self, repository: str) -> List[str]:
+        """All task IDs for a repository"""
+        return sorted(self.repositories.get(repository, set()))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization"""
+        return {
+            "version": self.VERSION,
+            "issues": self.issues,
+            "prs": self.prs,
+            "repositories": {repo: sorted(ids) for repo, ids in self.repositories.items()}
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TaskIndex":
+        """Create from dictionary"""
+        index = cls()
+        index.issues = data.get("issues", {})
+        index.prs = data.get("prs", {})
+        index.repositories = {repo: set(ids) for repo, ids in data.get("repositories", {}).items()}
+        return index
+    
+    @classmethod
+    def build(cls, tasks: List[Dict[str, Any]]) -> "TaskIndex":
+        """Build indexes from a list of tasks"""
+        index = cls()
+        for task in tasks:
+            index.add(task)
+        return index
@@ -7,11 +7,12 @@ import json
 import logging
 from typing import Dict, Any, Optional
 from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 
 from src.core.config import get_settings
 from src.services.agent import ClaudeAgent
+from src.services.queue_metrics import render_prometheus
 from src.services.task_queue import TaskQueue
 from src.utils.logging import get_logger
 
@@ -97,7 +98,9 @@ class WebhookServer:
             logger.info(f"PR #{pr_number} merged in {repo_name}")
             
             # Update task status if it's our PR
-            task_id = self._extract_task_id_from_pr(pr)
+            task_id = self.agent.state_manager.get_task_id_for_pr(repo_name, pr_number)
+            if not task_id:
+                task_id = self._extract_task_id_from_pr(pr)
             if task_id:
                 try:
                     task = self.agent.get_task_status(task_id)
@@ -134,11 +137,21 @@ class WebhookServer:
     async def _process_issue_async(self, issue_number: int, repo_name: str):
         """Process issue asynchronously"""
         try:
+            # Skip issues that already have a task in flight
+            existing_id = self.agent.state_manager.get_task_id_for_issue(repo_name, issue_number)
+            if existing_id:
+                existing = self.agent.state_manager.get_task(existing_id)
+                # A task waiting out a retry backoff is "failed" but still queued
+                if existing["status"] in ("created", "running") or existing_id in self.task_queue.queue \
+                        or existing_id in self.task_queue.processing_tasks:
+                    logger.info(f"Issue #{issue_number} already has active task {existing_id}")
+                    return
+            
             # Create task
             task_id = self.agent.create_task_from_issue(issue_number, repo_name)
             
             # Add to task queue
-            await self.task_queue.add_task(task_id, priority="medium")
+            await self.task_queue.add_task(task_id, priority="medium", repository=repo_name)
             
             logger.info(f"Task {task_id} queued for issue #{issue_number}")
             
@@ -161,6 +174,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Stopping webhook server...")
     await webhook_server.task_queue.stop()
+    webhook_server.agent.state_manager.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -216,7 +230,7 @@ async def github_webhook(request: Request, background_tasks: BackgroundTasks):
             result = {"status": "ignored", "event": event_type}
         
         return JSONResponse(content=result)
-        
+    
     except Exception as e:
         logger.error(f"Webhook processing error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -234,6 +248,64 @@ async def webhook_status():
         }
     }
 
+@app.get("/webhook/metrics")
+async def queue_metrics(format: str = "json"):
+    """Queue latency and throughput metrics as JSON (with recent task timings) or Prometheus text"""
+    if format == "prometheus":
+        return PlainTextResponse(render_prometheus(await webhook_server.task_queue.get_status()),
+                                 media_type="text/plain; version=0.0.4")
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be json or prometheus")
+    
+    queue_status = await webhook_server.task_queue.get_status(include_recent=True)
+    return {
+        "tasks": queue_status["tasks"],
+        "workers": queue_status["workers"],
+        "repositories": queue_status["repositories"],
+        **queue_status["metrics"]
+    }
+
+@app.get("/webhook/dead-letters")
+async def list_dead_letters(offset: int = 0, limit: int = 50, error_class: Optional[str] = None,
+                            repository: Optional[str] = None):
+    """Page through dead-lettered tasks, optionally filtered by error class or repository"""
+    if offset < 0 or not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit between 1 and 500")
+    
+    return webhook_server.task_queue.list_dead_letters(error_class, repository, offset, limit)
+
+@app.post("/webhook/dead-letters/redrive")
+async def redrive_dead_letters(request_data: Dict[str, Any]):
+    """Re-drive selected dead-lettered tasks back into the queue"""
+    task_ids = request_data.get("task_ids")
+    error_class = request_data.get("error_class")
+    repository = request_data.get("repository")
+    limit = request_data.get("limit")
+    spread_seconds = request_data.get("spread_seconds", 0)
+    
+    if task_ids is not None and not (isinstance(task_ids, list) and all(isinstance(t, str) for t in task_ids)):
+        raise HTTPException(status_code=400, detail="task_ids must be a list of strings")
+    if any(value is not None and not isinstance(value, str) for value in (error_class, repository)):
+        raise HTTPException(status_code=400, detail="error_class and repository must be strings")
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 0):
+        raise HTTPException(status_code=400, detail="limit must be an integer >= 0")
+    if isinstance(spread_seconds, bool) or not isinstance(spread_seconds, (int, float)) or spread_seconds < 0:
+        raise HTTPException(status_code=400, detail="spread_seconds must be a number >= 0")
+    
+    # Require an explicit selection so a stray request cannot replay everything
+    if task_ids is None and error_class is None and repository is None and not request_data.get("all"):
+        raise HTTPException(status_code=400, detail="Specify task_ids, error_class, repository or all=true")
+    
+    redriven = await webhook_server.task_queue.redrive_dead_letters(
+        task_ids=task_ids,
+        error_class=error_class,
+        repository=repository,
+        limit=limit,
+        spread_seconds=float(spread_seconds)
+    )
+    
+    return {"status": "redriven", "count": len(redriven), "task_ids": redriven}
+
 if __name__ == "__main__":
     import uvicorn
     settings = get_settings()
@@ -1,6 +1,7 @@
 """Helper functions"""
 
 import json
+import os
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -23,6 +24,18 @@ def save_json(data: Any, file_path: Path) -> None:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
 
+def save_json_atomic(data: Any, file_path: Path, indent: Optional[int] = None) -> None:
+    """Save data to JSON file atomically (temp file, fsync, rename)"""
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+    
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    
+    os.replace(tmp_path, file_path)
+
+
 def load_json(file_path: Path) -> Any:
     """Load data from JSON file"""
     if not file_path.exists():
@@ -0,0 +1,52 @@
+"""Shared HTTP client session for cluster traffic"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+
+from src.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Get the process-wide aiohttp session, creating it on first use
+    One keep-alive connector with a per-host limit and a DNS cache serves
+    every coordinator/node request, so heartbeats, pings and status updates
+    reuse connections instead of opening one per request. Callers pass a
+    per-request timeout and must not close the session.
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    
+    if _session is None or _session.closed or _session_loop is not loop:
+        settings = get_settings()
+        connector = aiohttp.TCPConnector(
+            limit=settings.http_pool_size,
+            limit_per_host=settings.http_pool_size_per_host,
+            ttl_dns_cache=settings.http_dns_cache_ttl,
+            keepalive_timeout=settings.http_keepalive_timeout
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+        _session_loop = loop
+        logger.debug("Created shared HTTP session")
+    
+    return _session
+
+
+async def close_http_session() -> None:
+    """Close the shared session, called from the FastAPI lifespan shutdown"""
+    global _session, _session_loop
+    session, _session, _session_loop = _session, None, None
+    
+    if session is not None and not session.closed:
+        await session.close()
+        logger.debug("Closed shared HTTP session")
@@ -0,0 +1,151 @@
+"""Rolling latency histograms and rate counters"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+class _SlicedWindow(ABC):
+    """
+    Sliding time window made of fixed-width slices
+    Recording touches only the newest slice; slices that fall out of the
+    window are dropped as time advances, so nothing is ever rescanned.
+    """
+    
+    def __init__(self, window: float, slices: int, clock: Callable[[], float]):
+        self.window = window
+        self.slice_width = window / slices
+        self.slices = slices
+        self.clock = clock
+        self.started = clock()
+        self._slices: deque = deque()  # (slice_id, state)
+    
+    @abstractmethod
+    def _new_state(self):
+        """Empty state for a new slice"""
+        pass
+    
+    def _expire(self, now: float) -> None:
+        """Drop slices older than the window"""
+        oldest = int(now // self.slice_width) - self.slices
+        while self._slices and self._slices[0][0] <= oldest:
+            self._slices.popleft()
+    
+    def _current(self):
+        """State of the slice covering now"""
+        now = self.clock()
+        slice_id = int(now // self.slice_width)
+        
+        if not self._slices or self._slices[-1][0] != slice_id:
+            self._expire(now)
+            self._slices.append((slice_id, self._new_state()))
+        
+        return self._slices[-1][1]
+    
+    def _states(self) -> List:
+        """States of every slice still inside the window"""
+        self._expire(self.clock())
+        return [state for _, state in self._slices]
+    
+    def _elapsed(self) -> float:
+        """Covered time span, shorter than the window right after start"""
+        return max(self.slice_width, min(self.window, self.clock() - self.started))
+
+
+class RollingCounter(_SlicedWindow):
+    """Event count over a sliding window"""
+    
+    def __init__(self, window: float = 300.0, slices: int = 30, clock: Callable[[], float] = time.monotonic):
+        super().__init__(window, slices, clock)
+    
+    def _new_state(self) -> List[int]:
+        return [0]
+    
+    def add(self, count: int = 1) -> None:
+        """Record count events now"""
+        self._current()[0] += count
+    
+    def total(self) -> int:
+        """Events inside the window"""
+        return sum(state[0] for state in self._states())
+    
+    def rate_per_minute(self) -> float:
+        """Average events per minute over the window"""
+        return self.total() * 60.0 / self._elapsed()
+
+
+class RollingHistogram(_SlicedWindow):
+    """
+    Latency histogram over a sliding window
+    Samples are counted in log-spaced buckets (buckets_per_decade per factor
+    of ten between min_value and max_value), so recording is O(1) and a
+    percentile is accurate to the bucket width, about 12% with the default
+    20 buckets per decade. Percentiles report the bucket's upper bound,
+    capped at the largest sample seen.
+    """
+    
+    def __init__(self, window: float = 300.0, slices: int = 10, min_value: float = 0.001,
+                 max_value: float = 86400.0, buckets_per_decade: int = 20,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__(window, slices, clock)
+        self.min_value = min_value
+        self.buckets_per_decade = buckets_per_decade
+        self.bucket_count = math.ceil(math.log10(max_value / min_value) * buckets_per_decade) + 1
+    
+    def _new_state(self) -> Dict:
+        return {"buckets": [0] * self.bucket_count, "count": 0, "sum": 0.0, "max": 0.0}
+    
+    def _bucket(self, value: float) -> int:
+        """Index of the bucket whose upper bound is the first >= value"""
+        if value <= self.min_value:
+            return 0
+        index = math.ceil(math.log10(value / self.min_value) * self.buckets_per_decade)
+        return min(index, self.bucket_count - 1)
+    
+    def _upper_bound(self, index: int) -> float:
+        return self.min_value * 10 ** (index / self.buckets_per_decade)
+    
+    def record(self, value: float) -> None:
+        """Record one sample"""
+        value = max(0.0, value)
+        state = self._current()
+        state["buckets"][self._bucket(value)] += 1
+        state["count"] += 1
+        state["sum"] += value
+        state["max"] = max(state["max"], value)
+    
+    def mean(self) -> Optional[float]:
+        """Mean of the samples inside the window, None without samples"""
+        states = self._states()
+        count = sum(state["count"] for state in states)
+        return sum(state["sum"] for state in states) / count if count else None
+    
+    def snapshot(self, percentiles=(50, 95, 99)) -> Dict[str, Optional[float]]:
+        """Count, mean, max and percentiles of the samples inside the window"""
+        states = self._states()
+        count = sum(state["count"] for state in states)
+        result: Dict[str, Optional[float]] = {"count": count}
+        
+        if count == 0:
+            result.update({"mean": None, "max": None})
+            result.update({f"p{p}": None for p in percentiles})
+            return result
+        
+        maximum = max(state["max"] for state in states)
+        merged = [sum(column) for column in zip(*(state["buckets"] for state in states))]
+        
+        result["mean"] = round(sum(state["sum"] for state in states) / count, 3)
+        result["max"] = round(maximum, 3)
+        
+        for p in percentiles:
+            rank = math.ceil(count * p / 100)
+            seen = 0
+            for index, bucket in enumerate(merged):
+                seen += bucket
+                if seen >= rank:
+                    result[f"p{p}"] = round(min(self._upper_bound(index), maximum), 3)
+                    break
+        
+        return result
@@ -0,0 +1,105 @@
+"""Cheap resource readings for node heartbeats"""
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+PROC = Path("/proc")
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text()
+    except OSError:
+        return None
+
+
+def _fields(text: Optional[str]) -> Dict[str, int]:
+    """Parse "name value" lines of /proc/meminfo or /proc/vmstat"""
+    result = {}
+    for line in (text or "").splitlines():
+        parts = line.replace(":", " ").split()
+        if len(parts) >= 2 and parts[1].isdigit():
+            result[parts[0]] = int(parts[1])
+    return result
+
+
+class SystemSampler:
+    """
+    Samples load, memory, swap activity, disk space and child processes
+    
+    Everything comes from a few small /proc reads and one statvfs, so a
+    sample costs well under a millisecond. Values that cannot be read (for
+    example outside Linux) are None. The swap rate is measured between
+    consecutive samples, so the first one reports None.
+    """
+    
+    def __init__(self, disk_path: Path, proc: Path = PROC):
+        self.disk_path = disk_path
+        self.proc = proc
+        self.cpu_count = os.cpu_count() or 1
+        self._last_swap: Optional[tuple] = None  # (monotonic time, pages swapped in + out)
+    
+    def cpu_load(self) -> Optional[float]:
+        """One-minute load average per CPU"""
+        text = _read(self.proc / "loadavg")
+        if not text:
+            return None
+        return round(float(text.split()[0]) / self.cpu_count, 3)
+    
+    def memory(self) -> Dict[str, Optional[float]]:
+        """Available memory in MB and as a fraction of the total"""
+        meminfo = _fields(_read(self.proc / "meminfo"))
+        total = meminfo.get("MemTotal")
+        available = meminfo.get("MemAvailable")
+        if not total or available is None:
+            return {"memory_available_mb": None, "memory_available_ratio": None}
+        
+        return {
+            "memory_available_mb": round(available / 1024, 1),
+            "memory_available_ratio": round(available / total, 3)
+        }
+    
+    def swap_rate(self) -> Optional[float]:
+        """Pages swapped in and out per second since the previous sample"""
+        vmstat = _fields(_read(self.proc / "vmstat"))
+        if "pswpin" not in vmstat:
+            return None
+        
+        now = time.monotonic()
+        pages = vmstat["pswpin"] + vmstat.get("pswpout", 0)
+        last, self._last_swap = self._last_swap, (now, pages)
+        if last is None or now <= last[0]:
+            return None
+        return round((pages - last[1]) / (now - last[0]), 1)
+    
+    def disk(self) -> Dict[str, Optional[float]]:
+        """Free space where the node keeps its workspace"""
+        try:
+            stat = os.statvfs(self.disk_path)
+        except OSError:
+            return {"disk_free_mb": None, "disk_free_ratio": None}
+        
+        return {
+            "disk_free_mb": round(stat.f_bavail * stat.f_frsize / 1024 ** 2, 1),
+            "disk_free_ratio": round(stat.f_bavail / stat.f_blocks, 3) if stat.f_blocks else None
+        }
+    
+    def subprocesses(self) -> Optional[int]:
+        """Direct child processes of this process (agents run git and the CLI as children)"""
+        tasks = self.proc / "self" / "task"
+        try:
+            return sum(len((task / "children").read_text().split()) for task in tasks.iterdir())
+        except OSError:
+            return None
+    
+    def sample(self) -> Dict[str, Any]:
+        """One reading of every metric"""
+        result: Dict[str, Any] = {"cpu_load": self.cpu_load()}
+        result.update(self.memory())
+        result["swap_pages_per_second"] = self.swap_rate()
+        result.update(self.disk())
+        result["subprocesses"] = self.subprocesses()
+        return result
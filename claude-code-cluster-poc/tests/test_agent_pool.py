@@ -0,0 +1,71 @@
+"""Tests for Agent Pool"""
+
+import threading
+import pytest
+from unittest.mock import Mock
+from src.services.agent_pool import AgentPool
+from src.core.exceptions import AgentPoolExhaustedError
+
+
+class TestAgentPool:
+    """Test Agent Pool functionality"""
+    
+    def test_agents_are_reused(self):
+        """Test released agents are handed out again instead of rebuilt"""
+        factory = Mock(side_effect=lambda: object())
+        pool = AgentPool(size=2, factory=factory)
+        
+        with pool.agent() as first:
+            pass
+        with pool.agent() as second:
+            pass
+        
+        assert first is second
+        assert factory.call_count == 1
+        assert pool.get_stats() == {"size": 2, "created": 1, "idle": 1, "in_use": 0}
+    
+    def test_pool_is_bounded(self):
+        """Test borrowers wait for a free agent once the pool is full"""
+        pool = AgentPool(size=1, factory=object)
+        agent = pool.acquire()
+        
+        with pytest.raises(AgentPoolExhaustedError):
+            pool.acquire(timeout=0.05)
+        
+        threading.Timer(0.05, pool.release, args=(agent,)).start()
+        assert pool.acquire(timeout=1) is agent
+    
+    def test_discard_and_warm(self):
+        """Test discarded agents are replaced and warm pre-creates agents"""
+        factory = Mock(side_effect=lambda: object())
+        pool = AgentPool(size=3, factory=factory)
+        
+        pool.warm(5)
+        assert pool.get_stats()["idle"] == 3
+        
+        agent = pool.acquire()
+        pool.release(agent, discard=True)
+        assert pool.get_stats()["created"] == 2
+        
+        assert pool.run(lambda a: a) is not agent
+        assert factory.call_count == 3
+    
+    def test_factory_failure_frees_slot(self):
+        """Test a failed agent construction does not leak pool capacity"""
+        pool = AgentPool(size=1, factory=Mock(side_effect=[RuntimeError("boom"), "agent"]))
+        
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+        
+        assert pool.acquire(timeout=0) == "agent"
+    
+    def test_failed_warm_frees_remaining_slots(self):
+        """Test a factory failure partway through warm does not shrink the pool"""
+        pool = AgentPool(size=3, factory=Mock(side_effect=["first", RuntimeError("boom"), "second", "third"]))
+        
+        with pytest.raises(RuntimeError):
+            pool.warm(3)
+        
+        assert pool.get_stats() == {"size": 3, "created": 1, "idle": 1, "in_use": 0}
+        agents = [pool.acquire(timeout=0) for _ in range(3)]
+        assert sorted(agents) == ["first", "second", "third"]
@@ -0,0 +1,576 @@
+"""Tests for Cluster Coordinator"""
+
+import asyncio
+import json
+import random
+import time
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+from src.core.exceptions import AdmissionRejectedError
+from src.services.cluster_coordinator import ClusterCoordinator, AgentNode, NodeStatus, TaskStatus
+from src.services.node_index import NodeIndex, node_score
+from src.services.node_load import NodeLoad
+from src.services.task_durations import TaskDurations
+
+
+def make_node(node_id: str, max_tasks: int = 3, specialties=None) -> AgentNode:
+    """Online node that sent a heartbeat just now"""
+    return AgentNode(
+        node_id=node_id,
+        host="127.0.0.1",
+        port=9000,
+        status=NodeStatus.ONLINE,
+        specialties=specialties or ["general"],
+        current_tasks=[],
+        max_concurrent_tasks=max_tasks,
+        last_heartbeat=datetime.now(),
+        capabilities={}
+    )
+
+
+def make_settings(data_path, persistence="json"):
+    """Coordinator settings writing state under data_path"""
+    mock_settings = Mock()
+    mock_settings.data_path = data_path
+    mock_settings.coordinator_persistence = persistence
+    mock_settings.coordinator_save_debounce = 0.05
+    mock_settings.journal_compact_threshold = 10000
+    mock_settings.journal_compact_interval = 60.0
+    mock_settings.journal_fsync = False
+    mock_settings.journal_archive = False
+    mock_settings.health_check_concurrency = 16
+    mock_settings.assignment_interval = 5.0
+    mock_settings.dispatch_concurrency = 8
+    mock_settings.lease_duration = 60.0
+    mock_settings.lease_poll_timeout = 30.0
+    mock_settings.node_load_window = 3
+    mock_settings.node_memory_limit = 0.9
+    mock_settings.node_swap_limit = 50.0
+    mock_settings.node_disk_min_free_mb = 1024.0
+    mock_settings.repo_affinity_weight = 0.2
+    mock_settings.speculative_execution = True
+    mock_settings.straggler_factor = 2.0
+    mock_settings.straggler_min_seconds = 120.0
+    mock_settings.straggler_min_samples = 3
+    mock_settings.admission_control = False
+    mock_settings.admission_queue_factor = 2.0
+    mock_settings.admission_min_queue = 4
+    mock_settings.admission_max_queue_age = 900.0
+    mock_settings.admission_priority_quotas = "urgent:1.0,high:0.9,medium:0.7,low:0.4"
+    return mock_settings
+
+
+@pytest.fixture
+def coordinator(tmp_path, monkeypatch):
+    """Coordinator writing its state file to a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    with patch('src.services.cluster_coordinator.get_settings', return_value=make_settings(tmp_path)):
+        coordinator = ClusterCoordinator()
+    yield coordinator
+    coordinator.close()
+
+
+class TestClusterCoordinator:
+    """Test Cluster Coordinator functionality"""
+    
+    @pytest.mark.asyncio
+    async def test_health_checks_run_concurrently(self, coordinator):
+        """Test a sweep over many slow nodes takes a few ping timeouts, not one per node"""
+        for i in range(40):
+            coordinator.add_node(make_node(f"node-{i}"))
+        dead = {"node-3", "node-17", "node-29"}
+        
+        async def ping(node):
+            await asyncio.sleep(0.1)
+            return node.node_id not in dead
+        
+        with patch.object(coordinator, "_send_task_to_node", return_value=True):
+            await coordinator.submit_task("task-1")
+        dead.add(coordinator.tasks["task-1"].assigned_node)
+        
+        started = time.monotonic()
+        with patch.object(coordinator, "_ping_node", side_effect=ping):
+            failed = await coordinator.check_nodes()
+        
+        assert time.monotonic() - started < 1.0
+        assert set(failed) == dead
+        assert all(coordinator.nodes[node_id].status == NodeStatus.OFFLINE for node_id in dead)
+        
+        # The failed node's task waits for the assignment loop
+        assert coordinator.tasks["task-1"].status == TaskStatus.PENDING
+        assert coordinator._assignment_wanted.is_set()
+    
+    @pytest.mark.asyncio
+    async def test_assignment_loop_wakes_on_freed_capacity(self, coordinator):
+        """Test freeing a slot assigns the next pending task without waiting for the interval"""
+        coordinator.add_node(make_node("node-0", max_tasks=1))
+        
+        with patch.object(coordinator, "_send_task_to_node", return_value=True):
+            await coordinator.submit_task("task-1")
+            await coordinator.submit_task("task-2")
+            assert coordinator.tasks["task-2"].status == TaskStatus.PENDING
+            
+            loop = asyncio.create_task(coordinator.assignment_loop())
+            try:
+                await coordinator.update_task_status("task-1", "completed")
+                await asyncio.sleep(0.05)
+                assert coordinator.tasks["task-2"].status == TaskStatus.ASSIGNED
+            finally:
+                loop.cancel()
+                await asyncio.gather(loop, return_exceptions=True)
+    
+    @pytest.mark.asyncio
+    async def test_schedule_pending_batch(self, coordinator):
+        """Test one pass places urgent and constrained tasks first and dispatches concurrently"""
+        coordinator.add_node(make_node("python-node", max_tasks=1, specialties=["python"]))
+        coordinator.add_node(make_node("general-node", max_tasks=1))
+        coordinator.add_node(make_node("flaky-node", max_tasks=1, specialties=["docs"]))
+        coordinator._assignment_loop_active = True  # Submissions wait for the batch pass
+        
+        await coordinator.submit_task("generic", priority="medium")
+        await coordinator.submit_task("python-task", priority="medium", requirements=["python"])
+        await coordinator.submit_task("docs-task", priority="urgent", requirements=["docs"])
+        await coordinator.submit_task("overflow", priority="low")
+        
+        async def send(task, node):
+            await asyncio.sleep(0.1)
+            return node.node_id != "flaky-node"
+        
+        started = time.monotonic()
+        with patch.object(coordinator, "_send_task_to_node", side_effect=send):
+            assigned = await coordinator.schedule_pending()
+        
+        assert time.monotonic() - started < 0.25
+        assert assigned == 2
+        assert coordinator.tasks["python-task"].assigned_node == "python-node"
+        assert coordinator.tasks["generic"].assigned_node == "general-node"
+        
+        # The rejected assignment is rolled back and the slot freed again
+        assert coordinator.tasks["docs-task"].status == TaskStatus.PENDING
+        assert coordinator.tasks["docs-task"].assigned_node is None
+        assert coordinator.nodes["flaky-node"].current_tasks == []
+        assert "flaky-node" in coordinator.node_index
+        assert coordinator.tasks["overflow"].status == TaskStatus.PENDING
+
+    
+    @pytest.mark.asyncio
+    async def test_heartbeat_load_steers_assignments(self, coordinator):
+        """Test a busy node scores lower and a swapping one gets nothing until it recovers"""
+        idle = {"cpu_load": 0.1, "memory_available_ratio": 0.8, "swap_pages_per_second": 0.0, "disk_free_mb": 50000}
+        busy = dict(idle, cpu_load=0.9)
+        swapping = dict(idle, memory_available_ratio=0.05, swap_pages_per_second=800.0)
+        
+        coordinator.add_node(make_node("node-a"))
+        coordinator.add_node(make_node("node-b"))
+        await coordinator.update_node_heartbeat("node-a", [], busy)
+        await coordinator.update_node_heartbeat("node-b", [], idle)
+        assert coordinator.node_index.best([]) == "node-b"
+        
+        await coordinator.update_node_heartbeat("node-b", [], swapping)
+        await coordinator.update_node_heartbeat("node-b", [], swapping)
+        assert "node-b" not in coordinator.node_index
+        assert coordinator.get_node_status("node-b")["load"]["overloaded"]
+        
+        # The window forgets the bad samples after node_load_window heartbeats
+        for _ in range(3):
+            await coordinator.update_node_heartbeat("node-b", [], idle)
+        assert coordinator.node_index.best([]) == "node-b"
+    
+    @pytest.mark.asyncio
+    async def test_repository_affinity(self, coordinator):
+        """Test a node with a warm clone wins over a less loaded cold one, but not a much less loaded one"""
+        coordinator.add_node(make_node("node-warm", max_tasks=4))
+        coordinator.add_node(make_node("node-cold", max_tasks=4))
+        await coordinator.update_node_heartbeat("node-warm", ["busy-1"], repositories={"acme/app": "abc123"})
+        assert coordinator.get_node_status("node-warm")["repositories"] == {"acme/app": "abc123"}
+        
+        with patch.object(coordinator, "_send_task_to_node", return_value=True):
+            await coordinator.submit_task("task-1", repository="acme/app")
+            await coordinator.submit_task("task-2", repository="other/lib")
+        assert coordinator.tasks["task-1"].assigned_node == "node-warm"
+        assert coordinator.tasks["task-2"].assigned_node == "node-cold"
+        
+        await coordinator.update_node_heartbeat("node-warm", ["busy-1", "busy-2", "busy-3"])
+        await coordinator.update_node_heartbeat("node-cold", [])
+        with patch.object(coordinator, "_send_task_to_node", return_value=True):
+            await coordinator.submit_task("task-3", repository="acme/app")
+        assert coordinator.tasks["task-3"].assigned_node == "node-cold"
+        
+        # A node that stops reporting the repository loses the bonus
+        await coordinator.update_node_heartbeat("node-warm", [], repositories={})
+        assert "acme/app" not in coordinator.repository_nodes
+
+
+class TestNodeLoad:
+    """Test rolling node resource load"""
+    
+    def test_pressure_and_limits(self):
+        """Test pressure follows the busiest resource and limits flag an overloaded node"""
+        load = NodeLoad(window=2, disk_min_free_mb=100)
+        assert load.pressure() == 0.0 and not load.overloaded()
+        
+        load.add({"cpu_load": 0.4, "memory_available_ratio": 0.5, "disk_free_mb": 500, "task_seconds": [10, 20]})
+        load.add({"cpu_load": 2.0, "memory_available_ratio": 0.5, "disk_free_mb": None})
+        assert load.pressure() == 1.0
+        assert not load.overloaded()
+        assert load.summary()["mean_task_seconds"] == 15
+        
+        load.add({"cpu_load": 0.2, "memory_available_ratio": 0.9, "disk_free_mb": 50})
+        assert load.overloaded()
+
+
+class TestLeaseScheduling:
+    """Test pull-mode nodes leasing tasks"""
+    
+    @staticmethod
+    def make_pull_node(node_id: str, max_tasks: int = 2, specialties=None) -> AgentNode:
+        node = make_node(node_id, max_tasks, specialties)
+        node.capabilities = {"scheduling": "pull"}
+        return node
+    
+    @pytest.mark.asyncio
+    async def test_long_poll_leases_matching_work(self, coordinator):
+        """Test a waiting node gets a task as soon as one is submitted, best match first"""
+        coordinator.add_node(self.make_pull_node("puller", specialties=["python"]))
+        assert "puller" not in coordinator.node_index
+        
+        waiter = asyncio.create_task(coordinator.lease_task("puller", wait=5.0))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        
+        started = time.monotonic()
+        await coordinator.submit_task("generic")
+        task = await waiter
+        assert time.monotonic() - started < 0.5
+        assert task.task_id == "generic"
+        assert task.assigned_node == "puller" and task.lease_id
+        
+        await coordinator.submit_task("docs", requirements=["docs"])
+        await coordinator.submit_task("python", requirements=["python"])
+        assert (await coordinator.lease_task("puller")).task_id == "python"
+        
+        # At capacity the node gets nothing until a task finishes
+        assert await coordinator.lease_task("puller", wait=0.05) is None
+        await coordinator.update_task_status("generic", "completed", "puller")
+        assert (await coordinator.lease_task("puller")).task_id == "docs"
+    
+    @pytest.mark.asyncio
+    async def test_expired_lease_returns_task_to_pool(self, coordinator):
+        """Test renewals keep a lease and an expired one frees the task and the slot"""
+        coordinator.lease_duration = 0.1
+        coordinator.add_node(self.make_pull_node("puller"))
+        await coordinator.submit_task("task-1")
+        task = await coordinator.lease_task("puller")
+        
+        await asyncio.sleep(0.06)
+        assert coordinator.renew_lease("task-1", "puller", task.lease_id) is not None
+        await asyncio.sleep(0.06)
+        assert coordinator.expire_leases() == []
+        
+        await asyncio.sleep(0.1)
+        assert coordinator.expire_leases() == ["task-1"]
+        assert task.status == TaskStatus.PENDING and task.lease_id is None
+        assert coordinator.nodes["puller"].current_tasks == []
+        assert coordinator.renew_lease("task-1", "puller", "stale") is None
+    
+    @pytest.mark.asyncio
+    async def test_leases_come_from_the_status_index(self, coordinator):
+        """Test leasing reads pending tasks from the index, which tracks every status change"""
+        coordinator.add_node(self.make_pull_node("puller", max_tasks=10))
+        for i in range(5):
+            await coordinator.submit_task(f"done-{i}")
+            await coordinator.lease_task("puller")
+            await coordinator.update_task_status(f"done-{i}", "completed", "puller")
+        await coordinator.submit_task("low", priority="low")
+        await coordinator.submit_task("high", priority="high")
+        
+        with patch.object(coordinator, "tasks", {}):
+            # The task history is never scanned
+            assert (await coordinator.lease_task("puller")).task_id == "high"
+        await coordinator.update_task_status("high", "failed", "puller")
+        
+        for status in TaskStatus:
+            assert {task.task_id for task in coordinator.task_index.tasks(status)} == \
+                {task.task_id for task in coordinator.tasks.values() if task.status == status}
+        assert coordinator.get_cluster_status()["tasks"]["completed"] == 5
+
+
+class TestNodeChannel:
+    """Test nodes connected over a persistent channel"""
+    
+    @pytest.mark.asyncio
+    async def test_assignments_and_failover_over_channel(self, coordinator):
+        """Test assignments travel as frames and a closed channel fails the node over at once"""
+        sent = []
+        
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "assign":
+                # The node answers on its own socket, delivered by the receive loop
+                asyncio.ensure_future(coordinator.handle_channel_message(
+                    "node-0", {"type": "assign_result", "task_id": message["task_id"], "accepted": True}))
+        
+        node = make_node("node-0")
+        node.status = NodeStatus.OFFLINE
+        channel = coordinator.open_channel(node, send)
+        assert coordinator.nodes["node-0"].status == NodeStatus.ONLINE
+        
+        with patch("src.services.cluster_coordinator.get_http_session") as http:
+            await coordinator.submit_task("task-1")
+            assert await coordinator._ping_node(node)
+        http.assert_not_called()
+        assert sent == [{"type": "assign", "task_id": "task-1", "priority": "medium", "requirements": []}]
+        assert coordinator.tasks["task-1"].assigned_node == "node-0"
+        
+        await coordinator.handle_channel_message("node-0", {"type": "status", "task_id": "task-1", "status": "in_progress"})
+        assert coordinator.tasks["task-1"].status == TaskStatus.IN_PROGRESS
+        
+        await coordinator.close_channel("node-0", channel)
+        assert coordinator.nodes["node-0"].status == NodeStatus.OFFLINE
+        assert coordinator.tasks["task-1"].status == TaskStatus.PENDING
+        assert "node-0" not in coordinator.channels
+    
+    @pytest.mark.asyncio
+    async def test_unanswered_assignment_is_rolled_back(self, coordinator):
+        """Test an assignment the node never answers fails when the channel closes"""
+        async def send(message):
+            pass
+        
+        channel = coordinator.open_channel(make_node("node-0"), send)
+        submitting = asyncio.create_task(coordinator.submit_task("task-1"))
+        await asyncio.sleep(0.01)
+        channel.close()
+        await submitting
+        
+        assert coordinator.tasks["task-1"].status == TaskStatus.PENDING
+        assert coordinator.nodes["node-0"].current_tasks == []
+
+
+class TestSpeculativeExecution:
+    """Test backup copies of straggling tasks"""
+    
+    async def start_straggler(self, coordinator, sent):
+        """Two channel nodes, a run time history and task-1 running for a minute on one of them"""
+        for node_id in ("node-a", "node-b"):
+            async def send(message, node_id=node_id):
+                sent.append((node_id, message))
+            coordinator.open_channel(make_node(node_id), send)
+        for _ in range(3):
+            coordinator.task_durations.record("medium", [], 10.0)
+        coordinator.straggler_min_seconds = 0.0
+        
+        with patch.object(coordinator, "_send_task_to_node", return_value=True):
+            await coordinator.submit_task("task-1")
+        task = coordinator.tasks["task-1"]
+        await coordinator.update_task_status("task-1", "in_progress", task.assigned_node)
+        task.started_at = datetime.now() - timedelta(seconds=60)
+        
+        with patch.object(coordinator, "_send_task_to_node", return_value=True), \
+                patch.object(coordinator, "tasks", {}):
+            # Only tasks in progress are looked at, not the task history
+            assert await coordinator.speculate_stragglers() == ["task-1"]
+            assert await coordinator.speculate_stragglers() == []
+        return task
+    
+    @pytest.mark.asyncio
+    async def test_first_copy_to_finish_wins(self, coordinator):
+        """Test the copy that finishes first completes the task and the other copy is cancelled"""
+        sent = []
+        task = await self.start_straggler(coordinator, sent)
+        primary, backup = task.assigned_node, task.speculative_node
+        assert backup and backup != primary
+        assert "task-1" in coordinator.nodes[backup].current_tasks
+        
+        await coordinator.update_task_status("task-1", "in_progress", backup)
+        await coordinator.update_task_status("task-1", "completed", backup)
+        assert task.status == TaskStatus.COMPLETED and task.assigned_node == backup
+        assert sent == [(primary, {"type": "cancel", "task_id": "task-1"})]
+        assert coordinator.nodes[backup].current_tasks == []
+        
+        # The losing copy keeps its slot until its agent has stopped
+        assert coordinator.nodes[primary].current_tasks == ["task-1"]
+        await coordinator.update_task_status("task-1", "cancelled", primary)
+        assert task.status == TaskStatus.COMPLETED
+        assert coordinator.nodes[primary].current_tasks == []
+        assert coordinator.get_cluster_status()["tasks"]["speculative"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_failed_copy_drops_out(self, coordinator):
+        """Test a copy that fails frees its slot while the other copy carries on"""
+        sent = []
+        task = await self.start_straggler(coordinator, sent)
+        primary, backup = task.assigned_node, task.speculative_node
+        
+        await coordinator.update_task_status("task-1", "failed", primary)
+        assert task.status == TaskStatus.IN_PROGRESS and task.retry_count == 0
+        assert task.assigned_node == backup and task.speculative_node is None
+        assert coordinator.nodes[primary].current_tasks == []
+        
+        await coordinator.update_task_status("task-1", "completed", backup)
+        assert task.status == TaskStatus.COMPLETED
+        assert sent == []
+    
+    def test_expected_durations(self):
+        """Test a requirement set without history borrows the median of its priority"""
+        durations = TaskDurations(min_samples=2)
+        durations.record("urgent", ["python"], 10.0)
+        assert durations.expected("urgent", ["python"]) is None
+        
+        durations.record("urgent", ["python"], 30.0)
+        durations.record("urgent", ["docs"], 500.0)
+        assert durations.expected("urgent", ["python"]) == 20.0
+        assert durations.expected("urgent", ["docs"]) == 30.0
+        assert durations.expected("low", []) is None
+
+
+class TestAdmissionControl:
+    """Test submissions are turned away while the cluster is saturated"""
+    
+    @pytest.mark.asyncio
+    async def test_priority_quotas_and_retry_after(self, coordinator):
+        """Test low priorities are rejected first and Retry-After follows the drain rate"""
+        coordinator.admission_control = True
+        
+        # No nodes: the queue limit is admission_min_queue (4), medium may fill 70% of it
+        await coordinator.submit_task("medium-1")
+        await coordinator.submit_task("medium-2")
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            await coordinator.submit_task("medium-3")
+        assert rejected.value.retry_after == 300  # Nothing drained yet
+        assert "medium-3" not in coordinator.tasks
+        
+        await coordinator.submit_task("urgent-1", priority="urgent")
+        await coordinator.submit_task("urgent-2", priority="urgent")
+        with pytest.raises(AdmissionRejectedError):
+            await coordinator.submit_task("urgent-3", priority="urgent")
+        
+        # Three slots drain three tasks and raise the limit to 6
+        coordinator.add_node(make_node("node-a", max_tasks=3))
+        with patch.object(coordinator, "_send_task_to_node", return_value=True):
+            assert await coordinator.schedule_pending() == 3
+            await coordinator.submit_task("low-1", priority="low")
+            with pytest.raises(AdmissionRejectedError) as rejected:
+                await coordinator.submit_task("low-2", priority="low")
+        assert rejected.value.retry_after == 1
+    
+    @pytest.mark.asyncio
+    async def test_stalled_queue_admits_only_urgent(self, coordinator):
+        """Test a queue whose oldest task waited too long only takes full-quota priorities"""
+        coordinator.admission_control = True
+        await coordinator.submit_task("old")
+        old = coordinator.tasks["old"]
+        old.created_at = datetime.now() - timedelta(seconds=1000)
+        coordinator.task_index.set_status(old, TaskStatus.PENDING)  # Re-index the backdated task
+        
+        with patch.object(coordinator, "tasks", {}):
+            # Admission reads the status index, not the task table
+            with pytest.raises(AdmissionRejectedError):
+                await coordinator.submit_task("medium-1")
+        assert await coordinator.submit_task("urgent-1", priority="urgent")
+
+
+class TestClusterStatePersistence:
+    """Test coalesced and journaled coordinator state"""
+    
+    @pytest.mark.asyncio
+    async def test_changes_coalesce_into_one_atomic_write(self, coordinator, tmp_path):
+        """Test a burst of changes is written once, under data_path, after the debounce"""
+        coordinator.add_node(make_node("node-0", max_tasks=50))
+        
+        with patch("src.services.cluster_state.save_json_atomic") as save:
+            with patch.object(coordinator, "_send_task_to_node", return_value=True):
+                for i in range(20):
+                    await coordinator.submit_task(f"task-{i}")
+            assert save.call_count == 0
+            
+            await asyncio.sleep(0.1)
+            coordinator.state_store.flush()
+        
+        assert save.call_count == 1
+        state, state_file = save.call_args.args
+        assert state_file == tmp_path / "cluster_state.json"
+        assert len(state["tasks"]) == 20
+        
+        # Closing writes what changed since the last flush
+        await coordinator.update_task_status("task-0", "in_progress")
+        coordinator.close()
+        assert (tmp_path / "cluster_state.json").exists()
+        assert not (tmp_path / ".cluster_state.json.tmp").exists()
+        
+        with patch('src.services.cluster_coordinator.get_settings', return_value=make_settings(tmp_path)):
+            reloaded = ClusterCoordinator()
+        assert reloaded.tasks["task-0"].status == TaskStatus.IN_PROGRESS
+        assert reloaded.tasks["task-19"].status == TaskStatus.ASSIGNED
+        assert reloaded.nodes["node-0"].current_tasks == [f"task-{i}" for i in range(20)]
+        reloaded.close()
+    
+    @pytest.mark.asyncio
+    async def test_journal_keeps_changes_between_snapshots(self, tmp_path):
+        """Test journal mode restores every change without a snapshot, importing the old state file"""
+        (tmp_path / "cluster_state.json").write_text(
+            json.dumps({"nodes": [make_node("node-0").to_dict()], "tasks": []}))
+        
+        with patch('src.services.cluster_coordinator.get_settings', return_value=make_settings(tmp_path, "journal")):
+            first = ClusterCoordinator()
+        assert "node-0" in first.nodes
+        
+        with patch.object(first, "_send_task_to_node", return_value=True):
+            await first.submit_task("task-1")
+        await first.update_task_status("task-1", "in_progress")
+        
+        # Reopen from the journal alone, as after a crash
+        first.state_store.journal._stop.set()
+        with patch('src.services.cluster_coordinator.get_settings', return_value=make_settings(tmp_path, "journal")):
+            second = ClusterCoordinator()
+        
+        assert second.tasks["task-1"].status == TaskStatus.IN_PROGRESS
+        assert second.nodes["node-0"].current_tasks == ["task-1"]
+        second.close()
+
+
+class TestNodeIndex:
+    """Test capacity-indexed node selection"""
+    
+    def test_matches_full_scan(self):
+        """Test the index picks a node scoring as high as a full scan would"""
+        rng = random.Random(7)
+        specialty_sets = [["general"], ["python"], ["python", "testing"], ["frontend", "typescript"], ["docs"]]
+        capacity = {f"node-{i}": rng.randint(1, 4) for i in range(50)}
+        load = {node_id: 0 for node_id in capacity}
+        specialties = {node_id: rng.choice(specialty_sets) for node_id in capacity}
+        online = set(capacity)
+        
+        index = NodeIndex()
+        
+        def refresh(node_id):
+            if node_id in online and load[node_id] < capacity[node_id]:
+                index.update(node_id, specialties[node_id], load[node_id] / capacity[node_id])
+            else:
+                index.discard(node_id)
+        
+        for node_id in capacity:
+            refresh(node_id)
+        
+        for _ in range(2000):
+            node_id = rng.choice(list(capacity))
+            action = rng.random()
+            if action < 0.1:
+                online.symmetric_difference_update({node_id})
+            elif action < 0.4 and load[node_id] > 0:
+                load[node_id] -= 1
+            elif load[node_id] < capacity[node_id]:
+                load[node_id] += 1
+            refresh(node_id)
+            
+            requirements = rng.choice([[], ["python"], ["python", "testing"], ["typescript", "docs"]])
+            available = [n for n in capacity if n in online and load[n] < capacity[n]]
+            best = index.best(requirements)
+            
+            if not available:
+                assert best is None
+                continue
+            
+            expected = max(node_score(requirements, specialties[n], load[n] / capacity[n]) for n in available)
+            assert best in available
+            assert node_score(requirements, specialties[best], load[best] / capacity[best]) == pytest.approx(expected)
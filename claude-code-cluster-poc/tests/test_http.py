@@ -0,0 +1,39 @@
+"""Tests for the shared HTTP session"""
+
+import pytest
+from unittest.mock import Mock, patch
+from src.utils.http import get_http_session, close_http_session
+
+
+@pytest.fixture
+def settings():
+    """HTTP pool settings"""
+    mock_settings = Mock()
+    mock_settings.http_pool_size = 10
+    mock_settings.http_pool_size_per_host = 2
+    mock_settings.http_dns_cache_ttl = 60
+    mock_settings.http_keepalive_timeout = 15.0
+    with patch('src.utils.http.get_settings', return_value=mock_settings):
+        yield mock_settings
+
+
+class TestHttpSession:
+    """Test shared session lifecycle"""
+    
+    @pytest.mark.asyncio
+    async def test_session_is_shared_and_recreated_after_close(self, settings):
+        """Test one tuned session is reused until closed"""
+        session = get_http_session()
+        
+        try:
+            assert get_http_session() is session
+            assert session.connector.limit == 10
+            assert session.connector.limit_per_host == 2
+        finally:
+            await close_http_session()
+        
+        assert session.closed
+        
+        replacement = get_http_session()
+        assert replacement is not session
+        await close_http_session()
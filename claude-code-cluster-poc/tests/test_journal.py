@@ -0,0 +1,61 @@
+"""Tests for the append-only journal"""
+
+import json
+from src.services.journal import JournaledMap
+
+
+class TestJournaledMap:
+    """Test journal replay and compaction"""
+    
+    def test_replay_after_crash(self, tmp_path):
+        """Test state is rebuilt from the journal without a snapshot"""
+        journal = JournaledMap(tmp_path / "tasks", compact_interval=3600)
+        journal.put("a", {"status": "created"})
+        journal.put("b", {"status": "created"})
+        journal.put("a", {"status": "running"})
+        journal.delete("b")
+        
+        # Reopen without closing, as after a crash
+        reopened = JournaledMap(tmp_path / "tasks", compact_interval=3600)
+        assert dict(reopened.items()) == {"a": {"status": "running"}}
+        assert not reopened.created
+        
+        reopened.close()
+        journal.close()
+    
+    def test_compaction_truncates_journal(self, tmp_path):
+        """Test compaction writes a snapshot and replays only newer records"""
+        journal = JournaledMap(tmp_path / "tasks", compact_interval=3600)
+        for i in range(10):
+            journal.put(f"task-{i}", {"n": i})
+        
+        journal.compact()
+        assert journal.journal_file.read_text() == ""
+        snapshot = json.loads(journal.snapshot_file.read_text())
+        assert snapshot["seq"] == 10
+        assert len(snapshot["entries"]) == 10
+        
+        journal.delete("task-0")
+        journal.put("task-10", {"n": 10})
+        
+        reopened = JournaledMap(tmp_path / "tasks", compact_interval=3600)
+        assert len(reopened) == 10
+        assert "task-0" not in reopened
+        assert reopened.get("task-10") == {"n": 10}
+        
+        reopened.close()
+        journal.close()
+    
+    def test_interrupted_compaction_is_recovered(self, tmp_path):
+        """Test a rotated segment left by a crash is folded into the snapshot"""
+        journal = JournaledMap(tmp_path / "tasks", compact_interval=3600)
+        journal.put("a", {"n": 1})
+        journal._journal.close()
+        journal.journal_file.rename(journal.rotated_file)
+        
+        reopened = JournaledMap(tmp_path / "tasks", compact_interval=3600)
+        assert reopened.get("a") == {"n": 1}
+        assert not reopened.rotated_file.exists()
+        assert reopened.snapshot_file.exists()
+        
+        reopened.close()
@@ -178,4 +178,214 @@ class TestStateManager:
                 assert summary["status_counts"]["completed"] == 1
                 assert summary["status_counts"]["running"] == 1
                 assert summary["status_counts"]["failed"] == 1
-                assert len(summary["recent_tasks"]) == 3
\ No newline at end of file
+                assert len(summary["recent_tasks"]) == 3
+    
+    @patch('src.services.state_manager.get_settings')
+    def test_sqlite_backend(self, mock_get_settings, tmp_path):
+        """Test SQLite backend keeps the StateManager API"""
+        mock_settings = Mock()
+        mock_settings.data_path = tmp_path
+        mock_settings.state_backend = "sqlite"
+        mock_get_settings.return_value = mock_settings
+        
+        issue_data = {
+            "number": 7,
+            "title": "Test Issue",
+            "body": "Test body",
+            "labels": [],
+            "html_url": "https://github.com/test/repo/issues/7",
+            "repository": {"full_name": "test/repo"}
+        }
+        
+        manager = StateManager()
+        task_id = manager.create_task(issue_data, {"priority": "medium"})
+        manager.update_task_status(task_id, "running")
+        
+        task = manager.get_task(task_id)
+        assert task["status"] == "running"
+        assert task["execution"]["started_at"] is not None
+        assert [t["id"] for t in manager.list_tasks(status="running")] == [task_id]
+        assert manager.get_task_summary()["status_counts"] == {"running": 1}
+        
+        with pytest.raises(TaskNotFoundError):
+            manager.update_task("nonexistent-task", {"status": "failed"})
+        
+        manager.close()
+    
+    @patch('src.services.state_manager.get_settings')
+    def test_sqlite_migrates_json_once(self, mock_get_settings, tmp_path):
+        """Test one-shot migration from tasks.json"""
+        mock_settings = Mock()
+        mock_settings.data_path = tmp_path
+        mock_settings.state_backend = "sqlite"
+        mock_get_settings.return_value = mock_settings
+        
+        tasks_data = {
+            "tasks": {
+                "task-1": {"id": "task-1", "status": "completed", "created_at": "2023-01-01",
+                           "issue": {"number": 1, "repository": "test/repo"}},
+                "task-2": {"id": "task-2", "status": "running", "created_at": "2023-01-02",
+                           "issue": {"number": 2, "repository": "test/repo"}}
+            }
+        }
+        (tmp_path / "tasks.json").write_text(json.dumps(tasks_data))
+        
+        manager = StateManager()
+        assert [t["id"] for t in manager.list_tasks()] == ["task-2", "task-1"]
+        manager.close()
+        
+        # A second start must not re-import deleted tasks
+        manager = StateManager()
+        assert manager.cleanup_old_tasks(days=1) == 1
+        manager.close()
+        
+        manager = StateManager()
+        assert [t["id"] for t in manager.list_tasks()] == ["task-2"]
+        manager.close()
+    
+    @patch('src.services.state_manager.get_settings')
+    def test_write_behind_cache(self, mock_get_settings, tmp_path):
+        """Test write-behind mode buffers updates until flush"""
+        mock_settings = Mock()
+        mock_settings.data_path = tmp_path
+        mock_settings.state_backend = "sqlite"
+        mock_settings.state_write_mode = "write_behind"
+        mock_settings.state_flush_interval = 3600
+        mock_settings.state_flush_threshold = 1000
+        mock_get_settings.return_value = mock_settings
+        
+        issue_data = {
+            "number": 3,
+            "title": "Test Issue",
+            "body": "Test body",
+            "labels": [],
+            "html_url": "https://github.com/test/repo/issues/3",
+            "repository": {"full_name": "test/repo"}
+        }
+        
+        manager = StateManager()
+        other = StateManager()
+        assert manager.store is other.store
+        
+        task_id = manager.create_task(issue_data, {"priority": "medium"})
+        manager.update_task_status(task_id, "running")
+        
+        # Reads are served from memory, the backend has not been written yet
+        assert other.get_task(task_id)["status"] == "running"
+        assert manager.store.backend.get(task_id) is None
+        
+        manager.flush()
+        assert manager.store.backend.get(task_id)["status"] == "running"
+    
+    @patch('src.services.state_manager.get_settings')
+    def test_large_results_stored_as_blobs(self, mock_get_settings, tmp_path):
+        """Test large implementation payloads are stored once and loaded lazily"""
+        mock_settings = Mock()
+        mock_settings.data_path = tmp_path
+        mock_settings.state_backend = "sqlite"
+        mock_settings.blob_threshold_bytes = 1024
+        mock_get_settings.return_value = mock_settings
+        
+        issue_data = {
+            "number": 5,
+            "title": "Test Issue",
+            "body": "Test body",
+            "labels": [],
+            "html_url": "https://github.com/test/repo/issues/5",
+            "repository": {"full_name": "test/repo"}
+        }
+        implementation = {
+            "summary": "Big change",
+            "changes": [{"file_path": "app.py", "action": "create", "content": "x = 1\n" * 1000}]
+        }
+        
+        manager = StateManager()
+        first = manager.create_task(issue_data, {"priority": "medium"})
+        second = manager.create_task(issue_data, {"priority": "medium"})
+        manager.save_task_implementation(first, implementation)
+        manager.save_task_implementation(second, implementation)
+        manager.save_task_review(first, {"approved": True, "score": 8})
+        
+        stored = manager.get_task(first)["results"]["implementation"]
+        assert "changes" not in stored
+        assert stored == manager.get_task(second)["results"]["implementation"]
+        assert len(list((tmp_path / "blobs").rglob("*.json.z"))) == 1
+        
+        assert manager.get_task_result(first, "implementation") == implementation
+        assert manager.get_task_result(first, "review") == {"approved": True, "score": 8}
+        
+        manager.close()
+    
+    @pytest.mark.parametrize("backend", ["json", "sqlite", "journal"])
+    @patch('src.services.state_manager.get_settings')
+    def test_index_lookups(self, mock_get_settings, backend, tmp_path):
+        """Test issue/PR/repository lookups on every backend"""
+        mock_settings = Mock()
+        mock_settings.data_path = tmp_path
+        mock_settings.state_backend = backend
+        mock_settings.journal_compact_threshold = 10000
+        mock_settings.journal_compact_interval = 3600
+        mock_settings.journal_fsync = False
+        mock_settings.journal_archive = False
+        mock_get_settings.return_value = mock_settings
+        
+        def issue_data(number, repository):
+            return {
+                "number": number,
+                "title": "Test Issue",
+                "body": "Test body",
+                "labels": [],
+                "html_url": f"https://github.com/{repository}/issues/{number}",
+                "repository": {"full_name": repository}
+            }
+        
+        manager = StateManager()
+        first = manager.create_task(issue_data(1, "test/repo"), {"priority": "medium"})
+        retry = manager.create_task(issue_data(1, "test/repo"), {"priority": "medium"})
+        other = manager.create_task(issue_data(1, "test/other"), {"priority": "medium"})
+        manager.save_task_git_info(retry, "claude/issue-1", "https://github.com/test/repo/pull/9", 9)
+        
+        assert manager.get_task_id_for_issue("test/repo", 1) == retry
+        assert manager.get_task_id_for_issue("test/other", 1) == other
+        assert manager.get_task_id_for_issue("test/repo", 2) is None
+        assert manager.get_task_id_for_pr("test/repo", 9) == retry
+        assert manager.get_task_id_for_pr("test/other", 9) is None
+        assert manager.list_task_ids_for_repository("test/repo") == sorted([first, retry])
+        manager.close()
+        
+        # Indexes survive a restart
+        manager = StateManager()
+        assert manager.get_task_id_for_pr("test/repo", 9) == retry
+        manager.close()
+    
+    @pytest.mark.parametrize("backend", ["json", "sqlite", "journal"])
+    @patch('src.services.state_manager.get_settings')
+    def test_issue_lookup_after_removing_newest_task(self, mock_get_settings, backend, tmp_path):
+        """Test an issue still maps to its older task once the newest one is cleaned up"""
+        mock_settings = Mock()
+        mock_settings.data_path = tmp_path
+        mock_settings.state_backend = backend
+        mock_settings.journal_compact_threshold = 10000
+        mock_settings.journal_compact_interval = 3600
+        mock_settings.journal_fsync = False
+        mock_settings.journal_archive = False
+        mock_get_settings.return_value = mock_settings
+        
+        issue_data = {
+            "number": 4,
+            "title": "Test Issue",
+            "body": "Test body",
+            "labels": [],
+            "html_url": "https://github.com/test/repo/issues/4",
+            "repository": {"full_name": "test/repo"}
+        }
+        
+        manager = StateManager()
+        first = manager.create_task(issue_data, {"priority": "medium"})
+        newest = manager.create_task(issue_data, {"priority": "medium"})
+        manager.update_task_status(newest, "completed")
+        assert manager.get_task_id_for_issue("test/repo", 4) == newest
+        
+        assert manager.cleanup_old_tasks(days=-1) == 1
+        assert manager.get_task_id_for_issue("test/repo", 4) == first
+        manager.close()
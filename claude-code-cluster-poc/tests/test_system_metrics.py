@@ -0,0 +1,36 @@
+"""Tests for node resource sampling"""
+
+from src.utils.system_metrics import SystemSampler
+
+
+class TestSystemSampler:
+    """Test /proc based resource readings"""
+    
+    def test_reads_proc_files(self, tmp_path):
+        """Test load, memory and swap are parsed from a /proc tree"""
+        proc = tmp_path / "proc"
+        proc.mkdir()
+        (proc / "loadavg").write_text("3.00 2.00 1.00 2/71 3163\n")
+        (proc / "meminfo").write_text("MemTotal:  8000000 kB\nMemFree:  100000 kB\nMemAvailable:  2000000 kB\n")
+        (proc / "vmstat").write_text("pswpin 100\npswpout 50\n")
+        
+        sampler = SystemSampler(tmp_path, proc=proc)
+        sampler.cpu_count = 2
+        sample = sampler.sample()
+        
+        assert sample["cpu_load"] == 1.5
+        assert sample["memory_available_ratio"] == 0.25
+        assert sample["memory_available_mb"] == round(2000000 / 1024, 1)
+        assert sample["swap_pages_per_second"] is None
+        assert sample["disk_free_mb"] > 0
+        assert sample["subprocesses"] is None
+        
+        (proc / "vmstat").write_text("pswpin 400\npswpout 250\n")
+        assert sampler.swap_rate() > 0
+    
+    def test_missing_proc_reports_none(self, tmp_path):
+        """Test a system without /proc yields empty readings instead of errors"""
+        sample = SystemSampler(tmp_path / "missing", proc=tmp_path / "missing").sample()
+        assert sample["cpu_load"] is None
+        assert sample["memory_available_ratio"] is None
+        assert sample["disk_free_mb"] is None
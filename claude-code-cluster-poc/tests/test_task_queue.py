@@ -0,0 +1,467 @@
+"""Tests for Task Queue"""
+
+import asyncio
+import random
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+from src.services.task_queue import TaskQueue, QueuedTask, TaskPriority
+from src.services.task_executor import TaskExecutor
+from src.services.queue_metrics import render_prometheus
+from src.utils.metrics import RollingCounter, RollingHistogram
+from src.services.fair_queue import FairQueue, parse_repository_map
+from src.services.autoscaler import WorkerAutoscaler, QueueLoad
+from src.services.retry_policy import RetryScheduler, RetryPolicy, classify_error
+from src.core.exceptions import ClaudeClusterError, GitHubAPIError, ClaudeAPIError
+
+
+def make_settings(tmp_path):
+    """Settings for a task queue persisted to a temporary directory"""
+    mock_settings = Mock()
+    mock_settings.data_path = tmp_path
+    mock_settings.queue_persistence = "json"
+    mock_settings.queue_workers = 3
+    mock_settings.queue_min_workers = 1
+    mock_settings.queue_max_workers = 3
+    mock_settings.queue_target_wait = 30.0
+    mock_settings.queue_autoscale_interval = 5.0
+    mock_settings.queue_executor = "thread"
+    mock_settings.queue_repo_max_running = 0
+    mock_settings.queue_repo_limits = ""
+    mock_settings.queue_repo_weights = ""
+    mock_settings.queue_metrics_window = 300.0
+    mock_settings.retry_max_attempts = 3
+    mock_settings.retry_base_delay = 30.0
+    mock_settings.retry_max_delay = 3600.0
+    return mock_settings
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Task queue persisted to a temporary directory"""
+    with patch('src.services.task_queue.get_settings', return_value=make_settings(tmp_path)):
+        yield TaskQueue()
+
+
+class TestTaskQueue:
+    """Test Task Queue functionality"""
+    
+    @pytest.mark.asyncio
+    async def test_priority_order(self, queue):
+        """Test tasks are dequeued by priority, then creation time"""
+        await queue.add_task("low", "low")
+        await queue.add_task("medium-1", "medium")
+        await queue.add_task("urgent", "urgent")
+        await queue.add_task("medium-2", "medium")
+        await queue.add_task("medium-1", "high")
+        
+        order = []
+        while (task := await queue.get_next_task()) is not None:
+            order.append(task.task_id)
+        
+        assert order == ["urgent", "medium-1", "medium-2", "low"]
+    
+    @pytest.mark.asyncio
+    async def test_delayed_retry(self, queue):
+        """Test tasks in retry cooldown are held back until next_retry"""
+        now = datetime.now()
+        queue._push(QueuedTask("later", TaskPriority.URGENT, now, attempts=1,
+                               next_retry=now + timedelta(hours=1)))
+        queue._push(QueuedTask("due", TaskPriority.LOW, now, attempts=1,
+                               next_retry=now - timedelta(seconds=1)))
+        queue.dead_letters.add(QueuedTask("exhausted", TaskPriority.URGENT, now, attempts=3).to_dict())
+        
+        assert (await queue.get_next_task()).task_id == "due"
+        assert await queue.get_next_task() is None
+        
+        status = await queue.get_status()
+        assert status["tasks"]["retry"] == 1
+        assert status["tasks"]["failed"] == 1
+        
+        assert await queue.retry_failed_tasks() == 1
+        assert (await queue.get_next_task()).task_id == "exhausted"
+    
+    @pytest.mark.asyncio
+    async def test_reload(self, queue, tmp_path):
+        """Test the queue is rebuilt from the queue file"""
+        await queue.add_task("task-1", "low")
+        await queue.add_task("task-2", "urgent")
+        
+        with patch('src.services.task_queue.get_settings', return_value=make_settings(tmp_path)):
+            reloaded = TaskQueue()
+        
+        assert (await reloaded.get_next_task()).task_id == "task-2"
+        assert (await reloaded.get_next_task()).task_id == "task-1"
+    
+    @pytest.mark.asyncio
+    async def test_completion_keeps_requeued_task(self, tmp_path):
+        """Test completing a task that was queued again meanwhile keeps its journal record"""
+        settings = make_settings(tmp_path)
+        settings.queue_persistence = "journal"
+        settings.journal_compact_threshold = 10000
+        settings.journal_compact_interval = 60.0
+        settings.journal_fsync = False
+        settings.journal_archive = False
+        with patch('src.services.task_queue.get_settings', return_value=settings):
+            queue = TaskQueue()
+            await queue.add_task("task-1", "high")
+            await queue.get_next_task()
+            await queue.add_task("task-1", "high")
+            await queue.mark_task_completed("task-1")
+            queue.journal.close()
+            
+            reloaded = TaskQueue()
+        
+        assert (await reloaded.get_next_task()).task_id == "task-1"
+        reloaded.journal.close()
+    
+    @pytest.mark.asyncio
+    async def test_workers_wake_on_enqueue_and_retry(self, queue):
+        """Test idle workers pick up new tasks and due retries without polling"""
+        processed = []
+        
+        async def process(task):
+            processed.append(task.task_id)
+        
+        queue.worker_count = 1
+        queue._process_task = process
+        await queue.start()
+        
+        try:
+            await queue.add_task("task-1", "medium")
+            await asyncio.sleep(0.05)
+            assert processed == ["task-1"]
+            
+            now = datetime.now()
+            queue._push(QueuedTask("retry-1", TaskPriority.MEDIUM, now, attempts=1,
+                                   next_retry=now + timedelta(milliseconds=100)))
+            await queue._notify_workers()
+            await asyncio.sleep(0.05)
+            assert processed == ["task-1"]
+            await asyncio.sleep(0.15)
+            assert processed == ["task-1", "retry-1"]
+        finally:
+            await queue.stop()
+    
+    @pytest.mark.asyncio
+    async def test_failed_task_backoff_and_dead_letter(self, queue):
+        """Test retries keep attempts and priority, back off, then dead-letter"""
+        await queue.add_task("task-1", "high")
+        
+        for attempt in range(1, 4):
+            task = await queue.get_next_task()
+            assert task is not None and task.priority == TaskPriority.HIGH
+            task.attempts += 1
+            await queue.mark_task_failed(task.task_id, "boom", task=task)
+            
+            if attempt < 3:
+                retry = queue.queue["task-1"]
+                assert retry.attempts == attempt
+                delay = (retry.next_retry - datetime.now()).total_seconds()
+                assert 15 * 2 ** (attempt - 1) - 1 <= delay <= 30 * 2 ** (attempt - 1)
+                assert await queue.get_next_task() is None
+                retry.next_retry = datetime.now()
+                queue._push(retry)
+        
+        assert "task-1" not in queue.queue
+        assert queue.dead_letters.get("task-1")["task"]["attempts"] == 3
+        assert (await queue.get_status())["tasks"]["failed"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_permanent_error_dead_letters_immediately(self, queue):
+        """Test permanent errors skip the retry schedule"""
+        await queue.add_task("task-1", "medium")
+        task = await queue.get_next_task()
+        task.attempts += 1
+        
+        await queue.mark_task_failed(task.task_id, "Task execution failed: Task task-1 is not in created state",
+                                     task=task)
+        
+        assert len(queue.queue) == 0
+        assert queue.dead_letters.get("task-1")["task"]["error_class"] == "invalid_task"
+    
+    @pytest.mark.asyncio
+    async def test_dead_letter_filter_and_redrive(self, queue, tmp_path):
+        """Test dead letters can be paged, filtered and selectively re-driven"""
+        for i, (repository, error) in enumerate([("test/a", "API rate limit exceeded"),
+                                                 ("test/b", "API rate limit exceeded"),
+                                                 ("test/a", "Task is not in created state")]):
+            await queue.add_task(f"task-{i}", "high", repository=repository)
+            task = await queue.get_next_task()
+            task.attempts = 6
+            await queue.mark_task_failed(task.task_id, error, task=task)
+        
+        assert queue.list_dead_letters()["total"] == 3
+        assert [e["task_id"] for e in queue.list_dead_letters(repository="test/a")["items"]] == ["task-2", "task-0"]
+        page = queue.list_dead_letters(error_class="rate_limit", limit=1)
+        assert page["total"] == 2 and len(page["items"]) == 1
+        
+        # Dead letters survive a restart
+        with patch('src.services.task_queue.get_settings', return_value=make_settings(tmp_path)):
+            queue = TaskQueue()
+        
+        assert await queue.redrive_dead_letters(error_class="rate_limit", repository="test/a") == ["task-0"]
+        task = await queue.get_next_task()
+        assert task.task_id == "task-0"
+        assert task.attempts == 0 and task.priority == TaskPriority.HIGH
+        assert task.history[-1]["error_class"] == "rate_limit"
+        
+        assert (await queue.get_status())["dead_letter"]["by_error_class"] == {"rate_limit": 1, "invalid_task": 1}
+    
+    @pytest.mark.asyncio
+    async def test_scale_workers(self, queue):
+        """Test the worker set grows and idle workers retire"""
+        queue.worker_count = 1
+        await queue.start()
+        
+        try:
+            await queue._scale_to(3)
+            assert len(queue.workers) == 3
+            
+            await queue._scale_to(1)
+            await asyncio.sleep(0.01)
+            assert len(queue.workers) == 1
+            assert (await queue.get_status())["autoscaling"]["target_workers"] == 1
+        finally:
+            await queue.stop()
+    
+    @pytest.mark.asyncio
+    async def test_queue_load_uses_ready_time(self, tmp_path):
+        """Test the autoscaler sees the longest wait since a task became ready, without scanning the queue"""
+        settings = make_settings(tmp_path)
+        settings.queue_repo_limits = "org/capped=1"
+        with patch('src.services.task_queue.get_settings', return_value=settings):
+            queue = TaskQueue()
+        
+        await queue.add_task("retried", "high", repository="org/other")
+        await queue.add_task("waiting", "low", repository="org/other")
+        await queue.add_task("capped-0", "high", repository="org/capped")
+        await queue.add_task("capped-1", "high", repository="org/capped")
+        for task_id, age in (("waiting", 50), ("capped-0", 600), ("capped-1", 500)):
+            # Re-push so the backdated enqueue time is indexed
+            task = queue._discard(task_id)
+            task.created_at = task.enqueued_at = datetime.now() - timedelta(seconds=age)
+            queue._push(task)
+        
+        dequeued = {task.task_id: task for task in [await queue.get_next_task(), await queue.get_next_task()]}
+        assert set(dequeued) == {"capped-0", "retried"}
+        task = dequeued["retried"]
+        task.created_at = datetime.now() - timedelta(seconds=1000)
+        await queue.mark_task_failed("retried", "Connection reset", task=task)
+        
+        with patch.object(queue, "queue", {}):
+            load = queue._queue_load()
+        
+        # The capped repository and the retry that is not due yet do not count
+        assert load.ready == 1
+        assert 49 <= load.oldest_wait < 60
+        
+        queue.queue["retried"].next_retry = datetime.now() - timedelta(seconds=5)
+        queue._push(queue.queue["retried"])
+        load = queue._queue_load()
+        assert load.ready == 2 and 49 <= load.oldest_wait < 60
+    
+    @pytest.mark.asyncio
+    async def test_repositories_share_the_queue(self, queue):
+        """Test a burst from one repository does not starve another"""
+        for i in range(6):
+            await queue.add_task(f"busy-{i}", "medium", repository="org/busy")
+        await queue.add_task("quiet-0", "medium", repository="org/quiet")
+        await queue.add_task("quiet-1", "medium", repository="org/quiet")
+        await queue.add_task("urgent", "urgent", repository="org/busy")
+        
+        order = []
+        while (task := await queue.get_next_task()) is not None:
+            order.append(task.task_id)
+        
+        # Priority still wins, then the repositories alternate
+        assert order[:5] == ["urgent", "quiet-0", "busy-0", "quiet-1", "busy-1"]
+        assert order[5:] == ["busy-2", "busy-3", "busy-4", "busy-5"]
+    
+    @pytest.mark.asyncio
+    async def test_repository_concurrency_cap(self, tmp_path):
+        """Test a capped repository waits for a running task to finish"""
+        settings = make_settings(tmp_path)
+        settings.queue_repo_limits = "org/capped=1"
+        with patch('src.services.task_queue.get_settings', return_value=settings):
+            queue = TaskQueue()
+        
+        await queue.add_task("capped-0", "high", repository="org/capped")
+        await queue.add_task("capped-1", "high", repository="org/capped")
+        await queue.add_task("other", "low", repository="org/other")
+        
+        assert (await queue.get_next_task()).task_id == "capped-0"
+        assert (await queue.get_next_task()).task_id == "other"
+        assert await queue.get_next_task() is None
+        
+        status = await queue.get_status()
+        assert status["repositories"]["org/capped"] == {"queued": 1, "running": 1, "max_running": 1, "weight": 1.0}
+        
+        await queue.mark_task_completed("capped-0")
+        assert (await queue.get_next_task()).task_id == "capped-1"
+
+    
+    @pytest.mark.asyncio
+    async def test_metrics(self, queue):
+        """Test wait and service times, throughput and counters are recorded"""
+        await queue.add_task("task-1", "medium", repository="org/repo")
+        await queue.add_task("task-2", "medium", repository="org/repo")
+        
+        task = await queue.get_next_task()
+        task.dequeued_at -= timedelta(seconds=2)
+        queue.metrics.task_finished(task, succeeded=True)
+        await queue.mark_task_completed(task.task_id)
+        
+        task = await queue.get_next_task()
+        await queue.mark_task_failed(task.task_id, "Connection reset", task=task)
+        
+        status = await queue.get_status(include_recent=True)
+        metrics = status["metrics"]
+        assert status["tasks"]["retry"] == 1
+        assert status["repositories"]["org/repo"]["queued"] == 1
+        assert metrics["wait_seconds"]["count"] == 2
+        assert 1.8 <= metrics["service_seconds"]["p99"] <= 2.5
+        assert metrics["throughput_per_minute"]["completed"] > 0
+        assert metrics["totals"] == {"enqueued": 2, "dequeued": 2, "completed": 1, "failed": 0,
+                                     "retried": 1, "dead_lettered": 0}
+        assert metrics["recent"][0]["task_id"] == "task-1"
+        assert "task_queue_wait_seconds_count 2" in render_prometheus(status)
+
+
+class TestRollingHistogram:
+    """Test rolling latency histograms"""
+    
+    def test_percentiles_and_expiry(self):
+        """Test percentiles are within bucket accuracy and old samples expire"""
+        now = [0.0]
+        histogram = RollingHistogram(window=60, slices=6, clock=lambda: now[0])
+        for i in range(1, 101):
+            histogram.record(i / 10)
+        
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 100
+        assert snapshot["max"] == 10.0
+        assert 5.0 <= snapshot["p50"] <= 5.0 * 1.13
+        assert 9.5 <= snapshot["p95"] <= 9.5 * 1.13
+        assert snapshot["p99"] <= 10.0
+        
+        now[0] = 61.0
+        histogram.record(0.5)
+        assert histogram.snapshot()["count"] == 1
+        
+        counter = RollingCounter(window=60, slices=6, clock=lambda: now[0])
+        now[0] = 100.0
+        counter.add(30)
+        now[0] = 125.0
+        assert counter.rate_per_minute() == 30.0
+        now[0] = 185.0
+        assert counter.rate_per_minute() == 0.0
+
+
+class TestFairQueue:
+    """Test deficit round robin across repositories"""
+    
+    def test_weighted_shares(self):
+        """Test dequeues follow repository weights"""
+        fair_queue = FairQueue(weights=parse_repository_map("org/a=2, org/c=0.5"))
+        for i in range(8):
+            for repository in ("org/a", "org/b", "org/c"):
+                fair_queue.push(repository, (2, i, i, f"{repository}-{i}"))
+        
+        served = [fair_queue.pop(lambda entry: True)[3].split("-")[0] for _ in range(14)]
+        
+        assert served.count("org/a") == 8
+        assert served.count("org/b") == 4
+        assert served.count("org/c") == 2
+        
+        with pytest.raises(ValueError):
+            parse_repository_map("org/a")
+
+
+class TestWorkerAutoscaler:
+    """Test autoscaling decisions"""
+    
+    def test_desired_workers(self):
+        """Test scaling follows backlog, oldest wait and service time within bounds"""
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=10, target_wait=30)
+        
+        # 6 ready tasks of ~10s each drain within 30s with 2 more workers
+        assert autoscaler.desired_workers(QueueLoad(2, 2, 6, 5.0, 10.0)) == 4
+        # A burst is capped at max_workers
+        assert autoscaler.desired_workers(QueueLoad(2, 2, 200, 5.0, 60.0)) == 10
+        # An old task forces growth even when the estimate says otherwise
+        assert autoscaler.desired_workers(QueueLoad(3, 3, 1, 120.0, 1.0)) == 4
+        # Idle workers are released one at a time, never below the minimum
+        assert autoscaler.desired_workers(QueueLoad(5, 0, 0, 0.0, 10.0)) == 4
+        assert autoscaler.desired_workers(QueueLoad(1, 0, 0, 0.0, None)) == 1
+        assert not WorkerAutoscaler(3, 3).enabled
+
+
+class TestRetryScheduler:
+    """Test retry policy functionality"""
+    
+    def test_classify_error(self):
+        """Test failures are mapped to error classes through wrapped exceptions"""
+        try:
+            try:
+                raise GitHubAPIError("API rate limit exceeded")
+            except GitHubAPIError as e:
+                raise ClaudeClusterError(f"Task execution failed: {e}")
+        except ClaudeClusterError as wrapped:
+            assert classify_error(wrapped) == "rate_limit"
+        
+        assert classify_error(ConnectionResetError("reset by peer")) == "transient"
+        assert classify_error(ClaudeAPIError("invalid response")) == "claude"
+        assert classify_error("Task abc is not in created state") == "invalid_task"
+        assert classify_error("Task abc is not in created or failed state (status: running)") == "invalid_task"
+        assert classify_error("something odd") == "default"
+    
+    def test_backoff_is_capped(self):
+        """Test exponential backoff with jitter never exceeds the ceiling"""
+        scheduler = RetryScheduler(RetryPolicy(base_delay=10, max_delay=10000), ceiling=100, rng=random.Random(1))
+        now = datetime.now()
+        
+        delays = [(scheduler.next_retry(None, attempts, now) - now).total_seconds() for attempts in range(1, 10)]
+        
+        assert 5 <= delays[0] <= 10
+        assert 10 <= delays[1] <= 20
+        assert all(delay <= 100 for delay in delays)
+        assert scheduler.max_attempts("rate_limit", 3) == 6
+        assert scheduler.max_attempts("github", 3) == 3
+
+
+class TestTaskExecutor:
+    """Test Task Executor functionality"""
+    
+    @pytest.mark.asyncio
+    async def test_thread_pool_runs_tasks_concurrently(self):
+        """Test blocking tasks run in parallel without stalling the event loop"""
+        def blocking_run(task_id):
+            time.sleep(0.2)
+            return {"task_id": task_id, "thread": threading.current_thread().name}
+        
+        executor = TaskExecutor("thread", max_workers=2)
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        with patch('src.services.task_executor._warm_worker'), \
+                patch('src.services.task_executor._run_task', side_effect=blocking_run):
+            ticking = asyncio.create_task(ticker())
+            start = time.perf_counter()
+            results = await asyncio.gather(executor.run_task("task-1"), executor.run_task("task-2"))
+            elapsed = time.perf_counter() - start
+            ticking.cancel()
+        
+        executor.shutdown()
+        
+        assert elapsed < 0.35
+        assert ticks >= 10
+        assert [r["task_id"] for r in results] == ["task-1", "task-2"]
+        assert all(r["thread"].startswith("task-executor") for r in results)